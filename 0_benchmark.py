@@ -0,0 +1,848 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks de rendimiento y precisión de los componentes del MCTS.
+
+Cada subcomando mide una variante contra la implementación de referencia
+sobre el banco de posiciones de los reportes (posiciones.TEST_POSITIONS) y
+escribe un CSV en mcts_report_output/benchmarks/.
+
+Uso:
+    python 0_benchmark.py value-model --model modelos/value_linear.npz [--syzygy-dir DIR]
+    python 0_benchmark.py see [--repeats 200]
+    python 0_benchmark.py symmetry [--rollouts 50] [--syzygy-dir DIR]
+    python 0_benchmark.py eval [--rollouts 20]
+    python 0_benchmark.py rave [--budgets 25 50 100 200 400] [--ref-iters 800] [--positions NOMBRE ...]
+    python 0_benchmark.py selection [--budgets ...] [--positions NOMBRE ...]
+    python 0_benchmark.py root-policy [--budgets 16 32 64 128] [--positions NOMBRE ...]
+    python 0_benchmark.py widening [--pw-k 2] [--pw-alpha 0.5] [--min-branching 20] [--positions NOMBRE ...]
+    python 0_benchmark.py implicit-minimax [--im-alpha 0.4] [--budgets ...] [--positions NOMBRE ...]
+    python 0_benchmark.py leaf-eval [--ab-depths 2 3] [--time 0.5] [--games 2] [--positions NOMBRE ...]
+    python 0_benchmark.py pns [--mate-in 5] [--nodes 100000] [--mcts-time 1.0] [--positions NOMBRE ...]
+    python 0_benchmark.py retro [--dir datos/retro] [--samples 2000] [--mate-in 3] [--syzygy-dir DIR]
+    python 0_benchmark.py --syzygy-dir DIR tb-compiled [--dir datos/tb_compiled] [--samples 5000] [--iters 300]
+    python 0_benchmark.py fast-rollout [--rollouts 200] [--max-plies 30]
+    python 0_benchmark.py value-cache [--iters 400] [--sizes 50000] [--min-counts 1 4] [--positions NOMBRE ...]
+    python 0_benchmark.py vec-rollout [--rollouts 200] [--lanes 64 256] [--batch-size 8] [--iters 200]
+"""
+
+import argparse
+import csv
+import os
+import random
+import time
+
+import chess
+import numpy as np
+
+from bb_utils import see_square
+from mcts_core import (mcts_search, rollout_policy, simulate, is_piece_hanging, evaluate_endgame_position,
+                       evaluate_endgame_batch, SearchConfig, ROLLOUT_MAX_PLIES)
+from posiciones import TEST_POSITIONS
+from symmetry import canonical_key, position_key
+from tb_utils import TBLite, best_moves_by_tb, probe_wdl, wdl_to_score
+
+BENCH_DIR = os.path.join("mcts_report_output", "benchmarks")
+
+# --- Helpers ---
+
+def write_csv(rows, path):
+    if not rows:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"CSV: {path}")
+
+def print_rows(rows):
+    if not rows:
+        return
+    cols = list(rows[0].keys())
+    widths = {c: max(len(c), *(len(_fmt(r.get(c, ""))) for r in rows)) for c in cols}
+    print(" | ".join(c.ljust(widths[c]) for c in cols))
+    print("-+-".join("-" * widths[c] for c in cols))
+    for r in rows:
+        print(" | ".join(_fmt(r.get(c, "")).ljust(widths[c]) for c in cols))
+
+def _fmt(v):
+    return f"{v:.4g}" if isinstance(v, float) else str(v)
+
+def reference_value(board, meta, tb=None):
+    """Valor teórico para el bando al mover: Syzygy si hay, si no `expected_mate_in` (gana)."""
+    if tb is not None and tb.obj is not None:
+        s = wdl_to_score(probe_wdl(board, tb.obj))
+        if s is not None:
+            return s
+    if meta.get('expected_mate_in'):
+        return 1.0
+    return None
+
+# --- Modelo de valor lineal vs rollouts pesados ---
+
+def bench_value_model(args, tb):
+    from value_model import LinearValueModel, LinearValueEvaluator
+
+    evaluator = LinearValueEvaluator(LinearValueModel.load(args.model))
+    rows = []
+    for name, meta in TEST_POSITIONS.items():
+        board = chess.Board(meta['fen'])
+        if board.is_game_over():
+            continue
+        root_turn = board.turn
+
+        t0 = time.perf_counter()
+        rollouts = [simulate(board, tb=tb, root_turn=root_turn)[0] for _ in range(args.rollouts)]
+        t_roll = (time.perf_counter() - t0) / args.rollouts
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeats):
+            linear = evaluator.evaluate([board], root_turn, tb=tb)[0][0]
+        t_lin = (time.perf_counter() - t0) / args.repeats
+
+        rows.append({
+            'position': name,
+            'reference': reference_value(board, meta, tb),
+            'rollout_mean': float(np.mean(rollouts)),
+            'rollout_std': float(np.std(rollouts)),
+            'linear': linear,
+            'rollout_us': t_roll * 1e6,
+            'linear_us': t_lin * 1e6,
+        })
+
+    print_rows(rows)
+    labeled = [r for r in rows if r['reference'] is not None]
+    if labeled:
+        ref = np.array([r['reference'] for r in labeled])
+        for key in ('rollout_mean', 'linear'):
+            pred = np.array([r[key] for r in labeled])
+            print(f"{key:13s} MAE={np.mean(np.abs(pred - ref)):.3f}  signo correcto={np.mean(np.sign(pred) == np.sign(ref)) * 100:.0f}%")
+    print(f"Velocidad media: rollout {np.mean([r['rollout_us'] for r in rows]):.0f} µs | lineal {np.mean([r['linear_us'] for r in rows]):.0f} µs")
+    write_csv(rows, os.path.join(BENCH_DIR, 'value_model_vs_rollouts.csv'))
+
+# --- SEE vs is_piece_hanging ---
+
+def bench_see(args, tb):
+    """Misma llamada que hacen expand/rollout_policy: tras cada jugada legal, ¿cuelga la pieza movida?"""
+    rows = []
+    for name, meta in TEST_POSITIONS.items():
+        board = chess.Board(meta['fen'])
+        after = []
+        for mv in board.legal_moves:
+            b = board.copy(stack=False)
+            b.push(mv)
+            after.append((b, mv.to_square))
+        if not after:
+            continue
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeats):
+            old = [is_piece_hanging(b, sq) for b, sq in after]
+        t_old = (time.perf_counter() - t0) / (args.repeats * len(after))
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeats):
+            new = [see_square(b, sq) for b, sq in after]
+        t_see = (time.perf_counter() - t0) / (args.repeats * len(after))
+
+        rows.append({
+            'position': name,
+            'moves': len(after),
+            'hanging_old': sum(old),
+            'hanging_see': sum(1 for v in new if v > 0),
+            'disagree': sum(1 for o, v in zip(old, new) if o != (v > 0)),
+            'old_us': t_old * 1e6,
+            'see_us': t_see * 1e6,
+        })
+
+    print_rows(rows)
+    print(f"Media por llamada: is_piece_hanging {np.mean([r['old_us'] for r in rows]):.2f} µs | see_square {np.mean([r['see_us'] for r in rows]):.2f} µs")
+    print(f"Desacuerdos: {sum(r['disagree'] for r in rows)} de {sum(r['moves'] for r in rows)} jugadas")
+    write_csv(rows, os.path.join(BENCH_DIR, 'see_vs_hanging.csv'))
+
+# --- Canonicalización por simetría: tasa de aciertos de caché ---
+
+def bench_symmetry(args, tb):
+    """
+    Tasa de aciertos de una caché ilimitada indexada por posición exacta vs por
+    orientación canónica, sobre las posiciones que recorren los rollouts (lo que
+    consultaría una caché de evaluación o de Syzygy). Con --syzygy-dir además se
+    mide la caché real de sondeos durante una búsqueda con cada tipo de clave.
+    """
+    rows = []
+    all_exact, all_canon, all_lookups = set(), set(), 0   # caché compartida por todo el banco
+    for name, meta in TEST_POSITIONS.items():
+        board = chess.Board(meta['fen'])
+        rng = random.Random(args.seed)
+        exact, canon, lookups = set(), set(), 0
+        for _ in range(args.rollouts):
+            b = board.copy(stack=False)
+            visited = set()
+            for _ in range(ROLLOUT_MAX_PLIES):
+                if b.is_game_over():
+                    break
+                mv = rollout_policy(b, visited, rng)
+                if mv is None:
+                    break
+                b.push(mv)
+                visited.add(b.fen().split(' ')[0])
+                exact.add(position_key(b))
+                canon.add(canonical_key(b)[0])
+                lookups += 1
+        if not lookups:
+            continue
+        all_exact |= exact
+        all_canon |= canon
+        all_lookups += lookups
+        row = {
+            'position': name,
+            'lookups': lookups,
+            'hit_rate_exact': 1 - len(exact) / lookups,
+            'hit_rate_canonical': 1 - len(canon) / lookups,
+        }
+        if tb.obj is not None:
+            for symmetric in (False, True):
+                with TBLite(tb.path, symmetric=symmetric, retro_dir=tb.retro_dir) as tbc:
+                    mcts_search(board, time_limit=None, max_iters=args.iters, seed=args.seed, tb=tbc)
+                    row['tb_hit_rate_' + ('canonical' if symmetric else 'exact')] = tbc.obj.stats()['tb_cache_hit_rate']
+        rows.append(row)
+
+    rows.append({'position': 'TODAS (caché compartida)', 'lookups': all_lookups,
+                 'hit_rate_exact': 1 - len(all_exact) / all_lookups,
+                 'hit_rate_canonical': 1 - len(all_canon) / all_lookups})
+    print_rows(rows)
+    write_csv(rows, os.path.join(BENCH_DIR, 'symmetry_cache_hits.csv'))
+
+# --- Evaluación estática: escalar vs por lotes ---
+
+def rollout_boards(board, rollouts, rng):
+    """Tableros que recorren `rollouts` rollouts de la política por defecto desde `board`."""
+    boards = [board.copy(stack=False)]
+    for _ in range(rollouts):
+        b = board.copy(stack=False)
+        visited = set()
+        for _ in range(ROLLOUT_MAX_PLIES):
+            if b.is_game_over():
+                break
+            mv = rollout_policy(b, visited, rng)
+            if mv is None:
+                break
+            b.push(mv)
+            visited.add(b.fen().split(' ')[0])
+            boards.append(b.copy(stack=False))
+    return boards
+
+def bench_eval(args, tb):
+    rows = []
+    for name, meta in TEST_POSITIONS.items():
+        board = chess.Board(meta['fen'])
+        boards = rollout_boards(board, args.rollouts, random.Random(args.seed))
+        root_turn = board.turn
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeats):
+            scalar = [evaluate_endgame_position(b, root_turn) for b in boards]
+        t_scalar = (time.perf_counter() - t0) / (args.repeats * len(boards))
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeats):
+            batch = evaluate_endgame_batch(boards, root_turn)
+        t_batch = (time.perf_counter() - t0) / (args.repeats * len(boards))
+
+        rows.append({
+            'position': name,
+            'boards': len(boards),
+            'scalar_us': t_scalar * 1e6,
+            'batch_us': t_batch * 1e6,
+            'max_abs_diff': float(np.max(np.abs(np.array(scalar) - batch))),
+        })
+
+    print_rows(rows)
+    print(f"Media por tablero: escalar {np.mean([r['scalar_us'] for r in rows]):.2f} µs | lote {np.mean([r['batch_us'] for r in rows]):.2f} µs")
+    write_csv(rows, os.path.join(BENCH_DIR, 'eval_scalar_vs_batch.csv'))
+
+# --- Convergencia a presupuesto fijo de iteraciones ---
+
+def selected_positions(args):
+    names = args.positions or list(TEST_POSITIONS)
+    return [(n, TEST_POSITIONS[n]) for n in names]
+
+def forces_mate(board, n):
+    """¿El bando al mover da mate en <= n jugadas contra cualquier defensa? (búsqueda exacta)"""
+    for mv in board.legal_moves:
+        board.push(mv)
+        try:
+            if board.is_checkmate():
+                return True
+            if n > 1 and not board.is_game_over() and all(_defence_loses(board, reply, n - 1) for reply in list(board.legal_moves)):
+                return True
+        finally:
+            board.pop()
+    return False
+
+def _defence_loses(board, reply, n):
+    board.push(reply)
+    try:
+        return forces_mate(board, n)
+    finally:
+        board.pop()
+
+def mating_moves(board, n):
+    """Jugadas que fuerzan mate en <= n (vacío si no hay)."""
+    moves = set()
+    for mv in list(board.legal_moves):
+        board.push(mv)
+        if board.is_checkmate():
+            moves.add(mv.uci())
+        elif n > 1 and not board.is_game_over() and all(_defence_loses(board, r, n - 1) for r in list(board.legal_moves)):
+            moves.add(mv.uci())
+        board.pop()
+    return moves
+
+def reference_moves(board, tb, args):
+    """Jugadas correctas: las óptimas de Syzygy si hay; las que fuerzan el mate esperado (hasta
+    mate en 3, por búsqueda exacta); si no, la elegida por una búsqueda larga."""
+    if tb is not None and tb.obj is not None:
+        best = best_moves_by_tb(board, tb.obj)['best_set']
+        if best:
+            return set(best), 'tb'
+    mate_in = args.mate_in.get(board.fen())
+    if mate_in and mate_in <= 3:
+        moves = mating_moves(board.copy(), mate_in)
+        if moves:
+            return moves, f'mate_in_{mate_in}'
+    mv, _ = mcts_search(board, time_limit=None, max_iters=args.ref_iters, seed=args.seed, tb=tb,
+                        config=SearchConfig(time_management=False))
+    return ({mv.uci()} if mv else set()), f'search_{args.ref_iters}'
+
+def settle_budget(board, tb, config, args, reference):
+    """Menor presupuesto de `args.budgets` a partir del cual la jugada elegida ya siempre es correcta."""
+    choices = []
+    for budget in args.budgets:
+        mv, _ = mcts_search(board, time_limit=None, max_iters=budget, seed=args.seed, tb=tb, config=config)
+        choices.append(mv.uci() if mv else None)
+    settled = None
+    for budget, choice in reversed(list(zip(args.budgets, choices))):
+        if choice not in reference:
+            break
+        settled = budget
+    return settled, choices
+
+def compare_variants(args, tb, variants: dict, csv_name: str):
+    """Para cada variante (etiqueta -> SearchConfig): presupuesto en que se asienta la jugada correcta
+    y aciertos por presupuesto. Misma semilla para todas; gestión de tiempo desactivada."""
+    rows = []
+    for name, meta in selected_positions(args):
+        board = chess.Board(meta['fen'])
+        if board.is_game_over():
+            continue
+        args.mate_in = {board.fen(): meta.get('expected_mate_in')}
+        reference, source = reference_moves(board, tb, args)
+        row = {'position': name, 'reference': ' '.join(sorted(reference)), 'ref_source': source}
+        for label, config in variants.items():
+            settled, choices = settle_budget(board, tb, config, args, reference)
+            row[f'settle_{label}'] = settled
+            row[f'correct_{label}'] = sum(c in reference for c in choices)
+            row[f'choices_{label}'] = ' '.join(str(c) for c in choices)
+        rows.append(row)
+        print(f"{name}: " + ' '.join(f"{label}={row[f'settle_{label}']}" for label in variants))
+
+    print_rows([{k: v for k, v in r.items() if not k.startswith('choices')} for r in rows])
+    for label in variants:
+        ok = [r[f'settle_{label}'] for r in rows if r[f'settle_{label}'] is not None]
+        correct = sum(r[f'correct_{label}'] for r in rows)
+        print(f"{label:12s} asentadas {len(ok)}/{len(rows)}  mediana={np.median(ok) if ok else '-'} iteraciones  "
+              f"correctas {correct}/{len(rows) * len(args.budgets)}")
+    write_csv(rows, os.path.join(BENCH_DIR, csv_name))
+
+def bench_rave(args, tb):
+    """Iteraciones hasta fijar la jugada correcta con y sin RAVE."""
+    compare_variants(args, tb, {
+        'uct': SearchConfig(time_management=False),
+        'rave': SearchConfig(time_management=False, rave=True, rave_k=args.rave_k),
+    }, 'rave_settle.csv')
+
+def bench_selection(args, tb):
+    """UCT vs UCB1-Tuned a presupuestos fijos de iteraciones."""
+    compare_variants(args, tb, {
+        'uct': SearchConfig(time_management=False),
+        'ucb1_tuned': SearchConfig(time_management=False, selection='ucb1_tuned'),
+    }, 'selection_settle.csv')
+
+def bench_root_policy(args, tb):
+    """UCT vs sequential halving en la raíz a presupuestos pequeños."""
+    compare_variants(args, tb, {
+        'uct': SearchConfig(time_management=False),
+        'halving': SearchConfig(time_management=False, root_policy='sequential_halving', sh_candidates=args.candidates),
+    }, 'root_policy_settle.csv')
+
+def bench_widening(args, tb):
+    """UCT vs progressive widening en las posiciones con más jugadas legales."""
+    if args.positions is None:
+        args.positions = [n for n, meta in TEST_POSITIONS.items()
+                          if chess.Board(meta['fen']).legal_moves.count() >= args.min_branching]
+    compare_variants(args, tb, {
+        'uct': SearchConfig(time_management=False),
+        'widening': SearchConfig(time_management=False, widening=True, pw_k=args.pw_k, pw_alpha=args.pw_alpha),
+    }, 'widening_settle.csv')
+
+MOPUP_POSITIONS = ('King and Queen vs King (WTM)', 'King and Rook vs King (WTM)', 'Two Rooks vs King',
+                   'Mate en 2 - R vs K')
+
+def bench_implicit_minimax(args, tb):
+    """UCT vs implicit minimax en los finales de mop-up (KQK, KRK, dos torres)."""
+    if args.positions is None:
+        args.positions = list(MOPUP_POSITIONS)
+    compare_variants(args, tb, {
+        'uct': SearchConfig(time_management=False),
+        'minimax': SearchConfig(time_management=False, implicit_minimax=True, im_alpha=args.im_alpha),
+    }, 'implicit_minimax_settle.csv')
+
+# --- Evaluación de hojas: rollouts vs alfa-beta ---
+
+def play_vs_simple_opponent(board, evaluator, args, rng, tb):
+    """Partida MCTS contra el oponente de los reportes (aleatorio, evita dejarse mate en 1)."""
+    board = board.copy()
+    search_time, iters = 0.0, 0
+    for i in range(args.max_moves):
+        t0 = time.perf_counter()
+        mv, stats = mcts_search(board, time_limit=args.time, seed=rng.randrange(2**31), tb=tb, evaluator=evaluator)
+        search_time += time.perf_counter() - t0
+        iters += stats.get('iters', 0)
+        if mv is None:
+            break
+        board.push(mv)
+        if board.is_checkmate():
+            return {'mate': True, 'moves': i + 1, 'time': search_time, 'iters': iters}
+        if board.is_game_over():
+            break
+        replies = list(board.legal_moves)
+        safe = [r for r in replies if not _gives_mate(board, r)]
+        board.push(rng.choice(safe or replies))
+        if board.is_game_over():
+            break
+    return {'mate': False, 'moves': None, 'time': search_time, 'iters': iters}
+
+def _gives_mate(board, move):
+    board.push(move)
+    try:
+        return board.is_checkmate()
+    finally:
+        board.pop()
+
+def bench_leaf_eval(args, tb):
+    """Rollouts vs alfa-beta en las hojas: tasa de mate, jugadas y tiempo hasta el mate, iteraciones/s."""
+    from alphabeta import AlphaBetaEvaluator
+
+    if args.positions is None:
+        args.positions = [n for n, meta in TEST_POSITIONS.items() if meta.get('expected_mate_in')]
+    rows = []
+    for name, meta in selected_positions(args):
+        board = chess.Board(meta['fen'])
+        if board.is_game_over():
+            continue
+        variants = {'rollout': lambda: None}
+        variants.update({f'ab{d}': (lambda d=d: AlphaBetaEvaluator(depth=d)) for d in args.ab_depths})
+        for label, make in variants.items():
+            rng = random.Random(args.seed)
+            games = [play_vs_simple_opponent(board, make(), args, rng, tb) for _ in range(args.games)]
+            mates = [g for g in games if g['mate']]
+            total_time = sum(g['time'] for g in games)
+            rows.append({
+                'position': name,
+                'leaf': label,
+                'mate_rate': round(len(mates) / len(games), 2),
+                'moves_to_mate': round(np.mean([g['moves'] for g in mates]), 1) if mates else None,
+                'time_to_mate_s': round(np.mean([g['time'] for g in mates]), 2) if mates else None,
+                'iters_per_sec': round(sum(g['iters'] for g in games) / max(total_time, 1e-9), 1),
+            })
+            print(f"{name} [{label}]: mate {len(mates)}/{len(games)}  {rows[-1]['iters_per_sec']} it/s")
+
+    print_rows(rows)
+    for label in ['rollout'] + [f'ab{d}' for d in args.ab_depths]:
+        sub = [r for r in rows if r['leaf'] == label and r['iters_per_sec'] > 0]   # sin los mates en 1 inmediatos
+        ttm = [r['time_to_mate_s'] for r in sub if r['time_to_mate_s'] is not None]
+        print(f"{label:8s} mate={np.mean([r['mate_rate'] for r in sub]):.2f}  "
+              f"tiempo hasta mate={np.median(ttm) if ttm else '-'} s  it/s={np.median([r['iters_per_sec'] for r in sub]):.1f}")
+    write_csv(rows, os.path.join(BENCH_DIR, 'leaf_eval.csv'))
+
+# --- Proof-number search ---
+
+def bench_pns(args, tb):
+    """Proof-number search vs MCTS en la raíz: ¿hay mate forzado?, línea, nodos y tiempo."""
+    from pns import pn_search
+
+    rows = []
+    for name, meta in selected_positions(args):
+        board = chess.Board(meta['fen'])
+        if board.is_game_over():
+            continue
+        proof = pn_search(board, max_mate_in=args.mate_in, max_nodes=args.nodes)
+        end = board.copy()
+        for uci in proof['line']:
+            end.push_uci(uci)
+        t0 = time.perf_counter()
+        mv, stats = mcts_search(board, time_limit=args.mcts_time, seed=args.seed, tb=tb)
+        mcts_time = time.perf_counter() - t0
+        # Solo se puede juzgar la jugada del MCTS con la búsqueda exacta (mates cortos)
+        mcts_ok = None
+        if proof['mate_in'] and proof['mate_in'] <= 3 and mv is not None:
+            mcts_ok = mv.uci() in mating_moves(board.copy(), proof['mate_in'])
+        rows.append({
+            'position': name,
+            'expected_mate_in': meta.get('expected_mate_in'),
+            'pns_status': proof['status'],
+            'pns_mate_in': proof['mate_in'],
+            'line_ok': end.is_checkmate() if proof['line'] else None,
+            'pns_nodes': proof['nodes'],
+            'pns_time_s': proof['time'],
+            'line': ' '.join(proof['line']),
+            'mcts_move': mv.uci() if mv else None,
+            'mcts_mates': mcts_ok,
+            'mcts_time_s': round(mcts_time, 2),
+        })
+        print(f"{name}: {proof['status']} mate_in={proof['mate_in']} ({proof['nodes']} nodos, {proof['time']} s)")
+
+    print_rows([{k: v for k, v in r.items() if k != 'line'} for r in rows])
+    proven = [r for r in rows if r['pns_status'] == 'proven']
+    print(f"probadas {len(proven)}/{len(rows)}  líneas válidas {sum(bool(r['line_ok']) for r in proven)}/{len(proven)}  "
+          f"tiempo mediano {round(float(np.median([r['pns_time_s'] for r in proven])), 4) if proven else '-'} s")
+    write_csv(rows, os.path.join(BENCH_DIR, 'pns.csv'))
+
+# --- Tablas propias (retro.py) ---
+
+def bench_retro(args, tb):
+    """Tablas retrógradas propias: W/D/L, mate más largo, coste de sondeo y contraste con PNS (y Syzygy si hay)."""
+    from pns import pn_search
+    from retro import RetroTablebase, ILLEGAL, DRAW
+
+    retro = RetroTablebase(args.dir)
+    if not retro.tables:
+        print(f"No hay tablas en {args.dir}: python retro.py --out {args.dir} KQvK KRvK KPvK")
+        return
+    rng = random.Random(args.seed)
+    rows = []
+    for sig, (index, values) in retro.tables.items():
+        legal = values[values != ILLEGAL]
+        samples = []
+        while len(samples) < args.samples:
+            board = index.decode(rng.randrange(index.size))
+            if board is not None:
+                samples.append(board)
+        t0 = time.perf_counter()
+        dtms = [retro.probe_dtm(b) for b in samples]
+        probe_us = (time.perf_counter() - t0) / len(samples) * 1e6
+
+        # Mates cortos: la DTM debe coincidir con el mate más corto que prueba el PNS
+        checked = agree = 0
+        for board, dtm in zip(samples, dtms):
+            if 0 < dtm <= 2 * args.mate_in - 1 and checked < args.pns_checks:
+                checked += 1
+                agree += pn_search(board, max_mate_in=args.mate_in)['mate_in'] == (dtm + 1) // 2
+        syzygy_agree = None
+        if tb.obj is not None and tb.path:
+            syzygy_agree = sum(probe_wdl(b, tb.obj) == retro.probe_wdl(b) for b in samples) / len(samples)
+
+        rows.append({
+            'signature': sig,
+            'positions': int(legal.size),
+            'wins': int(((legal != DRAW) & (legal % 2 == 0)).sum()),
+            'draws': int((legal == DRAW).sum()),
+            'losses': int((legal % 2 == 1).sum()),
+            'longest_mate': int(legal.max()) // 2,
+            'table_kb': round(values.nbytes / 1024, 1),
+            'probe_us': round(probe_us, 1),
+            'pns_agree': f"{agree}/{checked}",
+            'syzygy_wdl_agree': syzygy_agree,
+        })
+    print_rows(rows)
+    write_csv(rows, os.path.join(BENCH_DIR, 'retro.csv'))
+
+# --- Sondeos compilados (tb_compile.py) ---
+
+def bench_tb_compiled(args, tb):
+    """Sondeo WDL: tablebase original (con y sin caché) vs arrays compilados, y su efecto en el MCTS."""
+    if tb.obj is None:
+        print("Hace falta --syzygy-dir o --retro-dir como tablebase de origen")
+        return
+    sources = {
+        'raw': dict(cache_size=0),
+        'cached': dict(),
+        'compiled': dict(compiled_dir=args.dir),
+    }
+    rng = random.Random(args.seed)
+    rows = []
+    with TBLite(None, compiled_dir=args.dir) as only:
+        tables = only.obj.tables
+        if not tables:
+            print(f"No hay arrays en {args.dir}: python tb_compile.py --out {args.dir} ...")
+            return
+        for sig, (index, wdl, dtz) in tables.items():
+            samples = []
+            while len(samples) < args.samples:
+                board = index.decode(rng.randrange(index.size))
+                if board is not None:
+                    samples.append(board)
+            row = {'signature': sig, 'table_mb': round((wdl.nbytes + dtz.nbytes) / 2 ** 20, 1)}
+            reference = [probe_wdl(b, tb.obj) for b in samples]
+            for label, kwargs in sources.items():
+                with TBLite(tb.path, retro_dir=tb.retro_dir, **kwargs) as src:
+                    t0 = time.perf_counter()
+                    values = [probe_wdl(b, src.obj) for b in samples]
+                    row[f'{label}_us'] = round((time.perf_counter() - t0) / len(samples) * 1e6, 2)
+                row[f'{label}_agree'] = sum(v == r for v, r in zip(values, reference)) / len(samples)
+            rows.append(row)
+
+    print_rows(rows)
+    write_csv(rows, os.path.join(BENCH_DIR, 'tb_compiled_probes.csv'))
+
+    # Búsquedas en finales de <= 4 piezas: los sondeos van en cada ply de los rollouts
+    rows = []
+    for name, meta in selected_positions(args):
+        board = chess.Board(meta['fen'])
+        if chess.popcount(board.occupied) > 4 or board.is_game_over():
+            continue
+        row = {'position': name}
+        for label, kwargs in sources.items():
+            with TBLite(tb.path, retro_dir=tb.retro_dir, **kwargs) as src:
+                _, stats = mcts_search(board, time_limit=None, max_iters=args.iters, seed=args.seed, tb=src)
+                row[f'{label}_it_s'] = stats.get('perf', {}).get('iters_per_sec')
+        rows.append(row)
+        print(f"{name}: " + "  ".join(f"{k}={row[f'{k}_it_s']}" for k in sources))
+
+    print_rows(rows)
+    write_csv(rows, os.path.join(BENCH_DIR, 'tb_compiled_mcts.csv'))
+
+# --- Rollouts con EndgameBoard (fast_endgame.py) ---
+
+FAST_ROLLOUT_POSITIONS = {
+    'KQK': "8/8/8/4k3/8/8/8/KQ6 w - - 0 1",
+    'KRK': "8/8/8/4k3/8/8/8/KR6 w - - 0 1",
+    'KBNK': "8/8/8/4k3/8/8/8/KBN5 w - - 0 1",
+    'KPK': "8/8/8/4k3/8/8/3P4/3K4 w - - 0 1",
+    'KRPvKR': "8/8/3k4/8/3P4/8/r7/3K3R w - - 0 1",
+}
+
+def bench_fast_rollout(args, tb):
+    """Plies de rollout por segundo: chess.Board vs EndgameBoard (y que jueguen las mismas partidas)."""
+    rows = []
+    for name, fen in FAST_ROLLOUT_POSITIONS.items():
+        board = chess.Board(fen)
+        row = {'position': name, 'pieces': chess.popcount(board.occupied)}
+        games = {}
+        for label, fast_pieces in (('chess', 0), ('fast', chess.popcount(board.occupied))):
+            rng = random.Random(args.seed)
+            t0 = time.perf_counter()
+            games[label] = [simulate(board, max_plies=args.max_plies, tb=tb, rng=rng, fast_pieces=fast_pieces)
+                            for _ in range(args.rollouts)]
+            elapsed = time.perf_counter() - t0
+            row[f'{label}_plies_per_s'] = round(sum(info['plies'] for _, info in games[label]) / elapsed, 1)
+        row['speedup'] = round(row['fast_plies_per_s'] / max(row['chess_plies_per_s'], 1e-9), 2)
+        row['same_games'] = all(a[0] == b[0] and a[1]['moves'] == b[1]['moves']
+                                for a, b in zip(games['chess'], games['fast']))
+        rows.append(row)
+        print(f"{name}: {row['chess_plies_per_s']} -> {row['fast_plies_per_s']} plies/s (x{row['speedup']})")
+    print_rows(rows)
+    write_csv(rows, os.path.join(BENCH_DIR, 'fast_rollout.csv'))
+
+# --- Caché de valores por posición ---
+
+def bench_value_cache(args, tb):
+    """MCTS sin y con caché de valores: iteraciones por segundo, plies de rollout, aciertos y jugada elegida."""
+    variants = [('off', SearchConfig())]
+    for size in args.sizes:
+        for min_count in args.min_counts:
+            for symmetric in (False, True):
+                variants.append((f"{size}_n{min_count}{'_sym' if symmetric else ''}",
+                                 SearchConfig(value_cache_size=size, value_cache_min_count=min_count,
+                                              value_cache_symmetric=symmetric)))
+    rows = []
+    for name, meta in selected_positions(args):
+        board = chess.Board(meta['fen'])
+        if board.is_game_over():
+            continue
+        reference = None
+        for label, cfg in variants:
+            move, stats = mcts_search(board, time_limit=None, max_iters=args.iters, seed=args.seed, tb=tb, config=cfg)
+            perf = stats.get('perf', {})
+            cache = stats.get('value_cache', {})
+            reference = reference or move
+            rows.append({'position': name, 'cache': label, 'iters_per_sec': perf.get('iters_per_sec'),
+                         'rollout_plies': perf.get('rollout_plies'), 'hit_rate': cache.get('value_cache_hit_rate'),
+                         'entries': cache.get('value_cache_entries'), 'move': move.uci() if move else None,
+                         'same_move': move == reference})
+        print(f"{name}: " + "  ".join(f"{r['cache']}={r['iters_per_sec']}/{r['hit_rate']}" for r in rows[-len(variants):]))
+    print_rows(rows)
+    write_csv(rows, os.path.join(BENCH_DIR, 'value_cache.csv'))
+
+# --- Rollouts vectorizados (vec_rollout.py) ---
+
+def bench_vec_rollout(args, tb):
+    """Plies de rollout por segundo en finales sin peones: simulate (chess.Board, EndgameBoard) vs
+    carriles NumPy, y su efecto en el MCTS como evaluador por lotes."""
+    from mcts_core import RolloutEvaluator
+    from vec_rollout import VectorRolloutEvaluator, vector_rollouts
+
+    rows = []
+    for name, fen in FAST_ROLLOUT_POSITIONS.items():
+        board = chess.Board(fen)
+        if board.pawns:
+            continue
+        row = {'position': name}
+        for label, fast_pieces in (('chess', 0), ('fast', chess.popcount(board.occupied))):
+            rng = random.Random(args.seed)
+            t0 = time.perf_counter()
+            games = [simulate(board, max_plies=args.max_plies, tb=tb, rng=rng, fast_pieces=fast_pieces)
+                     for _ in range(args.rollouts)]
+            elapsed = time.perf_counter() - t0
+            row[f'{label}_plies_per_s'] = round(sum(info['plies'] for _, info in games) / elapsed, 1)
+            row[f'{label}_mean'] = round(float(np.mean([v for v, _ in games])), 3)
+        for lanes in args.lanes:
+            np_rng = np.random.default_rng(args.seed)
+            plies, values = 0, []
+            t0 = time.perf_counter()
+            for _ in range(max(1, args.rollouts // lanes)):
+                v, stats = vector_rollouts([board] * lanes, board.turn, args.max_plies, np_rng, tb)
+                plies += int(stats['plies'].sum())
+                values.append(v)
+            elapsed = time.perf_counter() - t0
+            row[f'vec{lanes}_plies_per_s'] = round(plies / elapsed, 1)
+            row[f'vec{lanes}_mean'] = round(float(np.concatenate(values).mean()), 3)
+        for label, evaluator, batch_size in (('rollout', RolloutEvaluator(), 1),
+                                             ('vec', VectorRolloutEvaluator(lanes=args.lanes[0]), args.batch_size)):
+            _, stats = mcts_search(board, time_limit=None, max_iters=args.iters, seed=args.seed, tb=tb,
+                                   evaluator=evaluator, batch_size=batch_size)
+            row[f'mcts_{label}_it_s'] = stats.get('perf', {}).get('iters_per_sec')
+        row['mcts_vec_rollouts_s'] = round((row['mcts_vec_it_s'] or 0) * args.lanes[0], 1)   # lanes rollouts por hoja
+        rows.append(row)
+        print(f"{name}: {row['chess_plies_per_s']} / {row['fast_plies_per_s']} -> "
+              + "  ".join(f"{n}={row[f'vec{n}_plies_per_s']}" for n in args.lanes) + " plies/s")
+    print_rows(rows)
+    write_csv(rows, os.path.join(BENCH_DIR, 'vec_rollout.csv'))
+
+# --- CLI ---
+
+def add_budget_args(p, budgets=(25, 50, 100, 200, 400)):
+    p.add_argument('--budgets', type=int, nargs='+', default=list(budgets))
+    p.add_argument('--ref-iters', type=int, default=800, help='Iteraciones de la búsqueda de referencia (sin Syzygy)')
+    p.add_argument('--positions', nargs='*', default=None, help='Subconjunto de posiciones (por nombre)')
+    p.add_argument('--seed', type=int, default=42)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del MCTS")
+    parser.add_argument('--syzygy-dir', type=str, default=None)
+    parser.add_argument('--retro-dir', type=str, default=None, help='Tablas propias de retro.py si no hay Syzygy')
+    parser.add_argument('--compiled-dir', type=str, default=None, help='Arrays de tb_compile.py (se consultan primero)')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('value-model', help='Modelo lineal vs rollouts pesados')
+    p.add_argument('--model', type=str, default='modelos/value_linear.npz')
+    p.add_argument('--rollouts', type=int, default=20, help='Rollouts por posición')
+    p.add_argument('--repeats', type=int, default=200, help='Evaluaciones lineales por posición (para medir tiempo)')
+    p.set_defaults(func=bench_value_model)
+
+    p = sub.add_parser('see', help='SEE en bitboards vs is_piece_hanging')
+    p.add_argument('--repeats', type=int, default=200, help='Repeticiones por posición (para medir tiempo)')
+    p.set_defaults(func=bench_see)
+
+    p = sub.add_parser('symmetry', help='Aciertos de caché con claves canónicas por simetría')
+    p.add_argument('--rollouts', type=int, default=50, help='Rollouts por posición')
+    p.add_argument('--iters', type=int, default=300, help='Iteraciones MCTS para la caché de Syzygy real')
+    p.add_argument('--seed', type=int, default=42)
+    p.set_defaults(func=bench_symmetry)
+
+    p = sub.add_parser('eval', help='evaluate_endgame_position vs evaluate_endgame_batch')
+    p.add_argument('--rollouts', type=int, default=20, help='Rollouts por posición (tableros a evaluar)')
+    p.add_argument('--repeats', type=int, default=5)
+    p.add_argument('--seed', type=int, default=42)
+    p.set_defaults(func=bench_eval)
+
+    p = sub.add_parser('rave', help='Iteraciones hasta asentar la jugada correcta, con y sin RAVE')
+    add_budget_args(p)
+    p.add_argument('--rave-k', type=float, default=300.0)
+    p.set_defaults(func=bench_rave)
+
+    p = sub.add_parser('selection', help='UCT vs UCB1-Tuned a presupuestos fijos de iteraciones')
+    add_budget_args(p)
+    p.set_defaults(func=bench_selection)
+
+    p = sub.add_parser('root-policy', help='UCT vs sequential halving en la raíz a presupuestos pequeños')
+    add_budget_args(p, budgets=(16, 32, 64, 128))
+    p.add_argument('--candidates', type=int, default=16, help='Jugadas candidatas iniciales (sh_candidates)')
+    p.set_defaults(func=bench_root_policy)
+
+    p = sub.add_parser('widening', help='UCT vs progressive widening en posiciones de mucha ramificación')
+    add_budget_args(p)
+    p.add_argument('--pw-k', type=float, default=2.0)
+    p.add_argument('--pw-alpha', type=float, default=0.5)
+    p.add_argument('--min-branching', type=int, default=20,
+                   help='Sin --positions: posiciones con al menos estas jugadas legales')
+    p.set_defaults(func=bench_widening)
+
+    p = sub.add_parser('implicit-minimax', help='UCT vs implicit minimax en finales de mop-up')
+    add_budget_args(p)
+    p.add_argument('--im-alpha', type=float, default=0.4)
+    p.set_defaults(func=bench_implicit_minimax)
+
+    p = sub.add_parser('leaf-eval', help='Rollouts vs alfa-beta en las hojas (partidas contra el oponente simple)')
+    p.add_argument('--ab-depths', type=int, nargs='+', default=[2, 3])
+    p.add_argument('--time', type=float, default=0.5, help='Segundos por jugada')
+    p.add_argument('--games', type=int, default=2, help='Partidas por posición y variante')
+    p.add_argument('--max-moves', type=int, default=10)
+    p.add_argument('--positions', nargs='*', default=None, help='Subconjunto de posiciones (por defecto, las de mate esperado)')
+    p.add_argument('--seed', type=int, default=42)
+    p.set_defaults(func=bench_leaf_eval)
+
+    p = sub.add_parser('pns', help='Proof-number search vs MCTS en posiciones de mate forzado')
+    p.add_argument('--mate-in', type=int, default=5, help='Horizonte del PNS (jugadas)')
+    p.add_argument('--nodes', type=int, default=100_000, help='Presupuesto de nodos del PNS')
+    p.add_argument('--mcts-time', type=float, default=1.0)
+    p.add_argument('--positions', nargs='*', default=None, help='Subconjunto de posiciones (por nombre)')
+    p.add_argument('--seed', type=int, default=42)
+    p.set_defaults(func=bench_pns)
+
+    p = sub.add_parser('retro', help='Tablas de finales propias (retro.py): resultados, sondeo y contraste con PNS')
+    p.add_argument('--dir', type=str, default=os.path.join('datos', 'retro'))
+    p.add_argument('--samples', type=int, default=2000, help='Posiciones aleatorias por tabla')
+    p.add_argument('--mate-in', type=int, default=3, help='Horizonte del PNS para contrastar mates cortos')
+    p.add_argument('--pns-checks', type=int, default=50, help='Mates cortos a contrastar por tabla')
+    p.add_argument('--seed', type=int, default=42)
+    p.set_defaults(func=bench_retro)
+
+    p = sub.add_parser('tb-compiled', help='Sondeos de la tablebase original vs arrays compilados (tb_compile.py)')
+    p.add_argument('--dir', type=str, default=os.path.join('datos', 'tb_compiled'))
+    p.add_argument('--samples', type=int, default=5000, help='Posiciones aleatorias por firma')
+    p.add_argument('--iters', type=int, default=300, help='Iteraciones MCTS por posición de <= 4 piezas')
+    p.add_argument('--positions', nargs='*', default=None, help='Subconjunto de posiciones (por nombre)')
+    p.add_argument('--seed', type=int, default=42)
+    p.set_defaults(func=bench_tb_compiled)
+
+    p = sub.add_parser('fast-rollout', help='Plies de rollout por segundo: chess.Board vs EndgameBoard')
+    p.add_argument('--rollouts', type=int, default=200, help='Rollouts por posición')
+    p.add_argument('--max-plies', type=int, default=30)
+    p.add_argument('--seed', type=int, default=42)
+    p.set_defaults(func=bench_fast_rollout)
+
+    p = sub.add_parser('value-cache', help='MCTS sin y con caché de valores por posición')
+    p.add_argument('--iters', type=int, default=400, help='Iteraciones MCTS por posición y variante')
+    p.add_argument('--sizes', type=int, nargs='+', default=[50_000], help='Entradas máximas de la caché')
+    p.add_argument('--min-counts', type=int, nargs='+', default=[1, 4], help='Evaluaciones antes de usar la media')
+    p.add_argument('--positions', nargs='*', default=None, help='Subconjunto de posiciones (por nombre)')
+    p.add_argument('--seed', type=int, default=42)
+    p.set_defaults(func=bench_value_cache)
+
+    p = sub.add_parser('vec-rollout', help='Plies de rollout por segundo: simulate vs carriles NumPy (sin peones)')
+    p.add_argument('--rollouts', type=int, default=200, help='Rollouts por posición y variante')
+    p.add_argument('--lanes', type=int, nargs='+', default=[64, 256], help='Carriles por paso vectorizado')
+    p.add_argument('--max-plies', type=int, default=30)
+    p.add_argument('--batch-size', type=int, default=8, help='Hojas por lote del MCTS con el evaluador vectorizado')
+    p.add_argument('--iters', type=int, default=200, help='Iteraciones MCTS por posición')
+    p.add_argument('--seed', type=int, default=42)
+    p.set_defaults(func=bench_vec_rollout)
+
+    args = parser.parse_args()
+    with TBLite(args.syzygy_dir, retro_dir=args.retro_dir, compiled_dir=args.compiled_dir) as tb:
+        args.func(args, tb)
+
+if __name__ == '__main__':
+    main()
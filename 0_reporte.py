@@ -16,6 +16,7 @@ import os
 import time
 import json
 import random
+import argparse
 from datetime import datetime
 from collections import defaultdict
 
@@ -28,7 +29,8 @@ import numpy as np
 # Importar funciones MCTS desde tu módulo
 # mcts_search debe aceptar (board, time_limit=..., seed=None, debug_callback=None)
 # y devolver (best_move, stats)
-from mcts_core import mcts_search, C_PUCT, ROLLOUT_MAX_PLIES, PRIOR_N, PRIOR_W_MATE, PRIOR_W_CHECK
+from mcts_core import mcts_search, SearchConfig
+from profiling import SamplingProfiler, save_top_functions, slugify
 
 # --- Configuraciones generales ---
 BASE_OUTPUT = "mcts_report_output"
@@ -78,7 +80,7 @@ def save_figure(fig, path):
 
 # --- SIMULACIÓN DE PARTIDA COMPLETA ---
 
-def run_game_simulation(fen, time_limit_per_move=1.5, max_moves=10):
+def run_game_simulation(fen, time_limit_per_move=1.5, max_moves=10, config=None, evaluator=None):
     """Juega una partida simulada con MCTS (jugador) y un oponente simple hasta mate o límite."""
     board = chess.Board(fen)
     moves_history = []
@@ -89,7 +91,7 @@ def run_game_simulation(fen, time_limit_per_move=1.5, max_moves=10):
         start_time = time.time()
         
         # MCTS siempre juega con su color actual (player_turn)
-        best_move, stats = mcts_search(board, time_limit=time_limit_per_move)
+        best_move, stats = mcts_search(board, time_limit=time_limit_per_move, config=config, evaluator=evaluator)
         
         if best_move is None:
             # No hay jugadas legales o MCTS falló
@@ -254,23 +256,12 @@ def plot_moves_to_win_distribution(all_results, out_path):
     df.to_csv(out_path.replace('.png', '.csv'), index=False)
 
 
-def save_mcts_characteristics(out_path):
-    # Asegúrate de que las constantes se importen correctamente desde mcts_core
+def save_mcts_characteristics(out_path, config=None):
+    # Parámetros exactos de la búsqueda (SearchConfig), no las constantes del módulo
+    config = config or SearchConfig()
     data = {
-        'Característica': [
-            'Constante UCT (C_PUCT)', 
-            'Plies Max. en Rollout', 
-            'Nodos de Prioridad (N)', 
-            'Peso Prioridad Mate (Q)', 
-            'Peso Prioridad Jaque (Q)'
-        ],
-        'Valor': [
-            C_PUCT, 
-            ROLLOUT_MAX_PLIES, 
-            PRIOR_N, 
-            PRIOR_W_MATE, 
-            PRIOR_W_CHECK
-        ]
+        'Característica': list(config.as_dict().keys()),
+        'Valor': list(config.as_dict().values())
     }
     df = pd.DataFrame(data)
 
@@ -289,9 +280,14 @@ def save_mcts_characteristics(out_path):
 
 # --- Función central que corre todo ---
 
-def run_full_experiment(time_limit=1.5, num_runs=6, seeds=None):
+def run_full_experiment(time_limit=1.5, num_runs=6, seeds=None, config=None, profile=False, evaluator=None):
     all_results = {}
-    raw_export = {'timestamp': datetime.now().isoformat(), 'positions': {}}
+    config = config or SearchConfig()
+    run_ts = int(time.time())
+    raw_export = {'timestamp': datetime.now().isoformat(), 'config': config.as_dict(),
+                  'leaf_eval': type(evaluator).__name__ if evaluator else 'RolloutEvaluator', 'positions': {}}
+    # Profiling opcional: un perfil por posición junto a raw_results_*.json y una tabla agregada
+    all_profiles = SamplingProfiler() if profile else None
     random.seed(seeds[0] if seeds else 42) # Semilla para la simulación
     
     for name, meta in TEST_POSITIONS.items():
@@ -299,9 +295,10 @@ def run_full_experiment(time_limit=1.5, num_runs=6, seeds=None):
         print(f"Simulando partida ({num_runs} veces): {name}")
         
         runs = []
+        profiler = SamplingProfiler().start() if profile else None
         for i in range(num_runs):
             # Ejecutamos la simulación de juego completo
-            game_result = run_game_simulation(fen, time_limit_per_move=time_limit, max_moves=10)
+            game_result = run_game_simulation(fen, time_limit_per_move=time_limit, max_moves=10, config=config, evaluator=evaluator)
             
             # Recopilar métricas clave del primer movimiento y del resultado final
             first_move_stats = game_result['history'][0]['stats'] if game_result['history'] else {}
@@ -320,17 +317,27 @@ def run_full_experiment(time_limit=1.5, num_runs=6, seeds=None):
                 'best_Q_first_move': first_move_stats.get('best_Q', 0),
                 # Stats del movimiento que dio mate
                 'time_winning_move': winning_move['time'] if winning_move else np.nan,
-                'iterations_winning_move': winning_move['stats'].get('iters', 0) if winning_move else 0
+                'iterations_winning_move': winning_move['stats'].get('iters', 0) if winning_move else 0,
+                'iters_per_sec_first_move': first_move_stats.get('perf', {}).get('iters_per_sec', 0)
             })
         
+        if profiler:
+            profiler.stop()
+            paths = profiler.save(os.path.join(METRICS_DIR, f"profile_{run_ts}_{slugify(name)}"), name)
+            all_profiles.merge(profiler)
+            raw_export.setdefault('profiles', {})[name] = paths
+
         all_results[name] = runs
         raw_export['positions'][name] = runs
 
     # Guardar raw JSON
-    raw_path = os.path.join(METRICS_DIR, f"raw_results_{int(time.time())}.json")
+    raw_path = os.path.join(METRICS_DIR, f"raw_results_{run_ts}.json")
     with open(raw_path, 'w', encoding='utf-8') as f:
         json.dump(raw_export, f, ensure_ascii=False, indent=2)
     print(f"Export raw: {raw_path}")
+    if all_profiles:
+        save_top_functions(all_profiles, os.path.join(METRICS_DIR, 'profile_top_functions.csv'))
+        print(f"Perfiles: {METRICS_DIR}/profile_{run_ts}_*.speedscope.json")
 
     # Generar visualizaciones y tablas (basadas en la simulación/primer movimiento)
     plot_mate_detection_rate(all_results, os.path.join(METRICS_DIR, 'mate_detection_rate.png'))
@@ -343,7 +350,7 @@ def run_full_experiment(time_limit=1.5, num_runs=6, seeds=None):
     plot_moves_to_win_distribution(all_results, os.path.join(METRICS_DIR, 'moves_to_win_distribution.png'))
 
     # Tabla de características
-    save_mcts_characteristics(os.path.join(METRICS_DIR, 'mcts_characteristics_table.png'))
+    save_mcts_characteristics(os.path.join(METRICS_DIR, 'mcts_characteristics_table.png'), config)
 
     # Comparativa en heatmap
     rows = []
@@ -365,9 +372,20 @@ def run_full_experiment(time_limit=1.5, num_runs=6, seeds=None):
 # --- CLI mínima ---
 
 def main():
+    parser = argparse.ArgumentParser(description='Reporte completo del MCTS')
+    parser.add_argument('--profile', action='store_true', help='Perfil de muestreo por posición (speedscope/flamegraph)')
+    parser.add_argument('--leaf', choices=['rollout', 'alphabeta'], default='rollout',
+                        help='Evaluación de hojas: rollouts de simulate o alfa-beta poco profundo (alphabeta.py)')
+    parser.add_argument('--ab-depth', type=int, default=2, help='Profundidad del alfa-beta con --leaf alphabeta')
+    args = parser.parse_args()
+    evaluator = None
+    if args.leaf == 'alphabeta':
+        from alphabeta import AlphaBetaEvaluator
+        evaluator = AlphaBetaEvaluator(depth=args.ab_depth)
+
     print('\n=== MCTS FULL REPORT RUN ===\n')
     # Ajusta el tiempo y las corridas si es necesario.
-    all_results = run_full_experiment(time_limit=1.5, num_runs=10) # Aumentamos corridas a 10 para mejor estadística
+    all_results = run_full_experiment(time_limit=1.5, num_runs=10, profile=args.profile, evaluator=evaluator) # Aumentamos corridas a 10 para mejor estadística
 
     print('\nArchivos generados en:', BASE_OUTPUT)
     print('Directorio métricas:', METRICS_DIR)
@@ -16,6 +16,7 @@ import os
 import time
 import json
 import random
+import argparse
 from datetime import datetime
 from collections import defaultdict
 
@@ -28,7 +29,8 @@ import numpy as np
 # Importar funciones MCTS desde tu módulo
 # mcts_search debe aceptar (board, time_limit=..., seed=None, debug_callback=None)
 # y devolver (best_move, stats)
-from mcts_core import mcts_search, C_PUCT, ROLLOUT_MAX_PLIES, PRIOR_N, PRIOR_W_MATE, PRIOR_W_CHECK
+from mcts_core import mcts_search, SearchConfig
+from profiling import SamplingProfiler, save_top_functions, slugify
 
 # --- Configuraciones generales ---
 BASE_OUTPUT = "mcts_report_output"
@@ -40,48 +42,8 @@ sns.set_theme(style="whitegrid")
 plt.rcParams['figure.dpi'] = 150
 plt.rcParams['figure.figsize'] = (11, 7)
 
-# --- Bancos de posiciones extendido ---
-# Incluye mates en 1, mates en 2, mates en 3 y posiciones con tablebase relevantes.
-TEST_POSITIONS = {
-    "Mate en 1 - Dama esquina": {"fen": "7k/6Q1/6K1/8/8/8/8/8 w - - 0 1", "expected_mate_in": 1},
-    "Mate en 1 - Torre séptima": {"fen": "6k1/5R2/6K1/8/8/8/8/8 w - - 0 1", "expected_mate_in": 1},
-    "Mate en 1 - Dama lateral": {"fen": "7k/8/6KQ/8/8/8/8/8 w - - 0 1", "expected_mate_in": 1},
-    "Mate en 1 - Torre banda": {"fen": "k7/8/1K6/8/8/8/8/R7 w - - 0 1", "expected_mate_in": 1},
-    "Mate en 1 - Dos torres": {"fen": "k7/8/1K6/8/8/8/R7/R7 w - - 0 1", "expected_mate_in": 1},
-
-    # Mate en 2 (ejemplos simples)
-    "Mate en 2 - Basic 1": {"fen": "8/8/8/8/8/4K3/5Q2/6k1 w - - 0 1", "expected_mate_in": 2},
-    "Mate en 2 - R vs K": {"fen": "8/8/8/8/8/4K3/5R2/6k1 w - - 0 1", "expected_mate_in": 2},
-
-    # Mate en 3 (un par de casos)
-    "Mate en 3 - ejemplo": {"fen": "8/8/8/8/8/3K4/2Q5/6k1 w - - 0 1", "expected_mate_in": 3},
-
-    # Posiciones con oportunidad de promoción
-    "Promotion tactic": {"fen": "8/P7/8/8/8/6K1/6P1/6k1 w - - 0 1", "expected_mate_in": None},
-
-    # Posición compleja (más piezas)
-    "Complex mid-endgame": {"fen": "r4rk1/1pp1qppp/p1np1n2/4p3/2P1P3/1PN2N2/PB1Q1PPP/R3R1K1 w - - 0 1", "expected_mate_in": None},
-    
-    # Endgames famosos y factibles (10 nuevos)
-    "King and Queen vs King (WTM)": {"fen": "k7/8/K7/Q7/8/8/8/8 w - - 0 1", "expected_mate_in": 10}, # DTM (Depth To Mate) es más largo, pero el MCTS debería ganar.
-    "King and Rook vs King (WTM)": {"fen": "k7/8/K7/R7/8/8/8/8 w - - 0 1", "expected_mate_in": 16}, # DTM, el MCTS debería progresar
-    "Two Rooks vs King": {"fen": "k7/8/K7/R7/8/8/8/R7 w - - 0 1", "expected_mate_in": 3},
-    "King and Pawn endgame 1": {"fen": "8/8/5P2/4K3/8/8/8/k7 w - - 0 1", "expected_mate_in": None}, # Simple promotion
-    "King and Pawn endgame 2 (Opposition)": {"fen": "8/8/8/4k3/4K3/8/6P1/8 w - - 0 1", "expected_mate_in": None}, # White wins by pushing pawn
-    "Lucena Position": {"fen": "1K6/8/8/R7/8/8/7k/5Q2 w - - 0 1", "expected_mate_in": None}, # Lucena is R vs P
-    "Philidor Position (Rook)": {"fen": "8/8/8/8/3R4/8/3P4/k3K3 w - - 0 1", "expected_mate_in": None}, # R vs P, simple win
-    "Bishop and Knight vs King (starting)": {"fen": "8/8/8/8/8/5B2/3N4/k3K3 w - - 0 1", "expected_mate_in": 33}, # DTM, but for MCTS it's complex, aiming for progression.
-    "Rook vs Pawn on 7th (Rook behind)": {"fen": "8/P7/8/8/8/3R4/8/1k6 w - - 0 1", "expected_mate_in": None}, # White must win
-    "Simple Passed Pawn": {"fen": "8/8/8/8/4k3/6K1/8/8 b - - 0 1", "expected_mate_in": None}, # King and Pawn vs King (Black to play, White wins if G2, so change to e4/g3)
-    "Simple Passed Pawn 2": {"fen": "8/8/8/8/3K4/6P1/8/5k2 w - - 0 1", "expected_mate_in": None}, # White wins
-}
-
-# Más posiciones para diversify pruebas (stalemates y checks)
-EXTRA_POSITIONS = {
-    "Stalemate trap": {"fen": "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", "expected_mate_in": None},
-}
-
-TEST_POSITIONS.update(EXTRA_POSITIONS)
+# --- Bancos de posiciones extendido (ver posiciones.py) ---
+from posiciones import TEST_POSITIONS
 
 # --- Helpers ---
 
@@ -91,7 +53,7 @@ def save_figure(fig, path):
 
 # --- SIMULACIÓN DE PARTIDA COMPLETA ---
 
-def run_game_simulation(fen, time_limit_per_move=1.5, max_moves=10):
+def run_game_simulation(fen, time_limit_per_move=1.5, max_moves=10, config=None, evaluator=None):
     """Juega una partida simulada con MCTS (jugador) y un oponente simple hasta mate o límite."""
     board = chess.Board(fen)
     moves_history = []
@@ -102,7 +64,7 @@ def run_game_simulation(fen, time_limit_per_move=1.5, max_moves=10):
         start_time = time.time()
         
         # MCTS siempre juega con su color actual (player_turn)
-        best_move, stats = mcts_search(board, time_limit=time_limit_per_move)
+        best_move, stats = mcts_search(board, time_limit=time_limit_per_move, config=config, evaluator=evaluator)
         
         if best_move is None:
             # No hay jugadas legales o MCTS falló
@@ -267,23 +229,12 @@ def plot_moves_to_win_distribution(all_results, out_path):
     df.to_csv(out_path.replace('.png', '.csv'), index=False)
 
 
-def save_mcts_characteristics(out_path):
-    # Asegúrate de que las constantes se importen correctamente desde mcts_core
+def save_mcts_characteristics(out_path, config=None):
+    # Parámetros exactos de la búsqueda (SearchConfig), no las constantes del módulo
+    config = config or SearchConfig()
     data = {
-        'Característica': [
-            'Constante UCT (C_PUCT)', 
-            'Plies Max. en Rollout', 
-            'Nodos de Prioridad (N)', 
-            'Peso Prioridad Mate (Q)', 
-            'Peso Prioridad Jaque (Q)'
-        ],
-        'Valor': [
-            C_PUCT, 
-            ROLLOUT_MAX_PLIES, 
-            PRIOR_N, 
-            PRIOR_W_MATE, 
-            PRIOR_W_CHECK
-        ]
+        'Característica': list(config.as_dict().keys()),
+        'Valor': list(config.as_dict().values())
     }
     df = pd.DataFrame(data)
 
@@ -300,12 +251,33 @@ def save_mcts_characteristics(out_path):
     save_figure(fig, out_path)
 
 
+def save_search_perf(all_results, out_path):
+    """Promedio por posición de los contadores de rendimiento (stats['perf']) del primer movimiento."""
+    rows = []
+    for name, runs in all_results.items():
+        for r in runs:
+            perf = r.get('perf_first_move') or {}
+            if perf:
+                rows.append({'Posición': name, 'tree_nodes': r.get('tree_nodes_first_move', 0), **perf})
+    if not rows:
+        print('No hay contadores de rendimiento para save_search_perf')
+        return
+    df = pd.DataFrame(rows).groupby('Posición').mean(numeric_only=True)
+    df.to_csv(out_path)
+    print(f"Export perf: {out_path}")
+
+
 # --- Función central que corre todo ---
 
 # *** CAMBIO: num_runs se establece a 25 por defecto ***
-def run_full_experiment(time_limit=1.5, num_runs=25, seeds=None):
+def run_full_experiment(time_limit=1.5, num_runs=25, seeds=None, config=None, profile=False, evaluator=None):
     all_results = {}
-    raw_export = {'timestamp': datetime.now().isoformat(), 'positions': {}}
+    config = config or SearchConfig()
+    run_ts = int(time.time())
+    raw_export = {'timestamp': datetime.now().isoformat(), 'config': config.as_dict(),
+                  'leaf_eval': type(evaluator).__name__ if evaluator else 'RolloutEvaluator', 'positions': {}}
+    # Profiling opcional: un perfil por posición junto a raw_results_*.json y una tabla agregada
+    all_profiles = SamplingProfiler() if profile else None
     random.seed(seeds[0] if seeds else 42) # Semilla para la simulación
     
     for name, meta in TEST_POSITIONS.items():
@@ -313,9 +285,10 @@ def run_full_experiment(time_limit=1.5, num_runs=25, seeds=None):
         print(f"Simulando partida ({num_runs} veces): {name}")
         
         runs = []
+        profiler = SamplingProfiler().start() if profile else None
         for i in range(num_runs):
             # Ejecutamos la simulación de juego completo
-            game_result = run_game_simulation(fen, time_limit_per_move=time_limit, max_moves=10)
+            game_result = run_game_simulation(fen, time_limit_per_move=time_limit, max_moves=10, config=config, evaluator=evaluator)
             
             # Recopilar métricas clave del primer movimiento y del resultado final
             first_move_stats = game_result['history'][0]['stats'] if game_result['history'] else {}
@@ -334,17 +307,29 @@ def run_full_experiment(time_limit=1.5, num_runs=25, seeds=None):
                 'best_Q_first_move': first_move_stats.get('best_Q', 0),
                 # Stats del movimiento que dio mate
                 'time_winning_move': winning_move['time'] if winning_move else np.nan,
-                'iterations_winning_move': winning_move['stats'].get('iters', 0) if winning_move else 0
+                'iterations_winning_move': winning_move['stats'].get('iters', 0) if winning_move else 0,
+                # Contadores de rendimiento de la búsqueda (stats['perf']) del primer movimiento
+                'perf_first_move': first_move_stats.get('perf', {}),
+                'tree_nodes_first_move': first_move_stats.get('tree_nodes', 0)
             })
         
+        if profiler:
+            profiler.stop()
+            paths = profiler.save(os.path.join(METRICS_DIR, f"profile_{run_ts}_{slugify(name)}"), name)
+            all_profiles.merge(profiler)
+            raw_export.setdefault('profiles', {})[name] = paths
+
         all_results[name] = runs
         raw_export['positions'][name] = runs
 
     # Guardar raw JSON
-    raw_path = os.path.join(METRICS_DIR, f"raw_results_{int(time.time())}.json")
+    raw_path = os.path.join(METRICS_DIR, f"raw_results_{run_ts}.json")
     with open(raw_path, 'w', encoding='utf-8') as f:
         json.dump(raw_export, f, ensure_ascii=False, indent=2)
     print(f"Export raw: {raw_path}")
+    if all_profiles:
+        save_top_functions(all_profiles, os.path.join(METRICS_DIR, 'profile_top_functions.csv'))
+        print(f"Perfiles: {METRICS_DIR}/profile_{run_ts}_*.speedscope.json")
 
     # Generar visualizaciones y tablas (basadas en la simulación/primer movimiento)
     plot_mate_detection_rate(all_results, os.path.join(METRICS_DIR, 'mate_detection_rate.png'))
@@ -356,8 +341,11 @@ def run_full_experiment(time_limit=1.5, num_runs=25, seeds=None):
     plot_success_vs_difficulty(all_results, os.path.join(METRICS_DIR, 'success_vs_difficulty.png'))
     plot_moves_to_win_distribution(all_results, os.path.join(METRICS_DIR, 'moves_to_win_distribution.png'))
 
+    # Dónde se va el tiempo de la búsqueda
+    save_search_perf(all_results, os.path.join(METRICS_DIR, 'search_perf.csv'))
+
     # Tabla de características
-    save_mcts_characteristics(os.path.join(METRICS_DIR, 'mcts_characteristics_table.png'))
+    save_mcts_characteristics(os.path.join(METRICS_DIR, 'mcts_characteristics_table.png'), config)
 
     # Comparativa en heatmap
     rows = []
@@ -379,9 +367,20 @@ def run_full_experiment(time_limit=1.5, num_runs=25, seeds=None):
 # --- CLI mínima ---
 
 def main():
+    parser = argparse.ArgumentParser(description='Reporte completo del MCTS')
+    parser.add_argument('--profile', action='store_true', help='Perfil de muestreo por posición (speedscope/flamegraph)')
+    parser.add_argument('--leaf', choices=['rollout', 'alphabeta'], default='rollout',
+                        help='Evaluación de hojas: rollouts de simulate o alfa-beta poco profundo (alphabeta.py)')
+    parser.add_argument('--ab-depth', type=int, default=2, help='Profundidad del alfa-beta con --leaf alphabeta')
+    args = parser.parse_args()
+    evaluator = None
+    if args.leaf == 'alphabeta':
+        from alphabeta import AlphaBetaEvaluator
+        evaluator = AlphaBetaEvaluator(depth=args.ab_depth)
+
     print('\n=== MCTS FULL REPORT RUN ===\n')
     # *** CAMBIO: Se llama con num_runs=25 (aunque ya es el default en run_full_experiment) ***
-    all_results = run_full_experiment(time_limit=1.5, num_runs=25) 
+    all_results = run_full_experiment(time_limit=1.5, num_runs=25, profile=args.profile, evaluator=evaluator) 
 
     print('\nArchivos generados en:', BASE_OUTPUT)
     print('Directorio métricas:', METRICS_DIR)
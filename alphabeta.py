@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Evaluación de hojas por alfa-beta poco profundo (MCTS-αβ).
+
+En lugar del rollout aleatorio de `simulate`, cada hoja se evalúa con un
+negamax alfa-beta de profundidad fija (2-4) sobre `evaluate_endgame_position`:
+- en el horizonte, quiescencia con jaques, capturas y promociones (y todas
+  las respuestas si el bando al mover está en jaque), hasta `qdepth` plies;
+- sondeo WDL de Syzygy en las hojas si hay tablebase;
+- tabla de transposición propia y acotada (FIFO), que se conserva entre las
+  hojas y las búsquedas del mismo evaluador.
+
+Uso:
+    from alphabeta import AlphaBetaEvaluator
+    mcts_search(board, time_limit=1.0, evaluator=AlphaBetaEvaluator(depth=3))
+"""
+
+from __future__ import annotations
+
+import chess
+
+from mcts_core import evaluate_endgame_position, move_priority, SearchConfig, DEFAULT_CONFIG
+from symmetry import position_key
+from tb_utils import probe_wdl, wdl_to_score
+
+MATE_SCORE = 1.0
+EXACT, LOWER, UPPER = 0, 1, 2   # tipo de cota de una entrada de la TT
+
+def terminal_value(board: chess.Board) -> float | None:
+    """Valor para el bando al mover si la partida terminó (mate o tablas por regla), si no None."""
+    if board.is_checkmate():
+        return -MATE_SCORE
+    if board.is_stalemate() or board.is_insufficient_material() or board.halfmove_clock >= 100:
+        return 0.0
+    return None
+
+class AlphaBetaEvaluator:
+    """Evaluador para `mcts_search`: alfa-beta de profundidad `depth` + quiescencia por hoja."""
+    def __init__(self, depth: int = 2, qdepth: int = 4, tt_size: int = 100_000):
+        self.depth = depth
+        self.qdepth = qdepth
+        self.tt_size = tt_size
+        self.tt: dict = {}   # position_key -> (profundidad, valor, cota, mejor jugada)
+        self.nodes = 0
+        self.tt_hits = 0
+
+    def evaluate(self, boards, root_turn, tb=None, cfg: SearchConfig = DEFAULT_CONFIG, rng=None):
+        results = []
+        for b in boards:
+            info = {'phase': 'simulate', 'plies': 0, 'moves': [], 'tb_hit': False, 'outcome': None,
+                    'board_copies': 1, 'tb_probes': 0}
+            nodes = self.nodes
+            v = self.search(b.copy(stack=False), self.depth, -MATE_SCORE, MATE_SCORE, tb, info)
+            v = v if b.turn == root_turn else -v
+            info['nodes'] = self.nodes - nodes
+            info['outcome'] = f'alphabeta_{v:.2f}'
+            results.append((v, info))
+        return results
+
+    def search(self, board: chess.Board, depth: int, alpha: float, beta: float, tb=None,
+               info: dict | None = None) -> float:
+        """Negamax alfa-beta: valor de `board` para el bando al mover."""
+        if depth <= 0:
+            return self.quiesce(board, self.qdepth, alpha, beta, tb, info)
+        self.nodes += 1
+        term = terminal_value(board)
+        if term is not None:
+            return term
+
+        key = position_key(board)
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            e_depth, e_value, e_flag, tt_move = entry
+            if e_depth >= depth:
+                self.tt_hits += 1
+                if e_flag == EXACT:
+                    return e_value
+                if e_flag == LOWER:
+                    alpha = max(alpha, e_value)
+                else:
+                    beta = min(beta, e_value)
+                if alpha >= beta:
+                    return e_value
+
+        alpha0 = alpha
+        best, best_move = -MATE_SCORE, None
+        for mv in self.ordered(board, board.legal_moves, tt_move):
+            board.push(mv)
+            v = -self.search(board, depth - 1, -beta, -alpha, tb, info)
+            board.pop()
+            if best_move is None or v > best:
+                best, best_move = v, mv
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+
+        flag = UPPER if best <= alpha0 else LOWER if best >= beta else EXACT
+        if len(self.tt) >= self.tt_size and key not in self.tt:
+            del self.tt[next(iter(self.tt))]   # FIFO: la entrada más antigua
+        self.tt[key] = (depth, best, flag, best_move)
+        return best
+
+    def quiesce(self, board: chess.Board, qdepth: int, alpha: float, beta: float, tb=None,
+                info: dict | None = None) -> float:
+        """Extensión en el horizonte: solo jaques, capturas y promociones (todo si hay jaque)."""
+        self.nodes += 1
+        term = terminal_value(board)
+        if term is not None:
+            return term
+        if tb is not None and tb.obj is not None:
+            wdl = probe_wdl(board, tb.obj)
+            if info is not None:
+                info['tb_probes'] += 1
+            if wdl is not None:
+                if info is not None:
+                    info['tb_hit'] = True
+                return wdl_to_score(wdl)
+
+        stand = evaluate_endgame_position(board, board.turn)
+        if qdepth <= 0:
+            return stand
+        if board.is_check():
+            best = -MATE_SCORE
+            moves = list(board.legal_moves)
+        else:
+            if stand >= beta:
+                return stand
+            best = stand
+            alpha = max(alpha, stand)
+            moves = [mv for mv in board.legal_moves
+                     if mv.promotion or board.is_capture(mv) or board.gives_check(mv)]
+
+        for mv in self.ordered(board, moves):
+            board.push(mv)
+            v = -self.quiesce(board, qdepth - 1, -beta, -alpha, tb, info)
+            board.pop()
+            best = max(best, v)
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+        return best
+
+    @staticmethod
+    def ordered(board: chess.Board, moves, first: chess.Move | None = None) -> list[chess.Move]:
+        """Jugada de la TT primero, el resto por `move_priority` (como la expansión del MCTS)."""
+        moves = sorted(moves, key=lambda mv: move_priority(board, mv), reverse=True)
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def stats(self) -> dict:
+        return {'ab_nodes': self.nodes, 'ab_tt_hits': self.tt_hits, 'ab_tt_size': len(self.tt)}
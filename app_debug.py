@@ -3,106 +3,14 @@ import chess
 import chess.svg
 import base64
 import json
-from mcts_core import mcts_search
+from mcts_core import mcts_search, SearchConfig
 from tb_utils import TBLite
 import plotly.graph_objects as go
 import plotly.express as px
+from posiciones import FAMOUS_ENDGAMES  # Endgames famosos con soluciones teóricas
 
-# Endgames famosos con soluciones teóricas
-FAMOUS_ENDGAMES = {
-    "Mate de pasillo (negras ganan)": {
-        "fen": "1Q6/p1p2rk1/5q2/2pp2pp/6b1/1PPBR3/P4PPP/RN5K b - - 0 1",
-        "theoretical_moves": ["f6f1", "h1g2", "f1f2"],  # Ejemplo simplificado
-        "description": "Las negras tienen ventaja material decisiva",
-        "difficulty": "Fácil",
-        "expected_moves": 3
-    },
-    "Rey y Dama vs Rey": {
-        "fen": "7k/5Q2/6K1/8/8/8/8/8 w - - 0 1",
-        "theoretical_moves": ["f7f8"],  # Mate en 1
-        "description": "Mate básico con dama - mate en 1",
-        "difficulty": "Muy Fácil",
-        "expected_moves": 1
-    },
-    "Rey y Torre vs Rey": {
-        "fen": "8/8/8/8/8/7R/3K4/k7 w - - 0 1",
-        "theoretical_moves": ["h3a3", "a1b1", "a3a1"],  # Mate en 2
-        "description": "Mate básico con torre - escalera hacia la banda",
-        "difficulty": "Fácil",
-        "expected_moves": 3
-    },
-    "La posición de Lucena": {
-        "fen": "4K3/1k2P3/8/8/8/8/6R1/5r2 w - - 0 1", 
-        "theoretical_moves": [],  # Mate en 2
-        "description": "Construir el puente",
-        "difficulty": "Fácil",
-        "expected_moves": 3
-    },
-
-    "Rey y 2 Torres vs Rey": {
-        "fen": "8/8/8/8/8/6RR/3K4/k7 w - - 0 1",
-        "theoretical_moves": ["g3a3"],  # Mate en 1
-        "description": "Mate rápido con dos torres",
-        "difficulty": "Muy Fácil",
-        "expected_moves": 1
-    },
-    "Rey y Alfil + Caballo vs Rey": {
-        "fen": "8/8/8/8/8/5BN1/3K4/k7 w - - 0 1",
-        "theoretical_moves": ["g3e2", "a1b1", "f3e4", "b1c1", "e2c3"],
-        "description": "Uno de los mates más difíciles - requiere coordinación perfecta",
-        "difficulty": "Muy Difícil",
-        "expected_moves": 20
-    },
-    "Rey y 2 Alfiles vs Rey": {
-        "fen": "8/8/8/8/8/6BB/3K4/k7 w - - 0 1",
-        "theoretical_moves": ["g3e1", "a1b2", "h3f1"],
-        "description": "Mate con dos alfiles - acorralar al rey",
-        "difficulty": "Difícil",
-        "expected_moves": 10
-    },
-    "Lucena (Torre)": {
-        "fen": "1K6/1P1k4/8/8/8/8/r7/2R5 w - - 0 1",
-        "theoretical_moves": ["c1c4", "a2a1", "b8b7", "a1b1", "b7c7"],
-        "description": "Posición ganadora clásica con torre",
-        "difficulty": "Medio",
-        "expected_moves": 8
-    },
-    "Philidor (Defensa Torre)": {
-        "fen": "3k4/R7/3K4/8/8/8/r7/8 b - - 0 1",
-        "theoretical_moves": ["a2a6", "d6d7", "a6a7"],
-        "description": "Defensa de tablas con torre - posición pasiva",
-        "difficulty": "Medio",
-        "expected_moves": 15
-    },
-    "Rey y Peón vs Rey (ganador)": {
-        "fen": "8/8/8/8/3k4/3P4/3K4/8 w - - 0 1",
-        "theoretical_moves": ["d2c3", "d4e5", "c3c4", "e5e6", "c4c5"],
-        "description": "Peón pasado con rey apoyando - regla del cuadrado",
-        "difficulty": "Fácil",
-        "expected_moves": 8
-    },
-    "Mate de la Coz": {
-        "fen": "8/8/8/8/8/6N1/5K1k/8 w - - 0 1",
-        "theoretical_moves": ["g3f5", "h2h3", "f2g1", "h3h2", "g1f1", "h2h1", "f5g3"],
-        "description": "Mate con caballo requiriendo rey enemigo en esquina",
-        "difficulty": "Muy Difícil",
-        "expected_moves": 15
-    },
-    "Torre y Peón vs Torre (Tablas Philidor)": {
-        "fen": "8/4k3/8/4pP2/4K3/8/8/r7 b - - 0 1",
-        "theoretical_moves": ["a1a5", "e4d3", "a5f5", "d3e3", "f5f1"],
-        "description": "Defensa de tablas cortando al rey",
-        "difficulty": "Medio",
-        "expected_moves": 20
-    },
-    "Mate de Anastasia": {
-        "fen": "5rk1/5Npp/8/8/8/8/5RPP/6K1 w - - 0 1",
-        "theoretical_moves": ["f2f8", "g8h7", "f8f7"],
-        "description": "Patrón de mate con torre y caballo",
-        "difficulty": "Fácil",
-        "expected_moves": 3
-    }
-}
+# El slider permite búsquedas largas: limitar el árbol para no agotar la memoria
+APP_SEARCH_CONFIG = SearchConfig(max_tree_bytes=256 * 1024 * 1024)
 
 def initialize_session_state():
     """Inicializa el estado de la sesión"""
@@ -183,6 +91,7 @@ def make_mcts_move():
                     board, 
                     time_limit=st.session_state.mcts_time,
                     tb=tb,
+                    config=APP_SEARCH_CONFIG,
                     debug_callback=debug_callback if st.session_state.debug_mode else None
                 )
             
@@ -0,0 +1,179 @@
+"""
+Utilidades de bitboards compartidas por la búsqueda, los rollouts y la evaluación.
+
+- Valores de material (PIECE_VALUES) y material por popcount.
+- Tablas de geometría precalculadas (distancias, bolas alrededor del rey, mop-up),
+  también como arrays de NumPy con caché .npy opcional.
+- popcount/lsb/msb vectorizados sobre arrays uint64.
+- Intercambio estático (SEE) sobre los bitboards de python-chess.
+"""
+from __future__ import annotations
+import os
+from functools import lru_cache
+import chess
+
+# Valores de material en peones (el rey no se "gana": 0 como en el resto del código)
+PIECE_VALUES = (0, 1, 3, 3, 5, 9, 0)   # índice = chess.PieceType (0 = vacío)
+
+# --- Tablas de geometría (precalculadas una vez al importar) ---
+#
+# Listas de Python para los caminos calientes (indexar una lista es más rápido
+# que indexar un array de NumPy escalar a escalar). Las mismas tablas como
+# arrays están disponibles vía `geometry_arrays()`, con caché .npy opcional
+# memory-mapped (variable de entorno MCTS_GEOMETRY_CACHE = directorio).
+
+def _center_distance(sq: int) -> float:
+    return max(abs(chess.square_file(sq) - 3.5), abs(chess.square_rank(sq) - 3.5))
+
+def _edge_distance(sq: int) -> int:
+    f, r = chess.square_file(sq), chess.square_rank(sq)
+    return min(f, 7 - f, r, 7 - r)
+
+SQUARE_DIST = [[chess.square_distance(a, b) for b in chess.SQUARES] for a in chess.SQUARES]   # Chebyshev
+CENTER_DIST = [_center_distance(sq) for sq in chess.SQUARES]    # 0.5 (centro) .. 3.5 (borde)
+EDGE_DIST = [_edge_distance(sq) for sq in chess.SQUARES]        # 0 (borde) .. 3 (centro)
+# BALL1[sq]: casillas a distancia <= 1 (anillo del rey + la propia); BALL2: distancia <= 2
+BALL1 = [chess.BB_KING_ATTACKS[sq] | chess.BB_SQUARES[sq] for sq in chess.SQUARES]
+BALL2 = [sum(chess.BB_SQUARES[t] for t in chess.SQUARES if SQUARE_DIST[sq][t] <= 2) for sq in chess.SQUARES]
+# Mop-up KXK de evaluate_endgame_position: rey rival al borde, reyes cerca.
+# MOPUP[our_king][their_king] = centro(rival)/8 - distancia(reyes)/15
+MOPUP = [[CENTER_DIST[ek] / 8.0 - SQUARE_DIST[ok][ek] / 15.0 for ek in chess.SQUARES] for ok in chess.SQUARES]
+
+_GEOMETRY_TABLES = ('SQUARE_DIST', 'CENTER_DIST', 'EDGE_DIST', 'BALL1', 'BALL2', 'MOPUP')
+
+def _geometry_array(name: str):
+    import numpy as np
+
+    dtype = np.uint64 if name.startswith('BALL') else np.float64 if name in ('CENTER_DIST', 'MOPUP') else np.uint8
+    return np.array(globals()[name], dtype=dtype)
+
+def save_geometry_cache(cache_dir: str) -> list[str]:
+    """Escribe cada tabla como `<cache_dir>/<nombre>.npy`."""
+    import numpy as np
+
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = []
+    for name in _GEOMETRY_TABLES:
+        path = os.path.join(cache_dir, name.lower() + '.npy')
+        np.save(path, _geometry_array(name))
+        paths.append(path)
+    return paths
+
+@lru_cache(maxsize=None)
+def geometry_arrays(cache_dir: str | None = None) -> dict:
+    """Tablas como arrays de NumPy (para evaluadores vectorizados). Si existe la caché
+    .npy se abre con mmap (los procesos hijos comparten las páginas); si no, se crea."""
+    import numpy as np
+
+    cache_dir = cache_dir or os.environ.get('MCTS_GEOMETRY_CACHE')
+    if not cache_dir:
+        return {name: _geometry_array(name) for name in _GEOMETRY_TABLES}
+    if not all(os.path.exists(os.path.join(cache_dir, n.lower() + '.npy')) for n in _GEOMETRY_TABLES):
+        save_geometry_cache(cache_dir)
+    return {name: np.load(os.path.join(cache_dir, name.lower() + '.npy'), mmap_mode='r') for name in _GEOMETRY_TABLES}
+
+def king_box_control(square: int, enemy_king: int) -> int:
+    """Casillas a distancia <= 2 del rey rival que cubre un rey en `square` (incluida la propia)."""
+    return (BALL1[square] & BALL2[enemy_king]).bit_count()
+
+# --- Material y popcount ---
+
+def material(board: chess.Board, color: chess.Color) -> int:
+    """Material de `color` en peones (P=1, N=B=3, R=5, Q=9) con popcounts sobre los bitboards."""
+    occ = board.occupied_co[color]
+    return ((board.pawns & occ).bit_count() + 3 * ((board.knights | board.bishops) & occ).bit_count()
+            + 5 * (board.rooks & occ).bit_count() + 9 * (board.queens & occ).bit_count())
+
+def popcount64(arr):
+    """Popcount elemento a elemento de un array uint64 (np.bitwise_count o tabla de bytes)."""
+    import numpy as np
+
+    arr = np.asarray(arr, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(arr).astype(np.int64)
+    lut = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+    return lut[arr.view(np.uint8).reshape(arr.shape + (8,))].sum(axis=-1)
+
+def lsb64(arr):
+    """Índice del bit menos significativo de cada elemento (-1 si es 0)."""
+    import numpy as np
+
+    arr = np.asarray(arr, dtype=np.uint64)
+    low = arr & (~arr + np.uint64(1))
+    return np.where(arr == 0, -1, popcount64(low - np.uint64(1)))
+
+def msb64(arr):
+    """Índice del bit más significativo de cada elemento (-1 si es 0)."""
+    import numpy as np
+
+    arr = np.array(arr, dtype=np.uint64)
+    for shift in (1, 2, 4, 8, 16, 32):
+        arr |= arr >> np.uint64(shift)
+    return popcount64(arr) - 1
+
+# --- Static exchange evaluation ---
+
+def _least_valuable(board: chess.Board, attackers: int) -> tuple[int, int] | None:
+    """(casilla, tipo) del atacante más barato dentro de la máscara `attackers`."""
+    for pt, mask in ((chess.PAWN, board.pawns), (chess.KNIGHT, board.knights), (chess.BISHOP, board.bishops),
+                     (chess.ROOK, board.rooks), (chess.QUEEN, board.queens), (chess.KING, board.kings)):
+        bb = attackers & mask
+        if bb:
+            return (bb & -bb).bit_length() - 1, pt
+    return None
+
+def see_square(board: chess.Board, square: int) -> int:
+    """
+    Static exchange evaluation sobre `square`: balance de material (en peones) para
+    el bando contrario a la pieza que ocupa la casilla si inicia la secuencia de
+    capturas, siempre con el atacante más barato. Las piezas que se retiran de
+    `occupied` destapan atacantes en rayos X (torres/damas/alfiles detrás).
+
+    0 si la casilla está vacía o no hay atacantes. Un valor > 0 significa que la
+    pieza está colgada (el rival gana material capturándola).
+    """
+    target = board.piece_type_at(square)
+    if not target:
+        return 0
+    side = not board.color_at(square)
+    occupied = board.occupied
+    if not board.attackers_mask(side, square, occupied):
+        return 0
+
+    swap = [PIECE_VALUES[target]]
+    on_square = None   # valor de la pieza que está ahora en la casilla
+    while True:
+        attackers = board.attackers_mask(side, square, occupied) & occupied
+        lva = _least_valuable(board, attackers)
+        if lva is None:
+            break
+        sq, pt = lva
+        # El rey no puede capturar en una casilla que sigue defendida
+        if pt == chess.KING and board.attackers_mask(not side, square, occupied) & occupied:
+            break
+        if on_square is not None:
+            swap.append(on_square - swap[-1])
+        on_square = PIECE_VALUES[pt]
+        occupied &= ~chess.BB_SQUARES[sq]
+        side = not side
+
+    if on_square is None:
+        return 0
+    for i in range(len(swap) - 1, 0, -1):
+        swap[i - 1] = -max(-swap[i - 1], swap[i])
+    return swap[0]
+
+def see(board: chess.Board, move: chess.Move) -> int:
+    """Balance de material de `move` para el bando que mueve: lo capturado menos lo que se pierde en la casilla destino."""
+    captured = board.piece_type_at(move.to_square)
+    if board.is_en_passant(move):
+        captured = chess.PAWN
+    gained = PIECE_VALUES[captured] if captured else 0
+    if move.promotion:
+        gained += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
+    board.push(move)
+    try:
+        lost = max(0, see_square(board, move.to_square))
+    finally:
+        board.pop()
+    return gained - lost
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Índice compacto de posiciones de pocas piezas por firma de material.
+
+Una firma como "KQvK" o "KBNvK" (nomenclatura de Syzygy: bando fuerte
+primero) define el orden de las piezas. Las tablas de finales propias
+(retro.py, tb_compile.py) guardan un valor por índice en un array plano:
+
+    índice = ((bando_al_mover * NK + rey_fuerte) * 64 + casilla_2) * 64 + ...
+
+- El bando fuerte se trata siempre como blancas: si en el tablero lo tiene
+  el negro, se usa `board.mirror()` (colores y filas invertidos).
+- Reducción por simetría (symmetry.SQUARE_MAP): sin peones, el rey fuerte se
+  lleva al triángulo a1-d1-d4 (NK = 10); con peones, solo espejo de columnas
+  a la mitad a-d (NK = 32). Se ignoran enroque y captura al paso.
+- Piezas repetidas del mismo bando se ordenan por casilla.
+
+Los índices que no son canónicos (posición ilegal, otra orientación, orden
+de piezas repetidas) nunca se consultan; `decode` devuelve None para ellos.
+"""
+
+from __future__ import annotations
+
+import chess
+
+from symmetry import SQUARE_MAP, ALL_TRANSFORMS, PAWN_TRANSFORMS
+
+TRIANGLE = tuple(chess.square(f, r) for f in range(4) for r in range(f + 1))   # a1, b1, b2, c1, ... d4
+HALF = tuple(chess.square(f, r) for r in range(8) for f in range(4))            # columnas a-d
+
+def side_signature(board: chess.Board, color: chess.Color) -> str:
+    """Piezas de `color` como en las firmas de Syzygy: "KQ", "KBN", "KP"..."""
+    mask = board.occupied_co[color]
+    return ('K' * (board.kings & mask).bit_count() + 'Q' * (board.queens & mask).bit_count()
+            + 'R' * (board.rooks & mask).bit_count() + 'B' * (board.bishops & mask).bit_count()
+            + 'N' * (board.knights & mask).bit_count() + 'P' * (board.pawns & mask).bit_count())
+
+def material_signature(board: chess.Board) -> str:
+    """Firma del tablero con las blancas primero ("KQvK", "KvKR"...)."""
+    return f"{side_signature(board, chess.WHITE)}v{side_signature(board, chess.BLACK)}"
+
+def find_table(tables: dict, board: chess.Board):
+    """(entrada, invertido) de `tables` (firma -> ...) para el tablero, probando también la firma
+    con colores invertidos; (None, False) si no hay. Con `invertido`, usar `index_as(board, True)`."""
+    sig = material_signature(board)
+    if sig in tables:
+        return tables[sig], False
+    white, black = sig.split('v')
+    return tables.get(f"{black}v{white}"), True
+
+class EndgameIndex:
+    def __init__(self, signature: str):
+        white, black = signature.split('v')
+        self.signature = signature
+        self.swapped = f"{black}v{white}"
+        self.pieces = ([(chess.WHITE, chess.Piece.from_symbol(c).piece_type) for c in white]
+                       + [(chess.BLACK, chess.Piece.from_symbol(c).piece_type) for c in black])
+        self.groups = list(dict.fromkeys(self.pieces[1:]))   # (color, tipo) tras el rey fuerte, sin repetir
+        self.has_pawns = 'P' in signature
+        self.transforms = PAWN_TRANSFORMS if self.has_pawns else ALL_TRANSFORMS
+        self.king_squares = HALF if self.has_pawns else TRIANGLE
+        self.king_index = {sq: i for i, sq in enumerate(self.king_squares)}
+        # Por casilla del rey fuerte, las transformaciones que lo llevan a la región canónica
+        self.king_maps = [[SQUARE_MAP[t] for t in self.transforms if SQUARE_MAP[t][sq] in self.king_index]
+                          for sq in chess.SQUARES]
+        self.size = 2 * len(self.king_squares) * 64 ** (len(self.pieces) - 1)
+
+    def orient(self, board: chess.Board) -> chess.Board | None:
+        """El tablero con el bando fuerte como blancas, o None si la firma no corresponde."""
+        sig = material_signature(board)
+        if sig == self.signature:
+            return board
+        if sig == self.swapped:
+            return board.mirror()
+        return None
+
+    def index(self, board: chess.Board) -> int | None:
+        """Índice canónico del tablero (None si no es de esta firma)."""
+        sig = material_signature(board)
+        if sig != self.signature and sig != self.swapped:
+            return None
+        return self.index_as(board, sig != self.signature)
+
+    def index_as(self, board: chess.Board, flipped: bool) -> int:
+        """Índice sin comprobar la firma; `flipped` si el bando fuerte es el negro (como `board.mirror()`)."""
+        strong = chess.BLACK if flipped else chess.WHITE
+        xor = 56 if flipped else 0
+        wk = board.king(strong) ^ xor
+        stm = int(board.turn != strong) * len(self.king_squares)
+        groups = [[sq ^ xor for sq in chess.scan_forward(board.pieces_mask(pt, color ^ flipped))]
+                  for color, pt in self.groups]
+        # Con el rey en la diagonal a1-d4 hay dos orientaciones válidas: la de menor índice
+        best = None
+        for smap in self.king_maps[wk]:
+            idx = stm + self.king_index[smap[wk]]
+            for squares in groups:
+                if len(squares) == 1:
+                    idx = idx * 64 + smap[squares[0]]
+                else:
+                    for sq in sorted(smap[s] for s in squares):
+                        idx = idx * 64 + sq
+            if best is None or idx < best:
+                best = idx
+        return best
+
+    def decode(self, idx: int) -> chess.Board | None:
+        """Tablero del índice, o None si la posición es ilegal o el índice no es el canónico."""
+        squares = []
+        rest = idx
+        for _ in self.pieces[1:]:
+            squares.append(rest % 64)
+            rest //= 64
+        squares.reverse()
+        stm, k = divmod(rest, len(self.king_squares))
+        squares.insert(0, self.king_squares[k])
+        if len(set(squares)) != len(squares):
+            return None
+        board = chess.Board(None)
+        for (color, pt), sq in zip(self.pieces, squares):
+            board.set_piece_at(sq, chess.Piece(pt, color))
+        board.turn = chess.BLACK if stm else chess.WHITE
+        if not board.is_valid() or self.index(board) != idx:
+            return None
+        return board
@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+"""
+Tablero compacto para rollouts de finales con pocas piezas.
+
+`chess.Board` guarda en cada push un `_BoardState` completo, crea objetos
+`Move` por cada jugada generada y recalcula las jugadas legales en cada
+`is_checkmate` / `is_stalemate`. `EndgameBoard` sólo tiene lo que necesita
+un rollout sin enroque:
+- bitboards por tipo y color + buzón de 64 casillas;
+- tablas de ataque precalculadas de python-chess (BB_KNIGHT_ATTACKS,
+  BB_RANK_ATTACKS...);
+- jugadas como tuplas (desde, hasta, promoción) y legalidad incremental:
+  sólo se hace make/unmake para comprobar jugadas del rey, capturas al paso,
+  evasiones o piezas clavadas;
+- push/pop con una tupla de deshacer por jugada.
+
+Las jugadas legales salen en el mismo orden que `chess.Board.legal_moves` y
+`fast_rollout_policy` puntúa exactamente igual que `mcts_core.rollout_policy`
+(mismas llamadas al generador aleatorio), así que un rollout con este
+tablero juega la misma partida que con python-chess, sólo que más rápido.
+`mcts_core.simulate` lo usa automáticamente con <= `fast_pieces` piezas.
+"""
+
+from __future__ import annotations
+
+import random
+
+import chess
+from chess import (BB_SQUARES, BB_KING_ATTACKS, BB_KNIGHT_ATTACKS, BB_PAWN_ATTACKS, BB_RANK_ATTACKS,
+                   BB_FILE_ATTACKS, BB_DIAG_ATTACKS, BB_RANK_MASKS, BB_FILE_MASKS, BB_DIAG_MASKS,
+                   BB_DARK_SQUARES, BB_LIGHT_SQUARES, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING)
+
+from bb_utils import see_square, PIECE_VALUES, SQUARE_DIST
+
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)   # orden de python-chess
+BACK_RANKS = chess.BB_RANK_1 | chess.BB_RANK_8
+
+def _scan_reversed(bb: int):
+    while bb:
+        sq = bb.bit_length() - 1
+        yield sq
+        bb ^= 1 << sq
+
+class EndgameBoard:
+    """Posición sin enroque con la interfaz de lectura de `chess.Board` que usan simulate y see_square."""
+    __slots__ = ('bb', 'occupied_co', 'types', 'turn', 'ep_square', 'halfmove_clock', 'stack')
+
+    def __init__(self):
+        self.bb = [0] * 7              # por tipo de pieza (índice 1..6)
+        self.occupied_co = [0, 0]      # [negras, blancas]
+        self.types = [0] * 64          # buzón: tipo de pieza por casilla (0 = vacía)
+        self.turn = chess.WHITE
+        self.ep_square = None
+        self.halfmove_clock = 0
+        self.stack = []
+
+    @classmethod
+    def from_board(cls, board: chess.Board) -> 'EndgameBoard':
+        eb = cls()
+        for pt in range(1, 7):
+            eb.bb[pt] = board.pieces_mask(pt, chess.WHITE) | board.pieces_mask(pt, chess.BLACK)
+            for sq in chess.scan_forward(eb.bb[pt]):
+                eb.types[sq] = pt
+        eb.occupied_co = [board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE]]
+        eb.turn = board.turn
+        eb.ep_square = board.ep_square
+        eb.halfmove_clock = board.halfmove_clock
+        return eb
+
+    def to_board(self) -> chess.Board:
+        board = chess.Board(None)
+        for sq in chess.scan_forward(self.occupied):
+            board.set_piece_at(sq, chess.Piece(self.types[sq], bool(self.occupied_co[chess.WHITE] & BB_SQUARES[sq])))
+        board.turn = self.turn
+        board.ep_square = self.ep_square
+        board.halfmove_clock = self.halfmove_clock
+        return board
+
+    # --- Interfaz de lectura compatible con chess.Board ---
+
+    @property
+    def occupied(self) -> int:
+        return self.occupied_co[0] | self.occupied_co[1]
+
+    pawns = property(lambda self: self.bb[PAWN])
+    knights = property(lambda self: self.bb[KNIGHT])
+    bishops = property(lambda self: self.bb[BISHOP])
+    rooks = property(lambda self: self.bb[ROOK])
+    queens = property(lambda self: self.bb[QUEEN])
+    kings = property(lambda self: self.bb[KING])
+
+    def piece_type_at(self, square: int) -> int | None:
+        return self.types[square] or None
+
+    def color_at(self, square: int) -> bool | None:
+        if self.occupied_co[chess.WHITE] & BB_SQUARES[square]:
+            return chess.WHITE
+        if self.occupied_co[chess.BLACK] & BB_SQUARES[square]:
+            return chess.BLACK
+        return None
+
+    def king(self, color: bool) -> int | None:
+        k = self.bb[KING] & self.occupied_co[color]
+        return k.bit_length() - 1 if k else None
+
+    def placement_key(self) -> tuple:
+        """Equivale a `board.fen().split(' ')[0]`: sólo la colocación de las piezas."""
+        bb = self.bb
+        return self.occupied_co[1], bb[1], bb[2], bb[3], bb[4], bb[5], bb[6]
+
+    def attacks_mask(self, square: int, occupied: int | None = None) -> int:
+        pt = self.types[square]
+        occupied = self.occupied if occupied is None else occupied
+        if pt == PAWN:
+            return BB_PAWN_ATTACKS[bool(self.occupied_co[chess.WHITE] & BB_SQUARES[square])][square]
+        if pt == KNIGHT:
+            return BB_KNIGHT_ATTACKS[square]
+        if pt == KING:
+            return BB_KING_ATTACKS[square]
+        attacks = 0
+        if pt == BISHOP or pt == QUEEN:
+            attacks = BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied]
+        if pt == ROOK or pt == QUEEN:
+            attacks |= (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied]
+                        | BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied])
+        return attacks
+
+    def attackers_mask(self, color: bool, square: int, occupied: int | None = None) -> int:
+        occupied = self.occupied if occupied is None else occupied
+        bb = self.bb
+        queens_and_rooks = bb[QUEEN] | bb[ROOK]
+        queens_and_bishops = bb[QUEEN] | bb[BISHOP]
+        attackers = ((BB_KING_ATTACKS[square] & bb[KING]) | (BB_KNIGHT_ATTACKS[square] & bb[KNIGHT])
+                     | (BB_PAWN_ATTACKS[not color][square] & bb[PAWN]))
+        if queens_and_rooks:
+            attackers |= ((BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied]
+                           | BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied]) & queens_and_rooks)
+        if queens_and_bishops:
+            attackers |= BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied] & queens_and_bishops
+        return attackers & self.occupied_co[color]
+
+    def is_check(self) -> bool:
+        return bool(self.attackers_mask(not self.turn, self.king(self.turn)))
+
+    # --- Generación de jugadas (mismo orden que python-chess) ---
+
+    def _pseudo(self, from_mask: int, to_mask: int):
+        us = self.turn
+        ours = self.occupied_co[us]
+        occupied = self.occupied
+        pawns = self.bb[PAWN] & ours & from_mask
+        for f in _scan_reversed(ours & ~self.bb[PAWN] & from_mask):
+            for t in _scan_reversed(self.attacks_mask(f, occupied) & ~ours & to_mask):
+                yield f, t, 0
+        if not pawns:
+            return
+        for f in _scan_reversed(pawns):
+            for t in _scan_reversed(BB_PAWN_ATTACKS[us][f] & self.occupied_co[not us] & to_mask):
+                if BB_SQUARES[t] & BACK_RANKS:
+                    for promo in PROMOTIONS:
+                        yield f, t, promo
+                else:
+                    yield f, t, 0
+        if us == chess.WHITE:
+            single = pawns << 8 & ~occupied
+            double = single << 8 & ~occupied & (chess.BB_RANK_3 | chess.BB_RANK_4)
+            back = -8
+        else:
+            single = pawns >> 8 & ~occupied
+            double = single >> 8 & ~occupied & (chess.BB_RANK_6 | chess.BB_RANK_5)
+            back = 8
+        for t in _scan_reversed(single & to_mask):
+            if BB_SQUARES[t] & BACK_RANKS:
+                for promo in PROMOTIONS:
+                    yield t + back, t, promo
+            else:
+                yield t + back, t, 0
+        for t in _scan_reversed(double & to_mask):
+            yield t + 2 * back, t, 0
+        ep = self.ep_square
+        if ep is not None and BB_SQUARES[ep] & to_mask and not BB_SQUARES[ep] & occupied:
+            capturers = pawns & BB_PAWN_ATTACKS[not us][ep] & chess.BB_RANKS[4 if us else 3]
+            for f in _scan_reversed(capturers):
+                yield f, ep, 0
+
+    def generate_legal(self):
+        """Jugadas legales como tuplas (desde, hasta, promoción), en el orden de `chess.Board.legal_moves`."""
+        us = self.turn
+        ours = self.occupied_co[us]
+        king = self.king(us)
+        checkers = self.attackers_mask(not us, king)
+        occupied = self.occupied
+        if checkers:
+            # Evasiones como python-chess: primero el rey, luego el resto (que se verifica con make/unmake)
+            for t in _scan_reversed(BB_KING_ATTACKS[king] & ~ours):
+                if not self.attackers_mask(not us, t, occupied ^ BB_SQUARES[king]):
+                    yield king, t, 0
+            if checkers & (checkers - 1):
+                return   # jaque doble: sólo el rey
+            for mv in self._pseudo(~self.bb[KING], chess.BB_ALL):
+                if self._safe_after(mv, king):
+                    yield mv
+            return
+
+        pinned = self._pinned(king, us, occupied)
+        for mv in self._pseudo(chess.BB_ALL, chess.BB_ALL):
+            f, t, _ = mv
+            if f == king:
+                if not self.attackers_mask(not us, t, occupied ^ BB_SQUARES[king]):
+                    yield mv
+            elif t == self.ep_square and self.types[f] == PAWN:
+                if self._safe_after(mv, king):
+                    yield mv
+            elif not pinned & BB_SQUARES[f] or chess.ray(f, t) & BB_SQUARES[king]:
+                yield mv
+
+    def _pinned(self, king: int, us: bool, occupied: int) -> int:
+        """Piezas propias clavadas contra el rey (como `_slider_blockers` de python-chess)."""
+        bb = self.bb
+        them = self.occupied_co[not us]
+        snipers = ((BB_RANK_ATTACKS[king][0] & (bb[ROOK] | bb[QUEEN]))
+                   | (BB_FILE_ATTACKS[king][0] & (bb[ROOK] | bb[QUEEN]))
+                   | (BB_DIAG_ATTACKS[king][0] & (bb[BISHOP] | bb[QUEEN]))) & them
+        pinned = 0
+        for sniper in _scan_reversed(snipers):
+            b = chess.between(king, sniper) & occupied
+            if b and not b & (b - 1):
+                pinned |= b
+        return pinned & self.occupied_co[us]
+
+    def _safe_after(self, mv, king: int) -> bool:
+        us = self.turn
+        self.push(mv)
+        safe = not self.attackers_mask(not us, king)
+        self.pop()
+        return safe
+
+    def legal_moves(self) -> list:
+        return list(self.generate_legal())
+
+    def has_legal_move(self) -> bool:
+        return next(self.generate_legal(), None) is not None
+
+    # --- Make / unmake ---
+
+    def push(self, mv):
+        f, t, promo = mv
+        us = self.turn
+        types = self.types
+        bb = self.bb
+        occ = self.occupied_co
+        pt = types[f]
+        captured = types[t]
+        cap_sq = t
+        ep = self.ep_square
+        self.stack.append((f, t, promo, pt, captured, ep, self.halfmove_clock))
+
+        self.halfmove_clock = 0 if (pt == PAWN or captured) else self.halfmove_clock + 1
+        self.ep_square = None
+        if pt == PAWN:
+            diff = t - f
+            if diff == 16 or diff == -16:
+                self.ep_square = f + diff // 2
+            elif t == ep and not captured:
+                cap_sq = t - 8 if us == chess.WHITE else t + 8
+                captured = PAWN
+        if captured:
+            bb[captured] ^= BB_SQUARES[cap_sq]
+            occ[not us] ^= BB_SQUARES[cap_sq]
+            types[cap_sq] = 0
+        new = promo or pt
+        bb[pt] ^= BB_SQUARES[f]
+        bb[new] |= BB_SQUARES[t]
+        occ[us] ^= BB_SQUARES[f] | BB_SQUARES[t]
+        types[f] = 0
+        types[t] = new
+        self.turn = not us
+
+    def pop(self):
+        f, t, promo, pt, captured, ep, halfmove = self.stack.pop()
+        self.turn = us = not self.turn
+        types = self.types
+        bb = self.bb
+        occ = self.occupied_co
+        bb[promo or pt] ^= BB_SQUARES[t]
+        bb[pt] |= BB_SQUARES[f]
+        occ[us] ^= BB_SQUARES[f] | BB_SQUARES[t]
+        types[t] = 0
+        types[f] = pt
+        if pt == PAWN and t == ep and not captured:
+            cap_sq = t - 8 if us == chess.WHITE else t + 8   # captura al paso
+            bb[PAWN] |= BB_SQUARES[cap_sq]
+            occ[not us] |= BB_SQUARES[cap_sq]
+            types[cap_sq] = PAWN
+        elif captured:
+            bb[captured] |= BB_SQUARES[t]
+            occ[not us] |= BB_SQUARES[t]
+            types[t] = captured
+        self.ep_square = ep
+        self.halfmove_clock = halfmove
+
+    # --- Finales de partida ---
+
+    def is_checkmate(self) -> bool:
+        return self.is_check() and not self.has_legal_move()
+
+    def is_stalemate(self) -> bool:
+        return not self.is_check() and not self.has_legal_move()
+
+    def has_insufficient_material(self, color: bool) -> bool:
+        bb = self.bb
+        ours = self.occupied_co[color]
+        if ours & (bb[PAWN] | bb[ROOK] | bb[QUEEN]):
+            return False
+        if ours & bb[KNIGHT]:
+            return ours.bit_count() <= 2 and not (self.occupied_co[not color] & ~bb[KING] & ~bb[QUEEN])
+        if ours & bb[BISHOP]:
+            same_color = (not bb[BISHOP] & BB_DARK_SQUARES) or (not bb[BISHOP] & BB_LIGHT_SQUARES)
+            return same_color and not bb[PAWN] and not bb[KNIGHT]
+        return True
+
+    def is_insufficient_material(self) -> bool:
+        return self.has_insufficient_material(chess.WHITE) and self.has_insufficient_material(chess.BLACK)
+
+def can_use(board: chess.Board, max_pieces: int) -> bool:
+    """¿Sirve `EndgameBoard` para rollouts desde `board`? (<= max_pieces piezas, sin enroque y un rey por bando)."""
+    return (bool(max_pieces) and chess.popcount(board.occupied) <= max_pieces and not board.castling_rights
+            and chess.popcount(board.kings & board.occupied_co[chess.WHITE]) == 1
+            and chess.popcount(board.kings & board.occupied_co[chess.BLACK]) == 1)
+
+def to_move(mv) -> chess.Move:
+    f, t, promo = mv
+    return chess.Move(f, t, promo or None)
+
+def fast_rollout_policy(board: EndgameBoard, visited_positions: set, rng: random.Random | None = None):
+    """`mcts_core.rollout_policy` sobre un `EndgameBoard` (claves de `placement_key`): misma
+    puntuación, mismo orden de desempate y mismas llamadas a `rng`. Devuelve la tupla de la jugada."""
+    moves = board.legal_moves()
+    if not moves:
+        return None
+
+    # Una sola generación de réplicas por jugada: vale para el mate y el ahogado
+    replies = []
+    for m in moves:
+        board.push(m)
+        check = board.is_check()
+        has_reply = board.has_legal_move()
+        if check and not has_reply:
+            board.pop()
+            return m
+        replies.append((check, has_reply))
+        board.pop()
+
+    scored_moves = []
+    for m, (check, has_reply) in zip(moves, replies):
+        score = 0
+        moved_type = board.types[m[0]]
+        moved_value = PIECE_VALUES[moved_type]
+        # Pieza capturada antes del push (peón que cambia de columna a una casilla vacía = al paso)
+        captured_type = board.types[m[1]]
+        if not captured_type and moved_type == PAWN and (m[0] - m[1]) % 8:
+            captured_type = PAWN
+        board.push(m)
+
+        if board.placement_key() in visited_positions:
+            score -= 2000
+        if check:
+            score += 250
+        loss = see_square(board, m[1])
+        if loss > 0:
+            score -= loss * 100
+
+        if captured_type:
+            captured_value = PIECE_VALUES[captured_type]
+            score += captured_value * 25
+            if captured_value > moved_value:
+                score += 60
+
+        # Tras el push el bando al mover es el rival
+        if moved_type in (ROOK, QUEEN, KING):
+            enemy_king = board.king(board.turn)
+            if enemy_king is not None:
+                score += (8 - SQUARE_DIST[m[1]][enemy_king]) * (15 if moved_type == KING else 12)
+
+        if (not check and not has_reply) or board.is_insufficient_material():
+            score -= 1000
+
+        board.pop()
+        scored_moves.append((m, score))
+
+    scored_moves.sort(key=lambda x: x[1], reverse=True)
+    top_moves = [m for m, s in scored_moves[:3] if s >= scored_moves[0][1] - 30]
+    return (rng or random).choice(top_moves) if top_moves else scored_moves[0][0]
@@ -1,10 +1,101 @@
-import math, random, time
-from dataclasses import dataclass, field
+import hashlib, math, random, sys, time, tracemalloc
+from dataclasses import dataclass, field, asdict
+from typing import Protocol
 import chess
 from tb_utils import probe_wdl, wdl_to_score
+from pns import pn_search
+from symmetry import position_key, canonical_key
+from fast_endgame import EndgameBoard, can_use as can_use_fast_board, fast_rollout_policy, to_move
+from bb_utils import PIECE_VALUES, see_square, material, popcount64, lsb64, geometry_arrays, SQUARE_DIST, MOPUP, king_box_control
 
 C_PUCT = 2.5
 ROLLOUT_MAX_PLIES = 30
+FAST_ROLLOUT_PIECES = 5   # rollouts con fast_endgame.EndgameBoard hasta estas piezas (0 = nunca)
+
+PRIOR_N = 10
+PRIOR_W_MATE = 1000.0
+PRIOR_W_CHECK = 50.0
+PRIOR_W_WIN = 5.0
+PRIOR_W_DRAW = 0.5
+PRIOR_W_LOSS = -5.0
+
+SELECTION_POLICIES = ('uct', 'ucb1_tuned')
+ROOT_POLICIES = ('uct', 'sequential_halving')
+
+@dataclass(frozen=True)
+class SearchConfig:
+    """Parámetros de una búsqueda. Inmutable y serializable (pickle/JSON vía `as_dict`).
+
+    Los valores por defecto son los de las constantes del módulo.
+    """
+    c_puct: float = C_PUCT
+    depth_penalty: float = 0.05          # penalización por profundidad en UCT
+    rollout_max_plies: int = ROLLOUT_MAX_PLIES
+    prior_n: int = PRIOR_N               # visitas virtuales de los priors
+    prior_w_mate: float = PRIOR_W_MATE
+    prior_w_check: float = PRIOR_W_CHECK
+    prior_w_win: float = PRIOR_W_WIN     # escala del prior de Syzygy (±prior_w_win)
+    # Gestión de tiempo: parar cuando la jugada más visitada ya no puede ser
+    # alcanzada en lo que queda de presupuesto; extender si las dos primeras
+    # están parejas al acabar el tiempo. Desactivada por defecto (opt-in).
+    time_management: bool = False
+    tm_min_iters: int = 30               # no parar antes de estas iteraciones
+    tm_extend: float = 0.5               # extensión máxima (fracción de time_limit), 0 = nunca
+    tm_close_ratio: float = 0.9          # "parejas": N_segunda >= ratio * N_mejor
+    # Límite de memoria del árbol (None = sin límite). Al superarlo se colapsan
+    # los subárboles menos visitados hasta bajar a (1 - evict_fraction) del límite.
+    max_nodes: int | None = None
+    max_tree_bytes: int | None = None
+    evict_fraction: float = 0.25
+    track_memory: bool = False           # pico de memoria con tracemalloc (lento; solo para diagnóstico)
+    # RAVE / AMAF: mezcla Q con el valor "all-moves-as-first" de la jugada,
+    # con peso beta = sqrt(rave_k / (3N + rave_k)) que decae con las visitas reales.
+    rave: bool = False
+    rave_k: float = 300.0
+    # Término de exploración: 'uct' (c·sqrt(ln N / n)) o 'ucb1_tuned', que lo escala
+    # por la varianza observada del hijo (mates y ramas con Syzygy apenas varían).
+    selection: str = 'uct'
+    # Política en la raíz: 'uct' o 'sequential_halving' (reparte el presupuesto en
+    # fases sobre las sh_candidates mejores jugadas por move_priority y descarta la
+    # peor mitad por Q al final de cada fase; por debajo de la raíz sigue UCT).
+    root_policy: str = 'uct'
+    sh_candidates: int = 16
+    # Progressive widening: un nodo solo admite un hijo nuevo mientras tenga menos
+    # de pw_k * N^pw_alpha hijos (en orden de move_priority); si no, se baja por UCT.
+    widening: bool = False
+    pw_k: float = 2.0
+    pw_alpha: float = 0.5
+    # Implicit minimax: cada nodo guarda además la evaluación estática
+    # (evaluate_endgame_position) respaldada por minimax, y la selección usa
+    # (1 - im_alpha) * Q + im_alpha * h.
+    implicit_minimax: bool = False
+    im_alpha: float = 0.4
+    # Proof-number search en la raíz antes del MCTS (pns.py): si prueba un mate
+    # en <= pns_mate_in jugadas, se juega sin más búsqueda. 0 nodos = desactivado.
+    pns_nodes: int = 0
+    pns_mate_in: int = 5
+    pns_time_fraction: float = 0.25      # tope de tiempo del PNS (fracción de time_limit)
+
+    # Rollouts de la política por defecto sobre fast_endgame.EndgameBoard (mismas
+    # partidas que con chess.Board, más rápidas) con <= estas piezas. 0 = nunca.
+    fast_rollout_pieces: int = FAST_ROLLOUT_PIECES
+    # Caché de valores por posición compartida entre las hojas de la búsqueda:
+    # media y número de evaluaciones por clave; con >= value_cache_min_count se
+    # usa la media en lugar de evaluar otra vez. 0 entradas = desactivada.
+    value_cache_size: int = 0
+    value_cache_min_count: int = 8
+    value_cache_symmetric: bool = False  # clave canónica por simetría (symmetry.canonical_key)
+
+    def __post_init__(self):
+        if self.selection not in SELECTION_POLICIES:
+            raise ValueError(f"selection debe ser uno de {SELECTION_POLICIES}, no {self.selection!r}")
+        if self.root_policy not in ROOT_POLICIES:
+            raise ValueError(f"root_policy debe ser uno de {ROOT_POLICIES}, no {self.root_policy!r}")
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+DEFAULT_CONFIG = SearchConfig()
 
 @dataclass
 class Node:
@@ -15,15 +106,35 @@ class Node:
     N: int = 0
     W: float = 0.0
     Q: float = 0.0
+    # Resultados reales (sin los priors) para la varianza de UCB1-Tuned
+    n_real: int = 0
+    W_real: float = 0.0
+    S: float = 0.0        # suma de valores al cuadrado
     depth: int = 0
     is_mate: bool = False
     mate_in_n: int = 999  # Distancia al mate (menor = mejor)
+    has_mate_child: bool = False
+    n_legal: int = -1     # nº de jugadas legales (se calcula la primera vez)
+    h: float | None = None     # implicit minimax: valor heurístico (misma perspectiva que Q)
+    order: list | None = None  # jugadas por move_priority (desde la primera expansión sin mates)
+    amaf: dict | None = None   # RAVE: jugada -> [N, W] de las jugadas del bando al mover aquí
+
+    def is_fully_expanded(self) -> bool:
+        if self.n_legal < 0:
+            self.n_legal = self.board.legal_moves.count()
+        return len(self.children) >= self.n_legal
+
+    def can_expand(self, cfg: 'SearchConfig') -> bool:
+        """Quedan jugadas sin hijo y, con progressive widening, el cupo k·N^α lo permite."""
+        if self.is_fully_expanded():
+            return False
+        return not cfg.widening or len(self.children) < cfg.pw_k * max(self.N, 1) ** cfg.pw_alpha
 
     def is_terminal(self):
         return self.board.is_checkmate() or self.board.is_stalemate() or \
                self.board.is_insufficient_material() or self.board.halfmove_clock >= 100
 
-def uct_value(child: 'Node', parent_N: int) -> float:
+def uct_value(child: 'Node', parent_N: int, cfg: SearchConfig = DEFAULT_CONFIG) -> float:
     """UCT con prioridad absoluta para mates"""
     if child.N == 0:
         return float('inf')
@@ -32,17 +143,39 @@ def uct_value(child: 'Node', parent_N: int) -> float:
     if child.is_mate:
         return float('inf') - child.mate_in_n
     
-    depth_penalty = child.depth * 0.05
-    return child.Q + C_PUCT * math.sqrt(math.log(parent_N + 1) / child.N) - depth_penalty
+    depth_penalty = child.depth * cfg.depth_penalty
+    q = child.Q
+    if cfg.implicit_minimax and child.h is not None:
+        q = (1 - cfg.im_alpha) * q + cfg.im_alpha * child.h
+    if cfg.rave and child.parent is not None and child.parent.amaf:
+        amaf = child.parent.amaf.get(child.move)
+        if amaf is not None:
+            beta = math.sqrt(cfg.rave_k / (3 * child.N + cfg.rave_k))
+            q = (1 - beta) * q + beta * amaf[1] / amaf[0]
+    log_n = math.log(parent_N + 1)
+    if cfg.selection == 'ucb1_tuned':
+        # Auer et al.: varianza empírica + su cota de confianza, acotada por la
+        # varianza máxima de un valor en [-1, 1]
+        if child.n_real:
+            mean = child.W_real / child.n_real
+            var = max(child.S / child.n_real - mean * mean, 0.0) + math.sqrt(2 * log_n / child.n_real)
+        else:
+            var = 1.0
+        return q + cfg.c_puct * math.sqrt(log_n / child.N * min(1.0, var)) - depth_penalty
+    return q + cfg.c_puct * math.sqrt(log_n / child.N) - depth_penalty
+
+def select(node: 'Node', cfg: SearchConfig = DEFAULT_CONFIG) -> tuple['Node', list[tuple[str, any]]]:
+    """Selecciona el nodo hoja más prometedor.
 
-def select(node: 'Node') -> tuple['Node', list[tuple[str, any]]]:
-    """Selecciona el nodo hoja más prometedor"""
+    Se detiene en el primer nodo que admite un hijo nuevo (`Node.can_expand`),
+    salvo que ya tenga un hijo mate, que se sigue con prioridad absoluta.
+    """
     debug_path = []
     cur = node
     
-    while cur.children and not cur.is_terminal():
+    while cur.children and (cur.has_mate_child or not cur.can_expand(cfg)) and not cur.is_terminal():
         uct_values = {
-            move: uct_value(child, cur.N) 
+            move: uct_value(child, cur.N, cfg)
             for move, child in cur.children.items()
         }
         
@@ -65,29 +198,24 @@ def select(node: 'Node') -> tuple['Node', list[tuple[str, any]]]:
     
     return cur, debug_path
 
-PRIOR_N = 10
-PRIOR_W_MATE = 1000.0
-PRIOR_W_CHECK = 50.0
-PRIOR_W_WIN = 5.0
-PRIOR_W_DRAW = 0.5
-PRIOR_W_LOSS = -5.0
-
-def expand(node: 'Node', tb=None, root_turn=None) -> tuple['Node', dict]:
+def expand(node: 'Node', tb=None, root_turn=None, cfg: SearchConfig = DEFAULT_CONFIG) -> tuple['Node', dict]:
     """Expande con detección CORRECTA de mates"""
-    debug_info = {'phase': 'expand', 'expanded': False}
+    debug_info = {'phase': 'expand', 'expanded': False, 'board_copies': 0, 'tb_probes': 0, 'tb_hits': 0}
     
     if node.is_terminal():
         return node, debug_info
     
     tried = set(node.children.keys())
+    if node.order is not None:
+        return expand_next(node, tried, tb, root_turn, cfg, debug_info)
     legal_moves = list(node.board.legal_moves)
-    piece_values = {1: 1, 2: 3, 3: 3, 4: 5, 5: 9, 6: 0}
-    
+
     # BUSCAR MATES INMEDIATOS
     mate_moves = []
     for mv in legal_moves:
         if mv not in tried:
             test_board = node.board.copy()
+            debug_info['board_copies'] += 1
             test_board.push(mv)
             # Después de nuestro movimiento, si el oponente está en jaque mate, ganamos
             if test_board.is_checkmate():
@@ -98,6 +226,7 @@ def expand(node: 'Node', tb=None, root_turn=None) -> tuple['Node', dict]:
     if mate_moves:
         for mv, mate_dist in mate_moves:
             nb = node.board.copy()
+            debug_info['board_copies'] += 1
             nb.push(mv)
             child = Node(
                 nb, 
@@ -107,16 +236,19 @@ def expand(node: 'Node', tb=None, root_turn=None) -> tuple['Node', dict]:
                 is_mate=True,
                 mate_in_n=mate_dist
             )
-            child.N = PRIOR_N * 100  # Mucha confianza
-            child.W = PRIOR_W_MATE * child.N
-            child.Q = PRIOR_W_MATE
+            child.N = cfg.prior_n * 100  # Mucha confianza
+            child.W = cfg.prior_w_mate * child.N
+            child.Q = cfg.prior_w_mate
+            if cfg.implicit_minimax:
+                child.h = 1.0
             node.children[mv] = child
+        node.has_mate_child = True
         
         best_mate = min(mate_moves, key=lambda x: x[1])  # Mate más rápido
         debug_info.update({
             'expanded': True,
             'move': best_mate[0].uci(),
-            'prior_Q': PRIOR_W_MATE,
+            'prior_Q': cfg.prior_w_mate,
             'depth': node.children[best_mate[0]].depth,
             'is_mate': True,
             'mate_in_n': best_mate[1],
@@ -124,97 +256,21 @@ def expand(node: 'Node', tb=None, root_turn=None) -> tuple['Node', dict]:
         })
         return node.children[best_mate[0]], debug_info
     
-    # Si no hay mates, proceder con la expansión normal
-    def move_priority(mv):
-        score = 0
-        b = node.board
-        moved_piece = b.piece_at(mv.from_square)
-        moved_value = piece_values.get(moved_piece.piece_type if moved_piece else 0, 0)
-        is_king = moved_piece and moved_piece.piece_type == chess.KING
-        
-        b.push(mv)
-        is_check = b.is_check()
-        
-        if is_check:
-            score += 200
-        
-        if not b.is_checkmate() and is_piece_hanging(b, mv.to_square):
-            score -= moved_value * 200
-        
-        b.pop()
-        
-        if b.is_capture(mv):
-            captured = b.piece_at(mv.to_square)
-            if captured:
-                captured_value = piece_values.get(captured.piece_type, 0)
-                score += captured_value * 30
-                if captured_value > moved_value:
-                    score += 50
-        
-        if is_king:
-            enemy_king = b.king(not b.turn)
-            if enemy_king:
-                from_dist = chess.square_distance(mv.from_square, enemy_king)
-                to_dist = chess.square_distance(mv.to_square, enemy_king)
-                
-                if to_dist < from_dist:
-                    score += (from_dist - to_dist) * 50
-                
-                if to_dist <= 2:
-                    score += 60
-                elif to_dist == 3:
-                    score += 30
-                
-                controlled_squares = 0
-                for sq in chess.SQUARES:
-                    if chess.square_distance(sq, enemy_king) <= 2:
-                        if chess.square_distance(mv.to_square, sq) <= 1:
-                            controlled_squares += 1
-                score += controlled_squares * 8
-        
-        elif moved_piece and moved_piece.piece_type in [4, 5]:
-            enemy_king = b.king(not b.turn)
-            if enemy_king:
-                from_dist = chess.square_distance(mv.from_square, enemy_king)
-                to_dist = chess.square_distance(mv.to_square, enemy_king)
-                score += (from_dist - to_dist) * 20
-        
-        if mv.promotion:
-            score += 200
-        
-        return score
-    
-    legal_moves.sort(key=move_priority, reverse=True)
-    
-    for mv in legal_moves:
-        if mv not in tried:
-            nb = node.board.copy()
-            nb.push(mv)
-            child = Node(nb, parent=node, move=mv, depth=node.depth + 1)
+    # Si no hay mates, proceder con la expansión normal; el orden queda en el nodo
+    # para las siguientes expansiones (que ya no repiten la búsqueda de mates)
+    node.order = sorted(legal_moves, key=lambda mv: move_priority(node.board, mv), reverse=True)
+    return expand_next(node, tried, tb, root_turn, cfg, debug_info)
 
-            prior_q = 0.0
-            
-            if nb.is_check():
-                child.N = PRIOR_N * 2
-                child.W = PRIOR_W_CHECK * child.N
-                child.Q = PRIOR_W_CHECK
-                prior_q = PRIOR_W_CHECK
-            elif tb is not None and tb.obj is not None and root_turn is not None:
-                wdl = probe_wdl(nb, tb.obj)
-                if wdl is not None:
-                    s = wdl_to_score(wdl)
-                    s = s if nb.turn == root_turn else -s
-                    child.N = PRIOR_N
-                    child.W = s * PRIOR_N * 5
-                    child.Q = s * 5
-                    prior_q = s * 5
+def expand_next(node: 'Node', tried: set, tb, root_turn, cfg: SearchConfig, debug_info: dict) -> tuple['Node', dict]:
+    """Crea el hijo de la primera jugada de `node.order` que aún no lo tiene."""
+    for mv in node.order:
+        if mv not in tried:
+            child = make_child(node, mv, tb, root_turn, cfg, debug_info)
 
-            node.children[mv] = child
-            
             debug_info.update({
                 'expanded': True,
                 'move': mv.uci(),
-                'prior_Q': round(prior_q, 3),
+                'prior_Q': round(child.Q, 3),
                 'depth': child.depth,
                 'is_mate': False
             })
@@ -223,7 +279,99 @@ def expand(node: 'Node', tb=None, root_turn=None) -> tuple['Node', dict]:
     
     return node, debug_info
 
+def move_priority(board: chess.Board, mv: chess.Move) -> int:
+    """Orden heurístico de expansión: jaques, capturas, SEE, acercar rey/piezas al rey rival."""
+    score = 0
+    b = board
+    moved_piece = b.piece_at(mv.from_square)
+    moved_value = PIECE_VALUES[moved_piece.piece_type] if moved_piece else 0
+    is_king = moved_piece and moved_piece.piece_type == chess.KING
+    
+    b.push(mv)
+    is_check = b.is_check()
+    
+    if is_check:
+        score += 200
+    
+    # Material que el rival gana capturando en la casilla destino (SEE, con rayos X)
+    if not b.is_checkmate():
+        loss = see_square(b, mv.to_square)
+        if loss > 0:
+            score -= loss * 200
+    
+    b.pop()
+    
+    if b.is_capture(mv):
+        captured = b.piece_at(mv.to_square)
+        if captured:
+            captured_value = PIECE_VALUES[captured.piece_type]
+            score += captured_value * 30
+            if captured_value > moved_value:
+                score += 50
+    
+    if is_king:
+        enemy_king = b.king(not b.turn)
+        if enemy_king:
+            from_dist = SQUARE_DIST[mv.from_square][enemy_king]
+            to_dist = SQUARE_DIST[mv.to_square][enemy_king]
+            
+            if to_dist < from_dist:
+                score += (from_dist - to_dist) * 50
+            
+            if to_dist <= 2:
+                score += 60
+            elif to_dist == 3:
+                score += 30
+            
+            # Casillas de la caja (distancia <= 2) del rey rival que cubre nuestro rey
+            controlled_squares = king_box_control(mv.to_square, enemy_king)
+            score += controlled_squares * 8
+    
+    elif moved_piece and moved_piece.piece_type in [4, 5]:
+        enemy_king = b.king(not b.turn)
+        if enemy_king:
+            from_dist = SQUARE_DIST[mv.from_square][enemy_king]
+            to_dist = SQUARE_DIST[mv.to_square][enemy_king]
+            score += (from_dist - to_dist) * 20
+    
+    if mv.promotion:
+        score += 200
+    
+    return score
+
+def make_child(node: 'Node', mv: chess.Move, tb=None, root_turn=None, cfg: SearchConfig = DEFAULT_CONFIG,
+               debug_info: dict | None = None) -> 'Node':
+    """Crea (y cuelga de `node`) el hijo de `mv` con su prior: jaque o WDL de Syzygy."""
+    nb = node.board.copy()
+    nb.push(mv)
+    child = Node(nb, parent=node, move=mv, depth=node.depth + 1)
+    if debug_info is not None:
+        debug_info['board_copies'] += 1
+    if cfg.implicit_minimax:
+        child.h = evaluate_endgame_position(nb, node.board.turn)   # perspectiva de quien movió
+
+    if nb.is_check():
+        child.N = cfg.prior_n * 2
+        child.W = cfg.prior_w_check * child.N
+        child.Q = cfg.prior_w_check
+    elif tb is not None and tb.obj is not None and root_turn is not None:
+        wdl = probe_wdl(nb, tb.obj)
+        if debug_info is not None:
+            debug_info['tb_probes'] += 1
+        if wdl is not None:
+            if debug_info is not None:
+                debug_info['tb_hits'] += 1
+            s = -wdl_to_score(wdl)   # el WDL es del bando al mover en nb; el prior, de quien movió
+            child.N = cfg.prior_n
+            child.W = s * cfg.prior_n * cfg.prior_w_win
+            child.Q = s * cfg.prior_w_win
+
+    node.children[mv] = child
+    return child
+
 def is_piece_hanging(board: chess.Board, square: int) -> bool:
+    """Heurística anterior (solo el atacante más barato, sin rayos X). Ya no se usa en la
+    búsqueda: se conserva como referencia para `0_benchmark.py see` (ver bb_utils.see_square)."""
     piece = board.piece_at(square)
     if not piece:
         return False
@@ -237,16 +385,15 @@ def is_piece_hanging(board: chess.Board, square: int) -> bool:
     if not defenders:
         return True
     
-    piece_values = {1: 1, 2: 3, 3: 3, 4: 5, 5: 9, 6: 0}
-    piece_value = piece_values.get(piece.piece_type, 0)
+    piece_value = PIECE_VALUES[piece.piece_type]
     
-    min_attacker_value = min(piece_values.get(board.piece_type_at(sq), 10) for sq in attackers)
+    min_attacker_value = min(PIECE_VALUES[board.piece_type_at(sq)] for sq in attackers)
     if min_attacker_value < piece_value:
         return True
     
     return False
 
-def rollout_policy(board: chess.Board, visited_positions: set) -> chess.Move | None:
+def rollout_policy(board: chess.Board, visited_positions: set, rng: random.Random | None = None) -> chess.Move | None:
     moves = list(board.legal_moves)
     if not moves:
         return None
@@ -260,12 +407,13 @@ def rollout_policy(board: chess.Board, visited_positions: set) -> chess.Move | N
         board.pop()
 
     scored_moves = []
-    piece_values = {1: 1, 2: 3, 3: 3, 4: 5, 5: 9, 6: 0}
     
     for m in moves:
         score = 0
         moved_piece = board.piece_at(m.from_square)
-        moved_piece_value = piece_values.get(moved_piece.piece_type if moved_piece else 0, 0)
+        moved_piece_value = PIECE_VALUES[moved_piece.piece_type] if moved_piece else 0
+        # Pieza capturada antes del push (casilla destino vacía en una captura = al paso)
+        captured_type = (board.piece_type_at(m.to_square) or chess.PAWN) if board.is_capture(m) else None
         
         board.push(m)
         
@@ -276,27 +424,28 @@ def rollout_policy(board: chess.Board, visited_positions: set) -> chess.Move | N
         if board.is_check():
             score += 250
         
-        if is_piece_hanging(board, m.to_square):
-            penalty = moved_piece_value * 100
-            score -= penalty
+        loss = see_square(board, m.to_square)
+        if loss > 0:
+            score -= loss * 100
         
-        if board.is_capture(board.peek()):
-            captured_value = piece_values.get(board.piece_type_at(m.to_square), 0)
+        if captured_type is not None:
+            captured_value = PIECE_VALUES[captured_type]
             score += captured_value * 25
             
             if captured_value > moved_piece_value:
                 score += 60
         
+        # Tras el push el bando al mover es el rival: su rey es board.king(board.turn)
         if moved_piece and moved_piece.piece_type in [4, 5]:
-            enemy_king = board.king(not board.turn)
-            if enemy_king:
-                dist = chess.square_distance(m.to_square, enemy_king)
+            enemy_king = board.king(board.turn)
+            if enemy_king is not None:
+                dist = SQUARE_DIST[m.to_square][enemy_king]
                 score += (8 - dist) * 12
         
         if moved_piece and moved_piece.piece_type == 6:
-            enemy_king = board.king(not board.turn)
-            if enemy_king:
-                dist = chess.square_distance(m.to_square, enemy_king)
+            enemy_king = board.king(board.turn)
+            if enemy_king is not None:
+                dist = SQUARE_DIST[m.to_square][enemy_king]
                 score += (8 - dist) * 15
         
         if board.is_stalemate() or board.is_insufficient_material():
@@ -311,7 +460,7 @@ def rollout_policy(board: chess.Board, visited_positions: set) -> chess.Move | N
         return None
     
     top_moves = [m for m, s in scored_moves[:3] if s >= scored_moves[0][1] - 30]
-    return random.choice(top_moves) if top_moves else scored_moves[0][0]
+    return (rng or random).choice(top_moves) if top_moves else scored_moves[0][0]
 
 def evaluate_endgame_position(board: chess.Board, root_turn: chess.Color) -> float:
     if board.is_checkmate():
@@ -320,41 +469,8 @@ def evaluate_endgame_position(board: chess.Board, root_turn: chess.Color) -> flo
     if board.is_stalemate() or board.is_insufficient_material():
         return 0.0
     
-    piece_values = {1: 1, 2: 3, 3: 3, 4: 5, 5: 9}
-    
-    our_material = sum(
-        piece_values.get(board.piece_type_at(sq), 0)
-        for sq in board.pieces(chess.PAWN, root_turn)
-    ) + sum(
-        piece_values.get(board.piece_type_at(sq), 0)
-        for sq in board.pieces(chess.KNIGHT, root_turn)
-    ) + sum(
-        piece_values.get(board.piece_type_at(sq), 0)
-        for sq in board.pieces(chess.BISHOP, root_turn)
-    ) + sum(
-        piece_values.get(board.piece_type_at(sq), 0)
-        for sq in board.pieces(chess.ROOK, root_turn)
-    ) + sum(
-        piece_values.get(board.piece_type_at(sq), 0)
-        for sq in board.pieces(chess.QUEEN, root_turn)
-    )
-    
-    their_material = sum(
-        piece_values.get(board.piece_type_at(sq), 0)
-        for sq in board.pieces(chess.PAWN, not root_turn)
-    ) + sum(
-        piece_values.get(board.piece_type_at(sq), 0)
-        for sq in board.pieces(chess.KNIGHT, not root_turn)
-    ) + sum(
-        piece_values.get(board.piece_type_at(sq), 0)
-        for sq in board.pieces(chess.BISHOP, not root_turn)
-    ) + sum(
-        piece_values.get(board.piece_type_at(sq), 0)
-        for sq in board.pieces(chess.ROOK, not root_turn)
-    ) + sum(
-        piece_values.get(board.piece_type_at(sq), 0)
-        for sq in board.pieces(chess.QUEEN, not root_turn)
-    )
+    our_material = material(board, root_turn)
+    their_material = material(board, not root_turn)
     
     material_diff = our_material - their_material
     
@@ -366,33 +482,76 @@ def evaluate_endgame_position(board: chess.Board, root_turn: chess.Color) -> flo
         our_king = board.king(root_turn)
         
         if their_king and our_king:
-            file = chess.square_file(their_king)
-            rank = chess.square_rank(their_king)
-            center_dist = max(abs(file - 3.5), abs(rank - 3.5))
-            
-            king_dist = chess.square_distance(our_king, their_king)
-            
             material_score = min(material_diff / 10.0, 0.5)
-            position_score = (center_dist / 8.0) - (king_dist / 15.0)
+            position_score = MOPUP[our_king][their_king]   # centro(rival)/8 - distancia(reyes)/15
             
             return min(material_score + position_score, 0.95)
     
     return 0.1
 
-def simulate(board, max_plies=ROLLOUT_MAX_PLIES, tb=None, root_turn=None) -> tuple[float, dict]:
+def evaluate_endgame_batch(boards: list[chess.Board], root_turn: chess.Color):
+    """
+    `evaluate_endgame_position` para muchos tableros a la vez (np.ndarray float64, mismos valores).
+
+    Los finales de partida (mate, ahogado, material insuficiente) se detectan por
+    tablero con python-chess; material y mop-up se calculan en bloque con
+    popcounts sobre una matriz (N, 7) de bitboards.
+    """
+    import numpy as np
+
+    n = len(boards)
+    bbs = np.empty((n, 7), dtype=np.uint64)
+    terminal = np.full(n, np.nan)
+    for i, b in enumerate(boards):
+        bbs[i] = (b.pawns, b.knights, b.bishops, b.rooks, b.queens, b.kings, b.occupied_co[root_turn])
+        if b.is_checkmate():
+            terminal[i] = 1.0 if b.turn != root_turn else -1.0
+        elif b.is_stalemate() or b.is_insufficient_material():
+            terminal[i] = 0.0
+
+    ours = bbs[:, 6]
+    occupied = bbs[:, 0] | bbs[:, 1] | bbs[:, 2] | bbs[:, 3] | bbs[:, 4] | bbs[:, 5]
+    theirs = occupied & ~ours
+    weights = ((0, 1), (1, 3), (2, 3), (3, 5), (4, 9))
+    our_material = sum(w * popcount64(bbs[:, k] & ours) for k, w in weights)
+    their_material = sum(w * popcount64(bbs[:, k] & theirs) for k, w in weights)
+    diff = our_material - their_material
+
+    our_king = lsb64(bbs[:, 5] & ours)
+    their_king = lsb64(bbs[:, 5] & theirs)
+    # Igual que la versión escalar: `if their_king and our_king` (un rey en a1 = 0 no cuenta)
+    kings = (our_king > 0) & (their_king > 0)
+    mopup = geometry_arrays()['MOPUP']
+    position_score = np.where(kings, mopup[np.maximum(our_king, 0), np.maximum(their_king, 0)], 0.0)
+    winning = np.minimum(np.minimum(diff / 10.0, 0.5) + position_score, 0.95)
+
+    values = np.where(diff < 0, -0.8, np.where((diff > 0) & kings, winning, 0.1))
+    return np.where(np.isnan(terminal), values, terminal)
+
+def simulate(board, max_plies=ROLLOUT_MAX_PLIES, tb=None, root_turn=None, policy=None, rng=None,
+             fast_pieces=FAST_ROLLOUT_PIECES) -> tuple[float, dict]:
     debug_info = {
         'phase': 'simulate',
         'plies': 0,
         'moves': [],
         'tb_hit': False,
-        'outcome': None
+        'outcome': None,
+        'board_copies': 0,
+        'tb_probes': 0,
+        'fast_board': False
     }
     
     if root_turn is None:
         root_turn = board.turn
+    # Con la política por defecto y pocas piezas, el rollout va sobre EndgameBoard (misma partida);
+    # los sondeos de Syzygy y la evaluación final usan un chess.Board equivalente
+    fast = policy in (None, rollout_policy) and can_use_fast_board(board, fast_pieces)
+    if policy is None:
+        policy = rollout_policy
 
     if tb is not None and tb.obj is not None:
         wdl = probe_wdl(board, tb.obj)
+        debug_info['tb_probes'] += 1
         if wdl is not None:
             s = wdl_to_score(wdl)
             result = s if board.turn == root_turn else -s
@@ -401,7 +560,14 @@ def simulate(board, max_plies=ROLLOUT_MAX_PLIES, tb=None, root_turn=None) -> tup
             return result, debug_info
 
     plies = 0
-    sim_board = board.copy()
+    if fast:
+        sim_board = EndgameBoard.from_board(board)
+        policy = fast_rollout_policy
+        debug_info['fast_board'] = True
+    else:
+        sim_board = board.copy()
+    as_board = EndgameBoard.to_board if fast else (lambda b: b)
+    debug_info['board_copies'] += 1
     visited_positions = set()
     
     while plies < max_plies:
@@ -410,7 +576,8 @@ def simulate(board, max_plies=ROLLOUT_MAX_PLIES, tb=None, root_turn=None) -> tup
             break
         
         if tb is not None and tb.obj is not None:
-            wdl_mid = probe_wdl(sim_board, tb.obj)
+            wdl_mid = probe_wdl(as_board(sim_board), tb.obj)
+            debug_info['tb_probes'] += 1
             if wdl_mid is not None:
                 s = wdl_to_score(wdl_mid)
                 result = s if sim_board.turn == root_turn else -s
@@ -419,20 +586,20 @@ def simulate(board, max_plies=ROLLOUT_MAX_PLIES, tb=None, root_turn=None) -> tup
                 debug_info['outcome'] = f'TB_mid_{wdl_mid}'
                 return result, debug_info
         
-        pos_key = sim_board.fen().split(' ')[0]
+        pos_key = sim_board.placement_key() if fast else sim_board.fen().split(' ')[0]
         if pos_key in visited_positions:
-            result = evaluate_endgame_position(sim_board, root_turn)
+            result = evaluate_endgame_position(as_board(sim_board), root_turn)
             debug_info['plies'] = plies
             debug_info['outcome'] = 'cycle_detected'
             return result * 0.2, debug_info
         
         visited_positions.add(pos_key)
         
-        mv = rollout_policy(sim_board, visited_positions)
+        mv = policy(sim_board, visited_positions, rng)
         if mv is None:
             break
         
-        debug_info['moves'].append(mv.uci())
+        debug_info['moves'].append(to_move(mv).uci() if fast else mv.uci())
         sim_board.push(mv)
         plies += 1
 
@@ -445,25 +612,485 @@ def simulate(board, max_plies=ROLLOUT_MAX_PLIES, tb=None, root_turn=None) -> tup
         result = 0.0
         debug_info['outcome'] = 'draw'
     else:
-        result = evaluate_endgame_position(sim_board, root_turn)
+        result = evaluate_endgame_position(as_board(sim_board), root_turn)
         debug_info['outcome'] = f'heuristic_{result:.2f}'
     
     return result, debug_info
 
+# --- Interfaz de evaluación de hojas ---
+
+class RolloutPolicy(Protocol):
+    """Política de rollout: elige la siguiente jugada (o None si no hay) para `board`.
+
+    `visited_positions` contiene las claves de posición ya vistas en el rollout
+    actual; la política puede usarlas para evitar ciclos. Toda la aleatoriedad
+    debe salir de `rng` (el generador de la búsqueda). No debe dejar el
+    tablero modificado al retornar.
+    """
+    def __call__(self, board: chess.Board, visited_positions: set,
+                 rng: random.Random | None = None) -> chess.Move | None: ...
+
+class Evaluator(Protocol):
+    """Evaluador de hojas usado por `mcts_search`.
+
+    `evaluate` recibe un lote de tableros (las hojas recién expandidas) y
+    devuelve, en el mismo orden, una tupla `(valor, debug_info)` por tablero.
+    El valor está en la perspectiva de `root_turn` (1 = gana la raíz,
+    -1 = pierde) y `debug_info` es un dict con la misma forma que el de
+    `simulate` (al menos 'phase' y 'outcome'). Los tableros pertenecen al
+    árbol: el evaluador no debe modificarlos. `cfg` es la `SearchConfig`
+    de la búsqueda y `rng` su generador aleatorio propio (no usar el módulo
+    global `random`, para que las búsquedas sean reproducibles).
+    """
+    def evaluate(self, boards: list[chess.Board], root_turn: chess.Color, tb=None,
+                 cfg: SearchConfig = DEFAULT_CONFIG, rng: random.Random | None = None) -> list[tuple[float, dict]]: ...
+
+class RolloutEvaluator:
+    """Evaluador por defecto: un rollout de `simulate` por hoja.
+
+    Si no se fija `max_plies`, se usa `cfg.rollout_max_plies` de la búsqueda.
+    """
+    def __init__(self, policy: RolloutPolicy = rollout_policy, max_plies: int | None = None):
+        self.policy = policy
+        self.max_plies = max_plies
+
+    def evaluate(self, boards, root_turn, tb=None, cfg: SearchConfig = DEFAULT_CONFIG, rng=None):
+        max_plies = self.max_plies if self.max_plies is not None else cfg.rollout_max_plies
+        return [
+            simulate(b, max_plies=max_plies, tb=tb, root_turn=root_turn, policy=self.policy, rng=rng,
+                     fast_pieces=cfg.fast_rollout_pieces)
+            for b in boards
+        ]
+
+def evaluate_cached(evaluator: Evaluator, cache: 'ValueCache', boards, root_turn, tb, cfg: SearchConfig, rng):
+    """`evaluator.evaluate` solo para las hojas sin media fiable en `cache`; el resto toma la media."""
+    keys = [cache.key(b) for b in boards]
+    results: list = [None] * len(boards)
+    pending = []
+    for i, key in enumerate(keys):
+        cached = cache.lookup(key)
+        if cached is None:
+            pending.append(i)
+        else:
+            results[i] = (cached[0], {'phase': 'simulate', 'plies': 0, 'moves': [], 'tb_hit': False,
+                                      'outcome': 'value_cache', 'board_copies': 0, 'tb_probes': 0,
+                                      'value_cache_n': cached[1]})
+    if pending:
+        for i, result in zip(pending, evaluator.evaluate([boards[i] for i in pending], root_turn, tb=tb, cfg=cfg, rng=rng)):
+            cache.add(keys[i], result[0])
+            results[i] = result
+    return results
+
+def derive_seed(seed: int, *keys) -> int:
+    """Semilla independiente y reproducible para el flujo `keys` (p. ej. índice de worker, jugada).
+
+    `derive_seed(s, i)` para i = 0..N-1 da N semillas sin correlación aparente
+    entre sí, iguales en cualquier proceso o plataforma.
+    """
+    h = hashlib.blake2b(repr((seed,) + keys).encode('utf-8'), digest_size=8)
+    return int.from_bytes(h.digest(), 'little') >> 1
+
+def add_virtual_loss(node, sign=1):
+    """Suma (sign=1) o retira (sign=-1) una pérdida virtual en el camino a la raíz: una visita
+    de valor -1 para quien elige cada nodo.
+
+    Baja el Q del camino en vuelo, así la siguiente selección del lote busca otras hojas
+    antes de evaluarlas todas juntas.
+    """
+    cur = node
+    while cur is not None:
+        cur.N += sign
+        cur.W -= sign
+        cur.Q = cur.W / cur.N if cur.N else 0.0
+        cur = cur.parent
+
+# --- Tamaño del árbol y desalojo de subárboles fríos ---
+
+def _deep_sizeof(obj) -> int:
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__) + sum(sys.getsizeof(v) for v in obj.__dict__.values())
+    return size
+
+def node_bytes_model(board: chess.Board) -> tuple[int, int]:
+    """Estimación (bytes base por nodo, bytes por jugada en la pila del tablero).
+
+    Cada nodo guarda un `chess.Board` completo cuya pila crece con la profundidad.
+    """
+    node = Node(board.copy(stack=False))
+    base = _deep_sizeof(node) + _deep_sizeof(node.board) + sys.getsizeof(node.children)
+    per_ply = 0
+    b = board.copy(stack=False)
+    mv = next(iter(b.legal_moves), None)
+    if mv is not None:
+        b.push(mv)
+        per_ply = _deep_sizeof(b.move_stack[-1]) + _deep_sizeof(b._stack[-1]) + 2 * 8
+    return base, per_ply
+
+class TreeSize:
+    """Contador de nodos (y de su profundidad total, para estimar bytes) del árbol."""
+    def __init__(self, root: 'Node'):
+        self.nodes = 1
+        self.sum_depth = 0
+        self.root_plies = len(root.board.move_stack)
+        self.base_bytes, self.ply_bytes = node_bytes_model(root.board)
+        self.evictions = 0
+        self.evicted_nodes = 0
+        self.retry_at = 0   # si un desalojo no alcanza el objetivo, esperar a que el árbol crezca
+
+    def add(self, n: int, depth: int):
+        self.nodes += n
+        self.sum_depth += n * depth
+
+    @property
+    def bytes(self) -> int:
+        return self.nodes * (self.base_bytes + self.root_plies * self.ply_bytes) + self.sum_depth * self.ply_bytes
+
+    def over_limit(self, cfg: SearchConfig) -> bool:
+        if self.nodes < self.retry_at:
+            return False
+        return (cfg.max_nodes is not None and self.nodes > cfg.max_nodes) or \
+               (cfg.max_tree_bytes is not None and self.bytes > cfg.max_tree_bytes)
+
+    def evict(self, root: 'Node', cfg: SearchConfig):
+        """Colapsa los subárboles menos visitados en su nodo raíz (que conserva N, W y Q).
+
+        El nodo colapsado vuelve a ser una hoja y se reexpande si la búsqueda
+        vuelve a pasar por él.
+        """
+        # Recorrido postorden: tamaño y suma de profundidades de cada subárbol
+        order, stack = [], [root]
+        while stack:
+            n = stack.pop()
+            order.append(n)
+            stack.extend(n.children.values())
+        sizes = {}
+        for n in reversed(order):
+            size, depth_sum = 1, n.depth
+            for c in n.children.values():
+                cs, cd = sizes[id(c)]
+                size += cs
+                depth_sum += cd
+            sizes[id(n)] = (size, depth_sum)
+
+        keep = 1 - cfg.evict_fraction
+        target_nodes = cfg.max_nodes * keep if cfg.max_nodes is not None else float('inf')
+        target_bytes = cfg.max_tree_bytes * keep if cfg.max_tree_bytes is not None else float('inf')
+
+        collapsed = set()
+        for n in sorted((n for n in order if n.children and n is not root), key=lambda n: n.N):
+            if self.nodes <= target_nodes and self.bytes <= target_bytes:
+                break
+            anc = n.parent
+            while anc is not None and id(anc) not in collapsed:
+                anc = anc.parent
+            if anc is not None:
+                continue  # ya eliminado con un ancestro
+            size, depth_sum = sizes[id(n)]
+            removed, removed_depth = size - 1, depth_sum - n.depth
+            n.children = {}
+            n.has_mate_child = False
+            n.order = None
+            collapsed.add(id(n))
+            self.nodes -= removed
+            self.sum_depth -= removed_depth
+            self.evicted_nodes += removed
+            # Los ancestros ya no cuentan este subárbol si luego se colapsan ellos
+            anc = n.parent
+            while anc is not None:
+                size, depth_sum = sizes[id(anc)]
+                sizes[id(anc)] = (size - removed, depth_sum - removed_depth)
+                anc = anc.parent
+        self.evictions += 1
+        if self.nodes > target_nodes or self.bytes > target_bytes:
+            self.retry_at = self.nodes + max(1, int(self.nodes * cfg.evict_fraction))
+
+    def as_dict(self) -> dict:
+        return {'tree_nodes': self.nodes, 'tree_bytes_est': self.bytes,
+                'evictions': self.evictions, 'evicted_nodes': self.evicted_nodes}
+
+class ValueCache:
+    """Media y número de evaluaciones de hoja por posición (FIFO acotado a `size` entradas)."""
+    def __init__(self, size: int, min_count: int, symmetric: bool = False):
+        self.size = size
+        self.min_count = min_count
+        self.symmetric = symmetric
+        self.entries: dict = {}   # clave -> [n, media]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, board: chess.Board) -> tuple:
+        return canonical_key(board)[0] if self.symmetric else position_key(board)
+
+    def lookup(self, key: tuple) -> tuple[float, int] | None:
+        """(media, n) si la clave ya tiene `min_count` evaluaciones; si no, None (cuenta como fallo)."""
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] >= self.min_count:
+            self.hits += 1
+            return entry[1], entry[0]
+        self.misses += 1
+        return None
+
+    def add(self, key: tuple, value: float):
+        entry = self.entries.get(key)
+        if entry is None:
+            if len(self.entries) >= self.size:
+                del self.entries[next(iter(self.entries))]
+                self.evictions += 1
+            self.entries[key] = [1, value]
+        else:
+            entry[0] += 1
+            entry[1] += (value - entry[1]) / entry[0]
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'value_cache_hits': self.hits, 'value_cache_misses': self.misses,
+                'value_cache_hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'value_cache_entries': len(self.entries), 'value_cache_evictions': self.evictions}
+
+class SearchStats:
+    """Contadores de rendimiento de una búsqueda (tiempos por fase, plies, copias, TB)."""
+    PHASES = ('select', 'expand', 'simulate', 'backprop')
+
+    def __init__(self, cfg: SearchConfig):
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+        self.rollout_plies = 0
+        self.board_copies = 0
+        self.tb_probes = 0
+        self.tb_hits = 0
+        self.peak_depth = 0
+        self.start = time.perf_counter()
+        self.track_memory = cfg.track_memory
+        self._stop_tracemalloc = False
+        if self.track_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                self._stop_tracemalloc = True
+
+    def add_expand(self, info: dict, depth: int):
+        self.board_copies += info.get('board_copies', 0)
+        self.tb_probes += info.get('tb_probes', 0)
+        self.tb_hits += info.get('tb_hits', 0)
+        self.peak_depth = max(self.peak_depth, depth)
+
+    def add_simulate(self, info: dict):
+        self.rollout_plies += info.get('plies', 0)
+        self.board_copies += info.get('board_copies', 0)
+        self.tb_probes += info.get('tb_probes', 0)
+        self.tb_hits += bool(info.get('tb_hit'))
+
+    def as_dict(self, iters: int, tree: 'TreeSize') -> dict:
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        perf = {f'time_{k}': round(v, 4) for k, v in self.times.items()}
+        perf.update({
+            'time_total': round(elapsed, 4),
+            'iters_per_sec': round(iters / elapsed, 1),
+            'nodes_per_sec': round(tree.nodes / elapsed, 1),
+            'rollout_plies': self.rollout_plies,
+            'rollout_plies_per_sec': round(self.rollout_plies / max(self.times['simulate'], 1e-9), 1),
+            'board_copies': self.board_copies,
+            'tb_probes': self.tb_probes,
+            'tb_hits': self.tb_hits,
+            'tb_hit_rate': round(self.tb_hits / self.tb_probes, 4) if self.tb_probes else None,
+            'peak_depth': self.peak_depth,
+        })
+        if self.track_memory:
+            perf['tracemalloc_peak'] = tracemalloc.get_traced_memory()[1]
+            if self._stop_tracemalloc:
+                tracemalloc.stop()
+                self._stop_tracemalloc = False
+        return perf
+
+class RootTracker:
+    """Mejor y segunda jugada de la raíz por visitas, mantenidas de forma incremental."""
+    def __init__(self, root: 'Node'):
+        self.root = root
+        self.best: Node | None = None
+        self.second: Node | None = None
+        self.mate: Node | None = None
+
+    def root_child(self, node: 'Node') -> 'Node | None':
+        cur = node
+        while cur is not None and cur.parent is not self.root:
+            cur = cur.parent
+        return cur
+
+    def update(self, node: 'Node'):
+        """Registra que el hijo de la raíz en el camino de `node` cambió sus visitas."""
+        c = self.root_child(node)
+        if c is None:
+            return
+        if c.is_mate and (self.mate is None or c.mate_in_n < self.mate.mate_in_n):
+            self.mate = c
+        if c is self.best:
+            return
+        if self.best is None or c.N > self.best.N:
+            self.second, self.best = self.best, c
+        elif self.second is None or c is self.second or c.N > self.second.N:
+            self.second = c
+
+    def gap(self, cfg: SearchConfig) -> float:
+        """Visitas que le faltan a cualquier otra jugada para alcanzar a la mejor.
+
+        Las jugadas aún sin expandir pueden entrar con hasta 2·prior_n visitas.
+        """
+        if self.best is None:
+            return 0
+        second_N = self.second.N if self.second is not None else 0
+        if not self.root.is_fully_expanded():
+            second_N = max(second_N, cfg.prior_n * 2)
+        elif self.second is None:
+            return float('inf')  # una sola jugada legal
+        return self.best.N - second_N
+
+    def is_close(self, cfg: SearchConfig) -> bool:
+        return self.best is not None and self.second is not None and \
+               self.second.N >= cfg.tm_close_ratio * self.best.N
+
+class SequentialHalving:
+    """
+    Política de raíz por sequential halving (como en Gumbel MuZero, sin ruido).
+
+    Las `cfg.sh_candidates` mejores jugadas según `move_priority` se expanden
+    de entrada; el presupuesto se divide en ceil(log2(m)) fases iguales, en
+    cada fase se visitan los candidatos vivos por turnos y al final se descarta
+    la peor mitad por su valor medio real (sin el prior de jaque/Syzygy, que
+    con pocas visitas domina a Q). Con `max_iters` las fases se miden en iteraciones;
+    si no, en tiempo. Por debajo de la raíz la selección sigue siendo UCT.
+    """
+    def __init__(self, root: 'Node', tb, root_turn, cfg: SearchConfig, rng: random.Random,
+                 max_iters: int | None, start: float, end: float):
+        keyed = [(move_priority(root.board, mv), rng.random(), mv) for mv in root.board.legal_moves]
+        keyed.sort(key=lambda x: (x[0], x[1]), reverse=True)
+        self.expand_info = {'board_copies': 0, 'tb_probes': 0, 'tb_hits': 0}
+        self.alive = [make_child(root, mv, tb, root_turn, cfg, self.expand_info)
+                      for _, _, mv in keyed[:max(1, cfg.sh_candidates)]]
+        self.n_phases = max(1, math.ceil(math.log2(len(self.alive)))) if len(self.alive) > 1 else 1
+        self.phase = 0
+        self.max_iters = max_iters
+        self.start = start
+        self.end = end
+        self._turn = 0
+
+    def _phase_over(self, iters: int, now: float) -> bool:
+        if self.phase >= self.n_phases - 1:
+            return False   # la última fase dura hasta el final del presupuesto
+        frac = (self.phase + 1) / self.n_phases
+        if self.max_iters is not None:
+            return iters >= self.max_iters * frac
+        return now >= self.start + (self.end - self.start) * frac
+
+    def next_child(self, iters: int, now: float) -> 'Node':
+        """Hijo de la raíz por el que debe pasar la siguiente iteración."""
+        while self._phase_over(iters, now):
+            self.alive.sort(key=self.value, reverse=True)
+            self.alive = self.alive[:max(1, math.ceil(len(self.alive) / 2))]
+            self.phase += 1
+            self._turn = 0
+        child = self.alive[self._turn % len(self.alive)]
+        self._turn += 1
+        return child
+
+    @staticmethod
+    def value(child: 'Node') -> tuple:
+        return (child.W_real / child.n_real if child.n_real else child.Q, child.N)
+
+    def best(self) -> 'Node':
+        return max(self.alive, key=self.value)
+
+def final_move_scores(root: 'Node') -> dict:
+    """Puntuación de la selección final sin mates: visitas + bonus por Q si el hijo está explorado."""
+    return {
+        move: child.N + (child.Q * 200 if child.N > root.N * 0.03 else 0)
+        for move, child in root.children.items()
+    }
+
 def backpropagate(node, value):
+    """Suma `value` (perspectiva de la raíz) en el camino hasta la raíz.
+
+    Cada nodo acumula desde la perspectiva del bando que jugó la jugada que
+    lleva a él (profundidad impar = la raíz), que es la que maximiza `select`.
+    """
     cur = node
-    sign = 1
-    
     while cur is not None:
         cur.N += 1
-        cur.W += value * sign
+        v = value if cur.depth % 2 == 1 else -value
+        cur.W += v
         cur.Q = cur.W / cur.N
-        sign *= -1
+        cur.n_real += 1
+        cur.W_real += v
+        cur.S += v * v
+        cur = cur.parent
+
+def update_minimax(node):
+    """Implicit minimax: recalcula `h` de los ancestros de `node` por negamax sobre
+    los hijos expandidos, hasta el primero cuyo valor no cambia."""
+    cur = node.parent
+    while cur is not None:
+        best = max((c.h for c in cur.children.values() if c.h is not None), default=None)
+        if best is None or cur.h == -best:
+            break
+        cur.h = -best
         cur = cur.parent
 
-def mcts_search(root_board, time_limit=1.0, seed=None, tb=None, debug_callback=None):
-    if seed is not None:
-        random.seed(seed)
+def update_amaf(node, value, rollout_moves=()):
+    """RAVE: acredita `value` (perspectiva de la raíz) a todas las jugadas posteriores de cada bando.
+
+    Para cada nodo del camino, las jugadas que hizo el bando al mover en ese
+    nodo más abajo (en el árbol o en el rollout) cuentan como si se hubieran
+    jugado primero; solo cuenta la primera aparición de cada jugada.
+    """
+    path = []
+    cur = node
+    while cur is not None:
+        path.append(cur)
+        cur = cur.parent
+    path.reverse()
+    moves = [n.move for n in path[1:]] + [chess.Move.from_uci(u) for u in rollout_moves]
+
+    for d, n in enumerate(path):
+        if n.amaf is None:
+            n.amaf = {}
+        v = value if n.depth % 2 == 0 else -value   # perspectiva del bando al mover en n
+        seen = set()
+        for mv in moves[d::2]:
+            if mv in seen:
+                continue
+            seen.add(mv)
+            stats = n.amaf.get(mv)
+            if stats is None:
+                n.amaf[mv] = [1, v]
+            else:
+                stats[0] += 1
+                stats[1] += v
+
+def mcts_search(root_board, time_limit=1.0, seed=None, tb=None, debug_callback=None,
+                evaluator: Evaluator | None = None, batch_size: int = 1,
+                config: SearchConfig | None = None, max_iters: int | None = None):
+    """Busca la mejor jugada para `root_board` en `time_limit` segundos.
+
+    La búsqueda usa su propio `random.Random(seed)` (no toca el `random`
+    global), así que varias búsquedas en hilos o procesos no se interfieren.
+    Con `max_iters` (y `time_limit=None`) el presupuesto es fijo en
+    iteraciones: misma semilla y mismo presupuesto dan el mismo árbol.
+
+    `evaluator` sustituye a los rollouts de `simulate` (ver `Evaluator`);
+    con `batch_size > 1` se seleccionan varias hojas por iteración, usando
+    pérdida virtual para diversificarlas, y se evalúan en una sola llamada.
+    `config` fija los parámetros de la búsqueda (por defecto `SearchConfig()`)
+    y se devuelve en `stats['config']`.
+    """
+    cfg = config if config is not None else DEFAULT_CONFIG
+    if evaluator is None:
+        evaluator = RolloutEvaluator()
+    batch_size = max(1, int(batch_size))
+
+    if time_limit is None and max_iters is None:
+        raise ValueError("mcts_search necesita time_limit o max_iters")
+    rng = random.Random(seed)
     
     root = Node(root_board.copy())
     root_turn = root_board.turn
@@ -486,6 +1113,7 @@ def mcts_search(root_board, time_limit=1.0, seed=None, tb=None, debug_callback=N
             'best_Q': 10000.0,
             'mate_found': True,
             'immediate_mate': True,
+            'config': cfg.as_dict(),
             'mate_in_n': 1,
             'all_moves': {
                 m.uci(): {
@@ -499,58 +1127,148 @@ def mcts_search(root_board, time_limit=1.0, seed=None, tb=None, debug_callback=N
             }
         }
         return best_mate, stats
+
+    # Mate forzado probado por proof-number search
+    pns_info = None
+    if cfg.pns_nodes > 0:
+        proof = pn_search(root_board, max_mate_in=cfg.pns_mate_in, max_nodes=cfg.pns_nodes,
+                          time_limit=time_limit * cfg.pns_time_fraction if time_limit is not None else None)
+        pns_info = {k: proof[k] for k in ('status', 'mate_in', 'nodes', 'time')}
+        if proof['status'] == 'proven':
+            stats = {
+                'iters': 0,
+                'root_N': 0,
+                'best_visits': 0,
+                'best_Q': 10000.0,
+                'mate_found': True,
+                'pns_proof': True,
+                'mate_in_n': proof['mate_in'],
+                'pv': proof['line'],
+                'pns': pns_info,
+                'config': cfg.as_dict(),
+                'all_moves': {proof['move'].uci(): {'N': 0, 'Q': 10000.0, 'W': 0, 'is_mate': True,
+                                                    'mate_in_n': proof['mate_in']}}
+            }
+            return proof['move'], stats
+        if time_limit is not None:
+            time_limit = max(0.05, time_limit - proof['time'])
     
     # Búsqueda MCTS normal
-    end = time.time() + max(0.05, time_limit)
+    start = time.time()
+    end = start + max(0.05, time_limit) if time_limit is not None else float('inf')
     iters = 0
+    tracker = RootTracker(root)
+    tree = TreeSize(root)
+    perf = SearchStats(cfg)
+    value_cache = (ValueCache(cfg.value_cache_size, cfg.value_cache_min_count, cfg.value_cache_symmetric)
+                   if cfg.value_cache_size > 0 else None)
+    halving = None
+    # Sin jugadas legales (mate o ahogado en la raíz) no hay candidatos que dividir
+    if cfg.root_policy == 'sequential_halving' and any(root.board.legal_moves):
+        halving = SequentialHalving(root, tb, root_turn, cfg, rng, max_iters, start, end)
+        tree.add(len(root.children), 1)
+        perf.add_expand(halving.expand_info, 1)
+    stop_reason = 'time' if time_limit is not None else 'iters'
+    extended = False
+
+    while True:
+        now = time.time()
+        if max_iters is not None and iters >= max_iters:
+            stop_reason = 'iters'
+            break
+        if now >= end:
+            # Extensión: si las dos mejores están parejas, una sola vez
+            if cfg.time_management and halving is None and not extended and cfg.tm_extend > 0 and tracker.is_close(cfg):
+                end = now + time_limit * cfg.tm_extend
+                extended = True
+            else:
+                stop_reason = 'time'
+                break
 
-    while time.time() < end:
-        iter_debug = {'iteration': iters + 1}
-        
-        leaf, select_path = select(root)
-        iter_debug['select_path'] = select_path
-        
-        child, expand_info = expand(leaf, tb=tb, root_turn=root_turn)
-        iter_debug['expand'] = expand_info
-        
-        value, sim_info = simulate(child.board.copy(), tb=tb, root_turn=root_turn)
-        iter_debug['simulate'] = sim_info
-        iter_debug['value'] = round(value, 3)
-        
-        backpropagate(child, value)
-        iter_debug['backprop_node'] = child.move.uci() if child.move else 'root'
-        
-        iters += 1
-        
-        if debug_callback:
-            debug_callback(iters, iter_debug)
-        
         # Early exit si encontramos mate
-        if iters > 20:
-            for move, child in root.children.items():
-                if child.is_mate and child.N > 5:
-                    stats = {
-                        'iters': iters,
-                        'root_N': root.N,
-                        'best_visits': child.N,
-                        'best_Q': round(child.Q, 3),
-                        'mate_found': True,
-                        'mate_in_n': child.mate_in_n,
-                        'all_moves': {
-                            m.uci(): {
-                                'N': c.N, 
-                                'Q': round(c.Q, 3), 
-                                'W': round(c.W, 2),
-                                'is_mate': c.is_mate,
-                                'mate_in_n': c.mate_in_n if c.is_mate else None
-                            }
-                            for m, c in sorted(root.children.items(), key=lambda x: x[1].N, reverse=True)
-                        }
-                    }
-                    return move, stats
-    
+        if iters > 20 and tracker.mate is not None and tracker.mate.N > 5:
+            stop_reason = 'mate'
+            break
+
+        # Parada temprana: la más visitada ya no puede ser alcanzada
+        if cfg.time_management and halving is None and iters >= cfg.tm_min_iters:
+            if max_iters is not None:
+                remaining = max_iters - iters
+            else:
+                remaining = iters / max(now - start, 1e-9) * (end - now)
+            if tracker.gap(cfg) > remaining:
+                best_by_score = max(final_move_scores(root).items(), key=lambda x: x[1])[0]
+                if root.children[best_by_score] is tracker.best:
+                    stop_reason = 'stable'
+                    break
+
+        batch = []
+        for _ in range(batch_size if max_iters is None else min(batch_size, max_iters - iters)):
+            iter_debug = {'iteration': iters + len(batch) + 1}
+
+            t0 = time.perf_counter()
+            if halving is not None:
+                leaf, select_path = select(halving.next_child(iters + len(batch), time.time()), cfg)
+            else:
+                leaf, select_path = select(root, cfg)
+            iter_debug['select_path'] = select_path
+
+            t1 = time.perf_counter()
+            n_children = len(leaf.children)
+            child, expand_info = expand(leaf, tb=tb, root_turn=root_turn, cfg=cfg)
+            tree.add(len(leaf.children) - n_children, leaf.depth + 1)
+            iter_debug['expand'] = expand_info
+            t2 = time.perf_counter()
+            perf.times['select'] += t1 - t0
+            perf.times['expand'] += t2 - t1
+            perf.add_expand(expand_info, child.depth)
+
+            if batch_size > 1:
+                add_virtual_loss(child)
+            batch.append((child, iter_debug))
+
+        t0 = time.perf_counter()
+        if value_cache is None:
+            results = evaluator.evaluate([child.board for child, _ in batch], root_turn, tb=tb, cfg=cfg, rng=rng)
+        else:
+            results = evaluate_cached(evaluator, value_cache, [child.board for child, _ in batch], root_turn, tb, cfg, rng)
+        perf.times['simulate'] += time.perf_counter() - t0
+
+        for (child, iter_debug), (value, sim_info) in zip(batch, results):
+            if batch_size > 1:
+                add_virtual_loss(child, -1)
+            iter_debug['simulate'] = sim_info
+            iter_debug['value'] = round(value, 3)
+            perf.add_simulate(sim_info)
+
+            t0 = time.perf_counter()
+            backpropagate(child, value)
+            if cfg.implicit_minimax:
+                update_minimax(child)
+            if cfg.rave:
+                update_amaf(child, value, sim_info.get('moves', ()))
+            tracker.update(child)
+            perf.times['backprop'] += time.perf_counter() - t0
+            iter_debug['backprop_node'] = child.move.uci() if child.move else 'root'
+
+            iters += 1
+
+            if debug_callback:
+                debug_callback(iters, iter_debug)
+
+        if tree.over_limit(cfg):
+            tree.evict(root, cfg)
+
+    perf_info = perf.as_dict(iters, tree)
     if not root.children:
-        return None, {'iters': iters, 'root_N': root.N}
+        return None, {'iters': iters, 'root_N': root.N, 'config': cfg.as_dict(), 'perf': perf_info}
+
+    search_info = {'stop_reason': stop_reason, 'extended': extended, 'time_used': round(time.time() - start, 4),
+                   **tree.as_dict(), 'perf': perf_info}
+    if value_cache is not None:
+        search_info['value_cache'] = value_cache.as_dict()
+    if pns_info is not None:
+        search_info['pns'] = pns_info
     
     # SELECCIÓN FINAL: Prioridad absoluta a mates
     mate_moves = [(move, child) for move, child in root.children.items() if child.is_mate]
@@ -564,6 +1282,8 @@ def mcts_search(root_board, time_limit=1.0, seed=None, tb=None, debug_callback=N
             'best_Q': round(best_mate_child.Q, 3),
             'mate_found': True,
             'mate_in_n': best_mate_child.mate_in_n,
+            **search_info,
+            'config': cfg.as_dict(),
             'all_moves': {
                 m.uci(): {
                     'N': c.N, 
@@ -578,12 +1298,13 @@ def mcts_search(root_board, time_limit=1.0, seed=None, tb=None, debug_callback=N
         return best_mate_move, stats
     
     # Si no hay mate, mejor por visitas
-    move_scores = {}
-    for move, child in root.children.items():
-        score = child.N + (child.Q * 200 if child.N > root.N * 0.03 else 0)
-        move_scores[move] = (score, child)
-    
-    best_move = max(move_scores.items(), key=lambda x: x[1][0])[0]
+    move_scores = {move: (score, root.children[move]) for move, score in final_move_scores(root).items()}
+
+    if halving is not None:
+        best_move = halving.best().move
+        search_info['sh_alive'] = [c.move.uci() for c in halving.alive]
+    else:
+        best_move = max(move_scores.items(), key=lambda x: x[1][0])[0]
     best_child = root.children[best_move]
     
     stats = {
@@ -592,13 +1313,16 @@ def mcts_search(root_board, time_limit=1.0, seed=None, tb=None, debug_callback=N
         'best_visits': best_child.N,
         'best_Q': round(best_child.Q, 3),
         'mate_found': False,
+        **search_info,
+        'config': cfg.as_dict(),
         'all_moves': {
             move.uci(): {
                 'N': child.N, 
                 'Q': round(child.Q, 3), 
                 'W': round(child.W, 2),
                 'score': round(move_scores[move][0], 2),
-                'is_mate': child.is_mate
+                'is_mate': child.is_mate,
+                **({'h': round(child.h, 3)} if child.h is not None else {})
             }
             for move, child in sorted(root.children.items(), key=lambda x: x[1].N, reverse=True)
         }
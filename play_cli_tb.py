@@ -2,6 +2,7 @@
 import argparse, json, os, time
 from datetime import datetime
 import chess
+from profiling import SamplingProfiler
 from mcts_core_anterior import mcts_search
 from tb_utils import TBLite, probe_wdl, probe_dtz, best_moves_by_tb, wdl_to_score
 
@@ -41,6 +42,7 @@ def main():
     parser.add_argument("--you-play", choices=["white","black"], default="white", help="Tu color")
     parser.add_argument("--syzygy-dir", type=str, default=None, help="Ruta a tablebases Syzygy (3–5 piezas)")
     parser.add_argument("--seed", type=int, default=42, help="Semilla")
+    parser.add_argument("--profile", action="store_true", help="Perfil de muestreo de las búsquedas del bot (logs/*.speedscope.json)")
     args = parser.parse_args()
 
     board = chess.Board(args.fen) if args.fen else chess.Board()
@@ -52,6 +54,7 @@ def main():
 
     os.makedirs("logs", exist_ok=True)
     log_path = os.path.join("logs", f"game_tb_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    profiler = SamplingProfiler() if args.profile else None
     def log(ev):
         with open(log_path, "a", encoding="utf-8") as f:
             f.write(json.dumps(ev, ensure_ascii=False) + "\n")
@@ -89,7 +92,9 @@ def main():
                 log({"type":"human_move","uci":mv.uci(),"san":san,"fen":board.fen(),"tb_eval":evalm})
             else:
                 t0 = time.time()
+                if profiler: profiler.start()
                 best, stats = mcts_search(board, time_limit=args.mcts_time, seed=args.seed, tb=tb)
+                if profiler: profiler.stop()
                 if best is None:
                     print("MCTS no encontró jugada."); break
                 evalm = eval_move(board, best, tb)
@@ -104,6 +109,9 @@ def main():
         res = board.result(claim_draw=True)
         print("Resultado:", res)
         log({"type":"final","result":res,"final_fen":board.fen()})
+        if profiler and profiler.total_samples:
+            paths = profiler.save(os.path.splitext(log_path)[0], os.path.basename(log_path))
+            print("Perfil:", ", ".join(paths))
 
 if __name__ == "__main__":
     main()
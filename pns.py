@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Proof-number search (Allis) para posiciones de mate forzado.
+
+Responde "¿el bando al mover da mate en <= max_mate_in jugadas contra
+cualquier defensa?" y, si es así, devuelve la línea de mate. Con
+`shortest=True` se profundiza el horizonte de 1 a max_mate_in jugadas, así
+que el primer mate probado es el más corto (PNS por sí solo no lo garantiza):
+- nodos OR (mueve el atacante) y AND (mueve el defensor) con números de
+  prueba/refutación inicializados por movilidad;
+- más allá del horizonte de max_mate_in jugadas la línea cuenta como
+  refutada, igual que ahogado, regla de 50 jugadas o material insuficiente
+  del atacante. Las repeticiones no se tratan aparte (el horizonte ya acota
+  las líneas), así las refutaciones no dependen del camino y la TT es exacta;
+- tabla de transposición de posiciones refutadas (con los plies que
+  quedaban), que se conserva entre búsquedas del mismo `ProofNumberSearch`;
+- presupuestos de nodos y de tiempo: si se agotan, el resultado es 'unproven'.
+
+Se usa un solo tablero: cada iteración baja desde la raíz con push hasta el
+nodo más prometedor, lo expande y vuelve con pop actualizando los números.
+
+Uso:
+    from pns import pn_search
+    res = pn_search(board, max_mate_in=3, max_nodes=50_000)
+    res['status'], res['line'], res['mate_in']
+"""
+
+from __future__ import annotations
+
+import time
+
+import chess
+
+from symmetry import position_key
+
+INF = 10 ** 9
+
+class PNNode:
+    __slots__ = ('move', 'parent', 'children', 'is_or', 'pn', 'dn')
+
+    def __init__(self, move: chess.Move | None, parent: 'PNNode | None', is_or: bool):
+        self.move = move
+        self.parent = parent
+        self.children: list[PNNode] = []
+        self.is_or = is_or
+        self.pn = 1
+        self.dn = 1
+
+    def update(self):
+        if self.is_or:
+            self.pn = min(c.pn for c in self.children)
+            self.dn = min(INF, sum(c.dn for c in self.children))
+        else:
+            self.pn = min(INF, sum(c.pn for c in self.children))
+            self.dn = min(c.dn for c in self.children)
+
+class ProofNumberSearch:
+    def __init__(self, max_mate_in: int = 5, max_nodes: int = 100_000, time_limit: float | None = None,
+                 tt_size: int = 200_000, shortest: bool = True):
+        self.max_mate_in = max_mate_in
+        self.shortest = shortest
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.tt_size = tt_size
+        self.tt: dict = {}   # (atacante, position_key) -> máximos plies restantes con los que se refutó
+        self.tt_hits = 0
+
+    def search(self, root_board: chess.Board) -> dict:
+        """'proven' (con la línea de mate), 'disproven' (no hay mate en <= max_mate_in) o 'unproven' (sin presupuesto)."""
+        start = time.perf_counter()
+        deadline = start + self.time_limit if self.time_limit is not None else float('inf')
+        board = root_board.copy(stack=False)
+        self.attacker = board.turn
+        nodes = 0
+        for mate_in in range(1, self.max_mate_in + 1) if self.shortest else [self.max_mate_in]:
+            root, used = self._prove(board, mate_in, self.max_nodes - nodes, deadline)
+            nodes += used
+            if root.pn == 0 or root.dn != 0:
+                break   # probado, o sin presupuesto; refutado a esta profundidad: seguir
+
+        status = 'proven' if root.pn == 0 else 'disproven' if root.dn == 0 else 'unproven'
+        line = self._proof_line(root) if status == 'proven' else []
+        return {
+            'status': status,
+            'move': chess.Move.from_uci(line[0]) if line else None,
+            'line': line,
+            'mate_in': (len(line) + 1) // 2 if line else None,
+            'nodes': nodes,
+            'tt_hits': self.tt_hits,
+            'time': round(time.perf_counter() - start, 4),
+        }
+
+    def _prove(self, board: chess.Board, mate_in: int, max_nodes: int, deadline: float) -> tuple[PNNode, int]:
+        """PNS con horizonte de `mate_in` jugadas; devuelve la raíz y los nodos creados."""
+        self.max_plies = 2 * mate_in - 1
+        root = PNNode(None, None, True)
+        self._init(root, board, 0)
+        nodes = 1
+
+        while root.pn and root.dn:
+            if nodes >= max_nodes or time.perf_counter() >= deadline:
+                break
+            # Bajar al nodo más prometedor (OR: menor pn; AND: menor dn)
+            node, ply = root, 0
+            while node.children:
+                node = min(node.children, key=(lambda c: c.pn) if node.is_or else (lambda c: c.dn))
+                board.push(node.move)
+                ply += 1
+
+            for mv in board.legal_moves:
+                board.push(mv)
+                child = PNNode(mv, node, board.turn == self.attacker)
+                self._init(child, board, ply + 1)
+                board.pop()
+                node.children.append(child)
+            nodes += len(node.children)
+
+            # Subir actualizando; los nodos refutados se podan y van a la TT
+            cur = node
+            while cur is not None:
+                cur.update()
+                if cur.dn == 0:
+                    self._store((self.attacker, position_key(board)), self.max_plies - ply)
+                    cur.children = []
+                if cur.parent is not None:
+                    board.pop()
+                    ply -= 1
+                cur = cur.parent
+        return root, nodes
+
+    def _init(self, node: PNNode, board: chess.Board, ply: int):
+        """Números iniciales de un nodo recién creado (`board` está en su posición)."""
+        if board.is_checkmate():
+            node.pn, node.dn = (INF, 0) if board.turn == self.attacker else (0, INF)
+            return
+        if (ply >= self.max_plies or board.is_stalemate() or board.halfmove_clock >= 100
+                or board.has_insufficient_material(self.attacker)):
+            node.pn, node.dn = INF, 0
+            return
+        if self.tt.get((self.attacker, position_key(board)), -1) >= self.max_plies - ply:
+            self.tt_hits += 1
+            node.pn, node.dn = INF, 0
+            return
+        n = board.legal_moves.count()
+        node.pn, node.dn = (1, n) if node.is_or else (n, 1)
+
+    def _store(self, key, remaining: int):
+        if key not in self.tt and len(self.tt) >= self.tt_size:
+            del self.tt[next(iter(self.tt))]   # FIFO: la entrada más antigua
+        self.tt[key] = max(remaining, self.tt.get(key, -1))
+
+    def _proof_line(self, root: PNNode) -> list[str]:
+        """Línea principal del árbol de prueba: mate más corto para el atacante, defensa más larga."""
+        lengths = {}
+
+        def plies_to_mate(node: PNNode) -> int:
+            if id(node) not in lengths:
+                if not node.children:
+                    lengths[id(node)] = 0
+                elif node.is_or:
+                    lengths[id(node)] = 1 + min(plies_to_mate(c) for c in node.children if c.pn == 0)
+                else:
+                    lengths[id(node)] = 1 + max(plies_to_mate(c) for c in node.children)
+            return lengths[id(node)]
+
+        line, node = [], root
+        while node.children:
+            if node.is_or:
+                node = min((c for c in node.children if c.pn == 0), key=plies_to_mate)
+            else:
+                node = max(node.children, key=plies_to_mate)
+            line.append(node.move.uci())
+        return line
+
+def pn_search(board: chess.Board, max_mate_in: int = 5, max_nodes: int = 100_000,
+              time_limit: float | None = None, shortest: bool = True) -> dict:
+    """Atajo: una búsqueda con una `ProofNumberSearch` nueva. Ver `ProofNumberSearch.search`."""
+    return ProofNumberSearch(max_mate_in, max_nodes, time_limit, shortest=shortest).search(board)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Bancos de posiciones compartidos por los reportes, benchmarks y generadores de datos.
+"""
+
+import chess
+
+# --- Bancos de posiciones extendido ---
+# Incluye mates en 1, mates en 2, mates en 3 y posiciones con tablebase relevantes.
+TEST_POSITIONS = {
+    "Mate en 1 - Dama esquina": {"fen": "7k/6Q1/6K1/8/8/8/8/8 w - - 0 1", "expected_mate_in": 1},
+    "Mate en 1 - Torre séptima": {"fen": "6k1/5R2/6K1/8/8/8/8/8 w - - 0 1", "expected_mate_in": 1},
+    "Mate en 1 - Dama lateral": {"fen": "7k/8/6KQ/8/8/8/8/8 w - - 0 1", "expected_mate_in": 1},
+    "Mate en 1 - Torre banda": {"fen": "k7/8/1K6/8/8/8/8/R7 w - - 0 1", "expected_mate_in": 1},
+    "Mate en 1 - Dos torres": {"fen": "k7/8/1K6/8/8/8/R7/R7 w - - 0 1", "expected_mate_in": 1},
+
+    # Mate en 2 (ejemplos simples)
+    "Mate en 2 - Basic 1": {"fen": "8/8/8/8/8/4K3/5Q2/6k1 w - - 0 1", "expected_mate_in": 2},
+    "Mate en 2 - R vs K": {"fen": "8/8/8/8/8/4K3/5R2/6k1 w - - 0 1", "expected_mate_in": 2},
+
+    # Mate en 3 (un par de casos)
+    "Mate en 3 - ejemplo": {"fen": "8/8/8/8/8/3K4/2Q5/6k1 w - - 0 1", "expected_mate_in": 3},
+
+    # Posiciones con oportunidad de promoción
+    "Promotion tactic": {"fen": "8/P7/8/8/8/6K1/6P1/6k1 w - - 0 1", "expected_mate_in": None},
+
+    # Posición compleja (más piezas)
+    "Complex mid-endgame": {"fen": "r4rk1/1pp1qppp/p1np1n2/4p3/2P1P3/1PN2N2/PB1Q1PPP/R3R1K1 w - - 0 1", "expected_mate_in": None},
+    
+    # Endgames famosos y factibles (10 nuevos)
+    "King and Queen vs King (WTM)": {"fen": "k7/8/K7/Q7/8/8/8/8 w - - 0 1", "expected_mate_in": 10}, # DTM (Depth To Mate) es más largo, pero el MCTS debería ganar.
+    "King and Rook vs King (WTM)": {"fen": "k7/8/K7/R7/8/8/8/8 w - - 0 1", "expected_mate_in": 16}, # DTM, el MCTS debería progresar
+    "Two Rooks vs King": {"fen": "k7/8/K7/R7/8/8/8/R7 w - - 0 1", "expected_mate_in": 3},
+    "King and Pawn endgame 1": {"fen": "8/8/5P2/4K3/8/8/8/k7 w - - 0 1", "expected_mate_in": None}, # Simple promotion
+    "King and Pawn endgame 2 (Opposition)": {"fen": "8/8/8/4k3/4K3/8/6P1/8 w - - 0 1", "expected_mate_in": None}, # White wins by pushing pawn
+    "Lucena Position": {"fen": "1K6/8/8/R7/8/8/7k/5Q2 w - - 0 1", "expected_mate_in": None}, # Lucena is R vs P
+    "Philidor Position (Rook)": {"fen": "8/8/8/8/3R4/8/3P4/k3K3 w - - 0 1", "expected_mate_in": None}, # R vs P, simple win
+    "Bishop and Knight vs King (starting)": {"fen": "8/8/8/8/8/5B2/3N4/k3K3 w - - 0 1", "expected_mate_in": 33}, # DTM, but for MCTS it's complex, aiming for progression.
+    "Rook vs Pawn on 7th (Rook behind)": {"fen": "8/P7/8/8/8/3R4/8/1k6 w - - 0 1", "expected_mate_in": None}, # White must win
+    "Simple Passed Pawn": {"fen": "8/8/8/8/4k3/6K1/8/8 b - - 0 1", "expected_mate_in": None}, # King and Pawn vs King (Black to play, White wins if G2, so change to e4/g3)
+    "Simple Passed Pawn 2": {"fen": "8/8/8/8/3K4/6P1/8/5k2 w - - 0 1", "expected_mate_in": None}, # White wins
+}
+
+# Más posiciones para diversify pruebas (stalemates y checks)
+EXTRA_POSITIONS = {
+    "Stalemate trap": {"fen": "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", "expected_mate_in": None},
+}
+
+TEST_POSITIONS.update(EXTRA_POSITIONS)
+
+# Endgames famosos con soluciones teóricas
+FAMOUS_ENDGAMES = {
+    "Mate de pasillo (negras ganan)": {
+        "fen": "1Q6/p1p2rk1/5q2/2pp2pp/6b1/1PPBR3/P4PPP/RN5K b - - 0 1",
+        "theoretical_moves": ["f6f1", "h1g2", "f1f2"],  # Ejemplo simplificado
+        "description": "Las negras tienen ventaja material decisiva",
+        "difficulty": "Fácil",
+        "expected_moves": 3
+    },
+    "Rey y Dama vs Rey": {
+        "fen": "7k/5Q2/6K1/8/8/8/8/8 w - - 0 1",
+        "theoretical_moves": ["f7f8"],  # Mate en 1
+        "description": "Mate básico con dama - mate en 1",
+        "difficulty": "Muy Fácil",
+        "expected_moves": 1
+    },
+    "Rey y Torre vs Rey": {
+        "fen": "8/8/8/8/8/7R/3K4/k7 w - - 0 1",
+        "theoretical_moves": ["h3a3", "a1b1", "a3a1"],  # Mate en 2
+        "description": "Mate básico con torre - escalera hacia la banda",
+        "difficulty": "Fácil",
+        "expected_moves": 3
+    },
+    "La posición de Lucena": {
+        "fen": "4K3/1k2P3/8/8/8/8/6R1/5r2 w - - 0 1", 
+        "theoretical_moves": [],  # Mate en 2
+        "description": "Construir el puente",
+        "difficulty": "Fácil",
+        "expected_moves": 3
+    },
+
+    "Rey y 2 Torres vs Rey": {
+        "fen": "8/8/8/8/8/6RR/3K4/k7 w - - 0 1",
+        "theoretical_moves": ["g3a3"],  # Mate en 1
+        "description": "Mate rápido con dos torres",
+        "difficulty": "Muy Fácil",
+        "expected_moves": 1
+    },
+    "Rey y Alfil + Caballo vs Rey": {
+        "fen": "8/8/8/8/8/5BN1/3K4/k7 w - - 0 1",
+        "theoretical_moves": ["g3e2", "a1b1", "f3e4", "b1c1", "e2c3"],
+        "description": "Uno de los mates más difíciles - requiere coordinación perfecta",
+        "difficulty": "Muy Difícil",
+        "expected_moves": 20
+    },
+    "Rey y 2 Alfiles vs Rey": {
+        "fen": "8/8/8/8/8/6BB/3K4/k7 w - - 0 1",
+        "theoretical_moves": ["g3e1", "a1b2", "h3f1"],
+        "description": "Mate con dos alfiles - acorralar al rey",
+        "difficulty": "Difícil",
+        "expected_moves": 10
+    },
+    "Lucena (Torre)": {
+        "fen": "1K6/1P1k4/8/8/8/8/r7/2R5 w - - 0 1",
+        "theoretical_moves": ["c1c4", "a2a1", "b8b7", "a1b1", "b7c7"],
+        "description": "Posición ganadora clásica con torre",
+        "difficulty": "Medio",
+        "expected_moves": 8
+    },
+    "Philidor (Defensa Torre)": {
+        "fen": "3k4/R7/3K4/8/8/8/r7/8 b - - 0 1",
+        "theoretical_moves": ["a2a6", "d6d7", "a6a7"],
+        "description": "Defensa de tablas con torre - posición pasiva",
+        "difficulty": "Medio",
+        "expected_moves": 15
+    },
+    "Rey y Peón vs Rey (ganador)": {
+        "fen": "8/8/8/8/3k4/3P4/3K4/8 w - - 0 1",
+        "theoretical_moves": ["d2c3", "d4e5", "c3c4", "e5e6", "c4c5"],
+        "description": "Peón pasado con rey apoyando - regla del cuadrado",
+        "difficulty": "Fácil",
+        "expected_moves": 8
+    },
+    "Mate de la Coz": {
+        "fen": "8/8/8/8/8/6N1/5K1k/8 w - - 0 1",
+        "theoretical_moves": ["g3f5", "h2h3", "f2g1", "h3h2", "g1f1", "h2h1", "f5g3"],
+        "description": "Mate con caballo requiriendo rey enemigo en esquina",
+        "difficulty": "Muy Difícil",
+        "expected_moves": 15
+    },
+    "Torre y Peón vs Torre (Tablas Philidor)": {
+        "fen": "8/4k3/8/4pP2/4K3/8/8/r7 b - - 0 1",
+        "theoretical_moves": ["a1a5", "e4d3", "a5f5", "d3e3", "f5f1"],
+        "description": "Defensa de tablas cortando al rey",
+        "difficulty": "Medio",
+        "expected_moves": 20
+    },
+    "Mate de Anastasia": {
+        "fen": "5rk1/5Npp/8/8/8/8/5RPP/6K1 w - - 0 1",
+        "theoretical_moves": ["f2f8", "g8h7", "f8f7"],
+        "description": "Patrón de mate con torre y caballo",
+        "difficulty": "Fácil",
+        "expected_moves": 3
+    }
+}
+
+# --- Posiciones aleatorias ---
+
+def random_board(rng, n: int, pieces: str = 'QRBNPqrbnp') -> chess.Board:
+    """Dos reyes y n-2 piezas al azar de `pieces` hasta obtener una posición válida (puede estar terminada)."""
+    while True:
+        board = chess.Board(None)
+        squares = rng.sample(chess.SQUARES, n)
+        board.set_piece_at(squares[0], chess.Piece(chess.KING, chess.WHITE))
+        board.set_piece_at(squares[1], chess.Piece(chess.KING, chess.BLACK))
+        for sq in squares[2:]:
+            board.set_piece_at(sq, chess.Piece.from_symbol(rng.choice(pieces)))
+        board.turn = rng.random() < 0.5
+        if board.is_valid():
+            return board
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Profiler de muestreo para las corridas de experimentos (opt-in).
+
+Un hilo de fondo toma cada `interval` segundos la pila de los hilos
+objetivo (por defecto, el hilo que arranca el profiler, que es el que
+ejecuta `mcts_search`). No instrumenta el código, así que el sobrecoste es
+bajo y el perfil refleja la carga real de los reportes.
+
+Salidas:
+- `<base>.speedscope.json`: formato de https://www.speedscope.app
+- `<base>.folded`: pilas colapsadas para flamegraph.pl / inferno
+- `top_functions()`: tabla agregada (muestras propias e inclusivas por función)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, thread_ids: list[int] | None = None):
+        self.interval = interval
+        self.thread_ids = set(thread_ids or [])
+        self.samples: Counter = Counter()   # pila (tupla de frames raíz -> hoja) -> nº de muestras
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._t0 = 0.0
+
+    # --- Control ---
+
+    def start(self) -> 'SamplingProfiler':
+        if not self.thread_ids:
+            self.thread_ids.add(threading.get_ident())
+        self._stop.clear()
+        self._t0 = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.duration += time.perf_counter() - self._t0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for tid in self.thread_ids:
+                frame = frames.get(tid)
+                if frame is None or tid == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                self.samples[tuple(reversed(stack))] += 1
+
+    # --- Exportación ---
+
+    @property
+    def total_samples(self) -> int:
+        return sum(self.samples.values())
+
+    def merge(self, other: 'SamplingProfiler'):
+        self.samples.update(other.samples)
+        self.duration += other.duration
+
+    def to_speedscope(self, name: str) -> dict:
+        frame_index, frames = {}, []
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            idx = []
+            for fr in stack:
+                if fr not in frame_index:
+                    frame_index[fr] = len(frames)
+                    frames.append({'name': fr[0], 'file': fr[1], 'line': fr[2]})
+                idx.append(frame_index[fr])
+            samples.append(idx)
+            weights.append(count * self.interval)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            }],
+            'name': name,
+            'activeProfileIndex': 0,
+            'exporter': 'profiling.py',
+        }
+
+    def to_folded(self) -> str:
+        lines = []
+        for stack, count in self.samples.items():
+            names = ';'.join(f"{fn} ({os.path.basename(path)}:{line})" for fn, path, line in stack)
+            lines.append(f"{names} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def save(self, base_path: str, name: str | None = None) -> list[str]:
+        """Escribe `<base_path>.speedscope.json` y `<base_path>.folded`; devuelve las rutas."""
+        os.makedirs(os.path.dirname(base_path) or '.', exist_ok=True)
+        speedscope_path = base_path + '.speedscope.json'
+        folded_path = base_path + '.folded'
+        with open(speedscope_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_speedscope(name or os.path.basename(base_path)), f)
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_folded())
+        return [speedscope_path, folded_path]
+
+    def top_functions(self, n: int = 30) -> list[dict]:
+        """Funciones más calientes: muestras propias (en la hoja) e inclusivas (en cualquier nivel)."""
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.samples.items():
+            if not stack:
+                continue
+            self_counts[stack[-1]] += count
+            for fr in set(stack):
+                total_counts[fr] += count
+        total = max(self.total_samples, 1)
+        rows = []
+        for fr, tot in total_counts.most_common():
+            rows.append({
+                'function': fr[0],
+                'file': os.path.basename(fr[1]),
+                'line': fr[2],
+                'self_samples': self_counts.get(fr, 0),
+                'self_pct': round(100 * self_counts.get(fr, 0) / total, 2),
+                'total_samples': tot,
+                'total_pct': round(100 * tot / total, 2),
+            })
+        rows.sort(key=lambda r: (-r['self_samples'], -r['total_samples']))
+        return rows[:n]
+
+def save_top_functions(profiler: SamplingProfiler, path: str, n: int = 50):
+    """CSV con la tabla de `top_functions`."""
+    import csv
+
+    rows = profiler.top_functions(n)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['function', 'file', 'line', 'self_samples', 'self_pct', 'total_samples', 'total_pct'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+def slugify(name: str) -> str:
+    return ''.join(c if c.isalnum() else '_' for c in name).strip('_').lower()
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Generador retrógrado de tablas de finales propias (KQK, KRK, KPK, KBNK...)
+para cuando no hay archivos de Syzygy.
+
+Cada firma se guarda como `<dir>/<firma>.npy`: un array uint8 indexado por
+`egindex.EndgameIndex` (posiciones reducidas por simetría) con la distancia
+al mate para el bando al mover:
+    0          tablas
+    plies + 1  ganada (plies impares) o perdida (plies pares; 1 = ya es mate)
+    255        índice ilegal / no canónico
+Al cargarse se abren con mmap, así que varios procesos comparten las páginas.
+
+Algoritmo: se marcan los mates y los resultados de las jugadas que salen de
+la tabla (capturas -> tablas por material insuficiente o tabla menor,
+promociones -> KQK/KRK ya generadas) y se propaga hacia atrás por
+"desjugadas" en orden creciente de plies:
+- posición perdida en d -> sus predecesoras se ganan en d + 1;
+- posición ganada en d -> cada predecesora se reevalúa hacia delante y,
+  si todas sus jugadas ya pierden, se pierde en 1 + la más larga.
+Lo que queda sin resolver son tablas.
+
+`RetroTablebase` expone `probe_wdl` / `probe_dtz` como las tablas de
+python-chess, así que sirve como `tb.obj` (ver `TBLite(retro_dir=...)`).
+
+Uso:
+    python retro.py --out datos/retro KQvK KRvK KPvK      # segundos/minutos
+    python retro.py --out datos/retro KBNvK                # ~5M posiciones: lento (horas en CPython)
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import time
+from collections import defaultdict
+
+import chess
+import numpy as np
+
+from egindex import EndgameIndex, find_table, material_signature
+
+DRAW = 0
+ILLEGAL = 255
+UNKNOWN = 254   # solo durante la generación
+
+class RetroTablebase:
+    """Tablas `<firma>.npy` de un directorio, con la interfaz de sondeo de python-chess."""
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.tables: dict = {}   # firma -> (EndgameIndex, array)
+        for path in sorted(glob.glob(os.path.join(directory, '*v*.npy'))):
+            sig = os.path.basename(path)[:-4]
+            self.tables[sig] = (EndgameIndex(sig), np.load(path, mmap_mode='r'))
+
+    def code(self, board: chess.Board) -> int:
+        """Valor crudo de la tabla (0 tablas, plies + 1 si no). KeyError si no hay tabla para la firma."""
+        entry, flipped = find_table(self.tables, board)
+        if entry is None:
+            raise KeyError(f"no hay tabla propia para {material_signature(board)}")
+        index, values = entry
+        value = int(values[index.index_as(board, flipped)])
+        if value == ILLEGAL:
+            raise ValueError(f"posición inválida para {index.signature}: {board.fen()}")
+        return value
+
+    def probe_wdl(self, board: chess.Board) -> int:
+        """2 gana, 0 tablas, -2 pierde (bando al mover), como `chess.syzygy`."""
+        value = self.code(board)
+        return 0 if value == DRAW else -2 if value % 2 else 2
+
+    def probe_dtm(self, board: chess.Board) -> int:
+        """Plies hasta el mate: > 0 gana, < 0 pierde, 0 tablas o ya mateado."""
+        value = self.code(board)
+        return 0 if value == DRAW else -(value - 1) if value % 2 else value - 1
+
+    def probe_dtz(self, board: chess.Board) -> int:
+        # Sin peones que avanzar ni capturas del bando fuerte, la DTM hace de DTZ
+        # para ordenar jugadas (mismo signo, menor = más rápido)
+        return self.probe_dtm(board)
+
+    def close(self):
+        self.tables.clear()
+
+class RetroSolver:
+    def __init__(self, signature: str, external: RetroTablebase | None = None):
+        self.index = EndgameIndex(signature)
+        self.external = external
+        self.values = np.full(self.index.size, ILLEGAL, dtype=np.uint8)
+
+    def successor_code(self, board: chess.Board, mv: chess.Move, exits_only: bool = False) -> int | None:
+        """Valor (para el bando al mover tras `mv`) o None si aún no se conoce."""
+        is_exit = mv.promotion or board.is_capture(mv)
+        if exits_only and not is_exit:
+            return None
+        board.push(mv)
+        try:
+            if is_exit:
+                if board.is_checkmate():
+                    return 1
+                if board.is_insufficient_material() or board.is_stalemate():
+                    return DRAW
+                if self.external is None:
+                    raise KeyError(f"falta la tabla de {material_signature(board)}")
+                return self.external.code(board)
+            value = int(self.values[self.index.index(board)])
+            return None if value == UNKNOWN else value
+        finally:
+            board.pop()
+
+    def evaluate(self, board: chess.Board, exits_only: bool = False) -> int | None:
+        """Valor de `board` con lo ya resuelto: la victoria más corta, o la derrota más larga si
+        todas las jugadas pierden; None si falta información (o si son tablas, que no se propagan)."""
+        best_win, worst_loss, unknown, any_move = None, 0, False, False
+        for mv in board.legal_moves:
+            any_move = True
+            c = self.successor_code(board, mv, exits_only)
+            if c is None or c == DRAW:
+                unknown = True
+            elif c % 2:   # el rival pierde en c - 1 plies
+                best_win = c + 1 if best_win is None else min(best_win, c + 1)
+            else:
+                worst_loss = max(worst_loss, c + 1)
+        if not any_move:
+            return 1 if board.is_check() else None
+        if best_win is not None:
+            return best_win
+        return None if unknown else worst_loss
+
+    def predecessors(self, board: chess.Board):
+        """Índices desde los que se llega a `board` con una jugada sin captura ni promoción."""
+        mover = not board.turn
+        occupied = board.occupied
+        for sq in chess.scan_forward(board.occupied_co[mover]):
+            pt = board.piece_type_at(sq)
+            if pt == chess.PAWN:
+                step = -8 if mover == chess.WHITE else 8
+                origins = []
+                o = sq + step
+                if not occupied & chess.BB_SQUARES[o] and chess.square_rank(o) not in (0, 7):
+                    origins.append(o)
+                    if chess.square_rank(sq) == (3 if mover == chess.WHITE else 4) and not occupied & chess.BB_SQUARES[o + step]:
+                        origins.append(o + step)
+            else:
+                origins = chess.scan_forward(board.attacks_mask(sq) & ~occupied)
+            for o in origins:
+                pred = board.copy(stack=False)
+                pred.remove_piece_at(sq)
+                pred.set_piece_at(o, chess.Piece(pt, mover))
+                pred.turn = mover
+                if pred.is_attacked_by(mover, pred.king(not mover)):
+                    continue   # el bando que no mueve no puede estar en jaque
+                yield self.index.index(pred)
+
+    def solve(self, verbose: bool = True) -> np.ndarray:
+        t0 = time.time()
+        buckets = defaultdict(list)
+        legal = 0
+        for idx in range(self.index.size):
+            board = self.index.decode(idx)
+            if board is None:
+                continue
+            legal += 1
+            self.values[idx] = UNKNOWN
+            c = self.evaluate(board, exits_only=True)
+            if c is not None:
+                buckets[c].append(idx)
+        if verbose:
+            print(f"{self.index.signature}: {legal} posiciones legales ({time.time() - t0:.1f} s)")
+
+        d = 1
+        while buckets:
+            for idx in buckets.pop(d, []):
+                if self.values[idx] != UNKNOWN:
+                    continue
+                self.values[idx] = d
+                board = self.index.decode(idx)
+                for pred in self.predecessors(board):
+                    if self.values[pred] != UNKNOWN:
+                        continue
+                    if d % 2:   # perdida para el bando al mover -> la predecesora gana
+                        buckets[d + 1].append(pred)
+                    else:
+                        c = self.evaluate(self.index.decode(pred))
+                        if c is not None:
+                            buckets[c].append(pred)
+            d += 1
+
+        self.values[self.values == UNKNOWN] = DRAW
+        if verbose:
+            won = int(((self.values != DRAW) & (self.values != ILLEGAL) & (self.values % 2 == 0)).sum())
+            longest = int(self.values[self.values != ILLEGAL].max())
+            print(f"{self.index.signature}: {won} ganadas, mate más largo {longest // 2} jugadas "
+                  f"({time.time() - t0:.1f} s)")
+        return self.values
+
+def generate(signature: str, out_dir: str, verbose: bool = True) -> str:
+    """Genera `<out_dir>/<firma>.npy` usando las tablas que ya haya en `out_dir` para las salidas."""
+    os.makedirs(out_dir, exist_ok=True)
+    values = RetroSolver(signature, RetroTablebase(out_dir)).solve(verbose)
+    path = os.path.join(out_dir, f"{signature}.npy")
+    np.save(path, values)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Tablas de finales propias por análisis retrógrado")
+    parser.add_argument('signatures', nargs='*', default=['KQvK', 'KRvK', 'KPvK'],
+                        help='Firmas en orden (las promociones de KPvK necesitan KQvK y KRvK)')
+    parser.add_argument('--out', type=str, default=os.path.join('datos', 'retro'))
+    args = parser.parse_args()
+    for sig in args.signatures:
+        print(f"Guardada: {generate(sig, args.out)}")
+
+if __name__ == '__main__':
+    main()
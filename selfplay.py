@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Generador de datos por self-play para entrenar/ajustar evaluadores.
+
+- Juega partidas MCTS contra sí mismo en un pool de procesos, desde las
+  posiciones de TEST_POSITIONS / FAMOUS_ENDGAMES y posiciones aleatorias
+  de finales pequeños.
+- Cada posición se guarda con sus bitboards, la distribución de visitas de
+  la raíz, el resultado de la partida y el WDL de Syzygy (si hay).
+- Los registros se escriben en shards comprimidos de tamaño fijo
+  (`shard_00000.npz`, ...). El progreso (partidas hechas y registros aún
+  no volcados) se guarda en `progress.json` / `pending.npz`, así que la
+  ejecución se puede interrumpir y reanudar con el mismo comando.
+
+Uso:
+    python selfplay.py --out datos/selfplay --games 1000 --workers 4 --mcts-time 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+
+import chess
+import numpy as np
+
+from mcts_core import mcts_search, derive_seed
+from posiciones import TEST_POSITIONS, FAMOUS_ENDGAMES
+from tb_utils import TBLite, probe_wdl
+
+MAX_POLICY_MOVES = 64   # jugadas de la raíz guardadas por posición
+TB_UNKNOWN = -128       # valor de 'tb_wdl' cuando no hay tablebase para la posición
+
+# Firmas de material para posiciones aleatorias (piezas blancas, piezas negras)
+RANDOM_SIGNATURES = ["KQ/K", "KR/K", "KBN/K", "KP/K", "KRR/K", "KQ/KR", "KR/KP"]
+
+# --- Posiciones iniciales ---
+
+def random_endgame_fen(rng: random.Random, signature: str) -> str:
+    """Coloca al azar las piezas de `signature` ("KQ/K") hasta obtener una posición válida y no terminada."""
+    white, black = signature.split('/')
+    while True:
+        board = chess.Board(None)
+        squares = rng.sample(chess.SQUARES, len(white) + len(black))
+        pieces = [(chess.Piece.from_symbol(c), sq) for c, sq in zip(white.upper() + black.lower(), squares)]
+        if any(p.piece_type == chess.PAWN and chess.square_rank(sq) in (0, 7) for p, sq in pieces):
+            continue
+        for p, sq in pieces:
+            board.set_piece_at(sq, p)
+        board.turn = rng.choice([chess.WHITE, chess.BLACK])
+        if board.is_valid() and not board.is_game_over():
+            return board.fen()
+
+def seed_fens() -> list[str]:
+    fens = [m['fen'] for m in TEST_POSITIONS.values()] + [m['fen'] for m in FAMOUS_ENDGAMES.values()]
+    return [f for f in dict.fromkeys(fens) if not chess.Board(f).is_game_over()]
+
+def game_tasks(n_games: int, seed: int, random_fraction: float) -> list[tuple[int, str, int]]:
+    """Lista determinista de (game_id, fen, semilla): la misma para una misma semilla."""
+    rng = random.Random(seed)
+    fixed = seed_fens()
+    tasks = []
+    for gid in range(n_games):
+        if rng.random() < random_fraction:
+            fen = random_endgame_fen(rng, rng.choice(RANDOM_SIGNATURES))
+        else:
+            fen = fixed[gid % len(fixed)]
+        tasks.append((gid, fen, rng.randrange(2**31)))
+    return tasks
+
+# --- Codificación ---
+
+def encode_move(move: chess.Move) -> int:
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+def decode_move(code: int) -> chess.Move:
+    return chess.Move(code & 63, (code >> 6) & 63, (code >> 12) or None)
+
+def board_bitboards(board: chess.Board) -> list[int]:
+    return [board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK],
+            board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings]
+
+def record_to_board(bitboards, turn, castling, ep_square, halfmove) -> chess.Board:
+    """Reconstruye el tablero de un registro de shard."""
+    bb = [int(x) for x in bitboards]
+    board = chess.Board(None)
+    for pt, mask in zip(chess.PIECE_TYPES, bb[2:]):
+        for sq in chess.scan_forward(mask):
+            board.set_piece_at(sq, chess.Piece(pt, bool(bb[chess.WHITE] & chess.BB_SQUARES[sq])))
+    board.turn = bool(turn)
+    board.castling_rights = int(castling)
+    board.ep_square = int(ep_square) if ep_square >= 0 else None
+    board.halfmove_clock = int(halfmove)
+    return board
+
+# --- Worker ---
+
+_TB = None
+
+def _init_worker(syzygy_dir):
+    global _TB
+    _TB = TBLite(syzygy_dir).__enter__()
+
+def play_selfplay_game(task, time_limit=0.2, max_plies=80, config=None):
+    """Juega una partida MCTS vs MCTS y devuelve (game_id, registros)."""
+    gid, fen, seed = task
+    board = chess.Board(fen)
+    positions = []
+    ply = 0
+    while not board.is_game_over() and ply < max_plies:
+        move, stats = mcts_search(board, time_limit=time_limit, seed=derive_seed(seed, ply), tb=_TB, config=config)
+        if move is None:
+            break
+        visits = sorted(((chess.Move.from_uci(u), v.get('N', 0)) for u, v in stats.get('all_moves', {}).items()),
+                        key=lambda x: -x[1])[:MAX_POLICY_MOVES]
+        if sum(n for _, n in visits) <= 0:
+            visits = [(move, 1)]
+        wdl = probe_wdl(board, _TB.obj) if _TB is not None and _TB.obj is not None else None
+        positions.append({
+            'bitboards': board_bitboards(board),
+            'turn': board.turn,
+            'castling': board.castling_rights,
+            'ep_square': board.ep_square if board.ep_square is not None else -1,
+            'halfmove': board.halfmove_clock,
+            'policy': [(encode_move(m), n) for m, n in visits],
+            'tb_wdl': TB_UNKNOWN if wdl is None else wdl,
+        })
+        board.push(move)
+        ply += 1
+
+    if board.is_checkmate():
+        white_value = 1.0 if board.turn == chess.BLACK else -1.0
+    else:
+        white_value = 0.0  # tablas o partida cortada por max_plies
+    for p in positions:
+        p['result'] = white_value if p['turn'] == chess.WHITE else -white_value
+        p['game_id'] = gid
+    return gid, positions
+
+def _play_task(args):
+    task, time_limit, max_plies, config = args
+    return play_selfplay_game(task, time_limit, max_plies, config)
+
+# --- Escritura de shards ---
+
+class ShardWriter:
+    """Acumula registros y los vuelca en shards `.npz` comprimidos de `shard_size` posiciones.
+
+    El estado (índice de shard, partidas completadas y registros pendientes)
+    se persiste con `checkpoint()` para poder reanudar.
+    """
+    def __init__(self, out_dir: str, shard_size: int = 4096):
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.buffer: list[dict] = []
+        self.next_shard = 0
+        self.done_games: set[int] = set()
+        self.positions_written = 0
+        os.makedirs(out_dir, exist_ok=True)
+        self._load_progress()
+
+    @property
+    def progress_path(self):
+        return os.path.join(self.out_dir, 'progress.json')
+
+    @property
+    def pending_path(self):
+        return os.path.join(self.out_dir, 'pending.npz')
+
+    def _load_progress(self):
+        if not os.path.exists(self.progress_path):
+            return
+        with open(self.progress_path, encoding='utf-8') as f:
+            prog = json.load(f)
+        if prog['shard_size'] != self.shard_size:
+            raise ValueError(f"shard_size distinto al de la ejecución previa ({prog['shard_size']})")
+        self.next_shard = prog['next_shard']
+        self.done_games = set(prog['done_games'])
+        self.positions_written = prog['positions_written']
+        if os.path.exists(self.pending_path):
+            self.buffer = _arrays_to_records(dict(np.load(self.pending_path)))
+
+    def add_game(self, gid: int, records: list[dict]):
+        self.buffer.extend(records)
+        self.done_games.add(gid)
+        while len(self.buffer) >= self.shard_size:
+            chunk, self.buffer = self.buffer[:self.shard_size], self.buffer[self.shard_size:]
+            path = os.path.join(self.out_dir, f'shard_{self.next_shard:05d}.npz')
+            _atomic_savez(path, _records_to_arrays(chunk))
+            self.next_shard += 1
+            self.positions_written += len(chunk)
+            self.checkpoint()
+
+    def checkpoint(self):
+        _atomic_savez(self.pending_path, _records_to_arrays(self.buffer))
+        tmp = self.progress_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'shard_size': self.shard_size, 'next_shard': self.next_shard,
+                       'positions_written': self.positions_written,
+                       'done_games': sorted(self.done_games)}, f)
+        os.replace(tmp, self.progress_path)
+
+def _records_to_arrays(records: list[dict]) -> dict:
+    n = len(records)
+    policy_moves = np.full((n, MAX_POLICY_MOVES), -1, dtype=np.int16)
+    policy_visits = np.zeros((n, MAX_POLICY_MOVES), dtype=np.float32)
+    for i, r in enumerate(records):
+        total = float(sum(v for _, v in r['policy'])) or 1.0
+        for j, (code, v) in enumerate(r['policy']):
+            policy_moves[i, j] = code
+            policy_visits[i, j] = v / total
+    return {
+        'bitboards': np.array([r['bitboards'] for r in records], dtype=np.uint64).reshape(n, 8),
+        'turn': np.array([r['turn'] for r in records], dtype=np.bool_),
+        'castling': np.array([r['castling'] for r in records], dtype=np.uint64),
+        'ep_square': np.array([r['ep_square'] for r in records], dtype=np.int8),
+        'halfmove': np.array([r['halfmove'] for r in records], dtype=np.int16),
+        'policy_moves': policy_moves,
+        'policy_visits': policy_visits,
+        'result': np.array([r['result'] for r in records], dtype=np.float32),
+        'tb_wdl': np.array([r['tb_wdl'] for r in records], dtype=np.int8),
+        'game_id': np.array([r['game_id'] for r in records], dtype=np.int32),
+    }
+
+def _arrays_to_records(arrays: dict) -> list[dict]:
+    records = []
+    for i in range(len(arrays['result'])):
+        policy = [(int(c), float(v)) for c, v in zip(arrays['policy_moves'][i], arrays['policy_visits'][i]) if c >= 0]
+        records.append({
+            'bitboards': [int(x) for x in arrays['bitboards'][i]],
+            'turn': bool(arrays['turn'][i]),
+            'castling': int(arrays['castling'][i]),
+            'ep_square': int(arrays['ep_square'][i]),
+            'halfmove': int(arrays['halfmove'][i]),
+            'policy': policy,
+            'result': float(arrays['result'][i]),
+            'tb_wdl': int(arrays['tb_wdl'][i]),
+            'game_id': int(arrays['game_id'][i]),
+        })
+    return records
+
+def _atomic_savez(path: str, arrays: dict):
+    tmp = path + '.tmp.npz'
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+# --- Lectura ---
+
+def iter_shards(out_dir: str):
+    """Itera sobre los shards completos de `out_dir` como dicts de arrays."""
+    for path in sorted(glob.glob(os.path.join(out_dir, 'shard_*.npz'))):
+        yield dict(np.load(path))
+
+def shard_boards(arrays: dict) -> list[chess.Board]:
+    return [record_to_board(arrays['bitboards'][i], arrays['turn'][i], arrays['castling'][i],
+                            arrays['ep_square'][i], arrays['halfmove'][i])
+            for i in range(len(arrays['result']))]
+
+# --- CLI ---
+
+def run_selfplay(out_dir, n_games, workers=4, time_limit=0.2, max_plies=80, shard_size=4096,
+                 seed=42, random_fraction=0.5, syzygy_dir=None, checkpoint_every=10, config=None):
+    writer = ShardWriter(out_dir, shard_size)
+    tasks = [t for t in game_tasks(n_games, seed, random_fraction) if t[0] not in writer.done_games]
+    print(f"Partidas pendientes: {len(tasks)} / {n_games} (shards escritos: {writer.next_shard})")
+
+    t0 = time.time()
+    positions = 0
+    with Pool(workers, initializer=_init_worker, initargs=(syzygy_dir,)) as pool:
+        jobs = ((t, time_limit, max_plies, config) for t in tasks)
+        for k, (gid, records) in enumerate(pool.imap_unordered(_play_task, jobs), 1):
+            writer.add_game(gid, records)
+            positions += len(records)
+            if k % checkpoint_every == 0 or k == len(tasks):
+                writer.checkpoint()
+                elapsed = time.time() - t0
+                print(f"[{k}/{len(tasks)}] {positions} posiciones | {positions / elapsed:.1f} pos/s | shards: {writer.next_shard}")
+    writer.checkpoint()
+    elapsed = time.time() - t0
+    print(f"Listo: {positions} posiciones nuevas en {elapsed:.1f}s ({positions / max(elapsed, 1e-9):.1f} pos/s)")
+    return positions
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play MCTS -> shards de entrenamiento")
+    parser.add_argument('--out', type=str, default='datos/selfplay')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--mcts-time', type=float, default=0.2, help='Tiempo (s) por jugada')
+    parser.add_argument('--max-plies', type=int, default=80)
+    parser.add_argument('--shard-size', type=int, default=4096)
+    parser.add_argument('--random-fraction', type=float, default=0.5, help='Fracción de partidas desde posiciones aleatorias')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--syzygy-dir', type=str, default=None)
+    args = parser.parse_args()
+
+    run_selfplay(args.out, args.games, args.workers, args.mcts_time, args.max_plies, args.shard_size,
+                 args.seed, args.random_fraction, args.syzygy_dir)
+
+if __name__ == '__main__':
+    main()
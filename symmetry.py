@@ -0,0 +1,76 @@
+
+from __future__ import annotations
+import chess
+
+# Simetrías del tablero (grupo diédrico D4) como transformaciones de bitboards.
+# Índice 0 = identidad, 1 = espejo izquierda-derecha; el resto solo son válidas
+# sin peones (los peones fijan la orientación vertical).
+_BB_TRANSFORMS = (
+    lambda bb: bb,
+    chess.flip_horizontal,
+    chess.flip_vertical,
+    lambda bb: chess.flip_vertical(chess.flip_horizontal(bb)),         # giro 180°
+    chess.flip_diagonal,
+    chess.flip_anti_diagonal,
+    lambda bb: chess.flip_diagonal(chess.flip_horizontal(bb)),         # giro 90°
+    lambda bb: chess.flip_anti_diagonal(chess.flip_horizontal(bb)),    # giro 270°
+)
+
+# SQUARE_MAP[t][sq]: casilla transformada; INVERSE[t]: transformación inversa
+SQUARE_MAP = tuple(tuple(f(chess.BB_SQUARES[sq]).bit_length() - 1 for sq in chess.SQUARES) for f in _BB_TRANSFORMS)
+INVERSE = tuple(next(u for u in range(8) if all(SQUARE_MAP[u][SQUARE_MAP[t][sq]] == sq for sq in chess.SQUARES))
+                for t in range(8))
+
+ALL_TRANSFORMS = tuple(range(8))
+PAWN_TRANSFORMS = (0, 1)
+NO_TRANSFORMS = (0,)
+
+def allowed_transforms(board: chess.Board) -> tuple[int, ...]:
+    """8 sin peones ni enroques, 2 (espejo de columnas) con peones, 1 con derechos de enroque."""
+    if board.castling_rights:
+        return NO_TRANSFORMS
+    if board.pawns:
+        return PAWN_TRANSFORMS
+    return ALL_TRANSFORMS
+
+def _key(board: chess.Board, t: int) -> tuple:
+    f = _BB_TRANSFORMS[t]
+    ep = board.ep_square if board.has_legal_en_passant() else None
+    return (f(board.pawns), f(board.knights), f(board.bishops), f(board.rooks), f(board.queens), f(board.kings),
+            f(board.occupied_co[chess.WHITE]), board.turn, board.castling_rights,
+            None if ep is None else SQUARE_MAP[t][ep])
+
+def position_key(board: chess.Board) -> tuple:
+    """Clave exacta de la posición (sin relojes), en el mismo formato que `canonical_key`."""
+    return _key(board, 0)
+
+def canonical_key(board: chess.Board) -> tuple[tuple, int]:
+    """(clave, t): la clave mínima entre las orientaciones permitidas y la transformación que la produce.
+
+    Posiciones simétricas comparten clave, así que sirve directamente como clave de
+    caché para cualquier valor invariante por simetría (WDL/DTZ, evaluaciones).
+    """
+    transforms = allowed_transforms(board)
+    if len(transforms) == 1:
+        return _key(board, 0), 0
+    return min((_key(board, t), t) for t in transforms)
+
+def canonicalize(board: chess.Board) -> tuple[chess.Board, int]:
+    """Tablero en orientación canónica y la transformación aplicada (t=0: sin cambios)."""
+    _, t = canonical_key(board)
+    if t == 0:
+        return board.copy(stack=False), 0
+    return board.transform(_BB_TRANSFORMS[t]), t
+
+def transform_square(square: int, t: int) -> int:
+    return SQUARE_MAP[t][square]
+
+def transform_move(move: chess.Move, t: int) -> chess.Move:
+    """Jugada del tablero original expresada en el tablero transformado por `t`."""
+    if t == 0:
+        return move
+    return chess.Move(SQUARE_MAP[t][move.from_square], SQUARE_MAP[t][move.to_square], move.promotion)
+
+def untransform_move(move: chess.Move, t: int) -> chess.Move:
+    """Inversa de `transform_move`: jugada del tablero canónico -> tablero original."""
+    return transform_move(move, INVERSE[t])
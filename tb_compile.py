@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Compila sondeos de tablebase a arrays planos por firma de material.
+
+Cada `probe_wdl` de Syzygy pasa por la descompresión e indexado de
+python-chess (decenas de µs) y se repite en cada ply de los rollouts. Esta
+herramienta recorre una vez todas las posiciones de cada firma (hasta 4
+piezas, índice de egindex.py), las sondea con tb_utils y guarda:
+    <dir>/<firma>.wdl.npy   uint8: WDL + 2 (0..4), 255 sin dato / índice ilegal
+    <dir>/<firma>.dtz.npy   int16: DTZ, -32768 sin dato
+`CompiledTablebase` los abre con mmap y responde en O(1); lo que no está
+compilado (otra firma, captura al paso posible, enroque) va a la tablebase
+de respaldo (`TBLite(path, compiled_dir=...)`).
+
+Uso:
+    python tb_compile.py --syzygy-dir DIR --out datos/tb_compiled [--max-pieces 4] [FIRMA ...]
+    python tb_compile.py --retro-dir datos/retro --out datos/tb_compiled KQvK KRvK KPvK
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import itertools
+import os
+import time
+
+import chess
+import numpy as np
+
+from bb_utils import PIECE_VALUES
+from egindex import EndgameIndex, find_table
+from tb_utils import TBLite, probe_wdl, probe_dtz
+
+WDL_NONE = 255
+DTZ_NONE = -32768
+LETTER_VALUES = {c: PIECE_VALUES[chess.Piece.from_symbol(c).piece_type] for c in 'QRBNP'}   # letras de las firmas
+
+def _strength(side) -> tuple:
+    return len(side), sum(LETTER_VALUES[p] for p in side)
+
+def signatures(max_pieces: int = 4) -> list[str]:
+    """Firmas de 3 a `max_pieces` piezas, una por par de colores (el bando con más material primero)."""
+    sigs = []
+    for n in range(1, max_pieces - 1):
+        for white_n in range(n, (n - 1) // 2, -1):
+            for white in itertools.combinations_with_replacement('QRBNP', white_n):
+                for black in itertools.combinations_with_replacement('QRBNP', n - white_n):
+                    if _strength(white) < _strength(black) or (_strength(white) == _strength(black) and white > black):
+                        continue
+                    sigs.append(f"K{''.join(white)}vK{''.join(black)}")
+    return sigs
+
+def compile_signature(signature: str, tb, out_dir: str, verbose: bool = True) -> str | None:
+    """Sondea todas las posiciones legales de la firma; None si la tablebase no tiene ninguna."""
+    index = EndgameIndex(signature)
+    wdl = np.full(index.size, WDL_NONE, dtype=np.uint8)
+    dtz = np.full(index.size, DTZ_NONE, dtype=np.int16)
+    t0 = time.time()
+    found = 0
+    for idx in range(index.size):
+        board = index.decode(idx)
+        if board is None:
+            continue
+        w = probe_wdl(board, tb)
+        if w is None:
+            continue
+        found += 1
+        wdl[idx] = w + 2
+        d = probe_dtz(board, tb)
+        if d is not None:
+            dtz[idx] = d
+    if verbose:
+        print(f"{signature}: {found} posiciones sondeadas ({time.time() - t0:.1f} s)")
+    if not found:
+        return None
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, f"{signature}.wdl.npy"), wdl)
+    np.save(os.path.join(out_dir, f"{signature}.dtz.npy"), dtz)
+    return os.path.join(out_dir, f"{signature}.wdl.npy")
+
+class CompiledTablebase:
+    """Arrays compilados de un directorio con la interfaz de sondeo de python-chess; `fallback` para el resto."""
+    def __init__(self, directory: str, fallback=None):
+        self.directory = directory
+        self.fallback = fallback
+        self.tables: dict = {}   # firma -> (EndgameIndex, wdl, dtz)
+        for path in sorted(glob.glob(os.path.join(directory, '*.wdl.npy'))):
+            sig = os.path.basename(path)[:-len('.wdl.npy')]
+            self.tables[sig] = (EndgameIndex(sig), np.load(path, mmap_mode='r'),
+                                np.load(os.path.join(directory, f"{sig}.dtz.npy"), mmap_mode='r'))
+        self.hits = 0
+        self.fallbacks = 0
+
+    def _lookup(self, board: chess.Board, column: int, missing: int):
+        entry, flipped = find_table(self.tables, board)
+        if entry is not None and not board.castling_rights and not board.has_legal_en_passant():
+            value = int(entry[column][entry[0].index_as(board, flipped)])
+            if value != missing:
+                self.hits += 1
+                return value
+        return None
+
+    def _fallback(self, board: chess.Board, kind: str):
+        if self.fallback is None:
+            raise KeyError(f"posición no compilada: {board.fen()}")
+        self.fallbacks += 1
+        return getattr(self.fallback, kind)(board)
+
+    def probe_wdl(self, board: chess.Board) -> int:
+        value = self._lookup(board, 1, WDL_NONE)
+        return value - 2 if value is not None else self._fallback(board, 'probe_wdl')
+
+    def probe_dtz(self, board: chess.Board) -> int:
+        value = self._lookup(board, 2, DTZ_NONE)
+        return value if value is not None else self._fallback(board, 'probe_dtz')
+
+    def stats(self) -> dict:
+        stats = dict(self.fallback.stats()) if hasattr(self.fallback, 'stats') else {}
+        stats.update({'tb_compiled_hits': self.hits, 'tb_compiled_fallbacks': self.fallbacks})
+        return stats
+
+    def close(self):
+        self.tables.clear()
+        if self.fallback is not None:
+            self.fallback.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila sondeos de tablebase a arrays con mmap por firma")
+    parser.add_argument('signatures', nargs='*', help='Firmas a compilar (por defecto, todas hasta --max-pieces)')
+    parser.add_argument('--syzygy-dir', type=str, default=None)
+    parser.add_argument('--retro-dir', type=str, default=None, help='Tablas de retro.py como origen (sin Syzygy)')
+    parser.add_argument('--max-pieces', type=int, default=4)
+    parser.add_argument('--out', type=str, default=os.path.join('datos', 'tb_compiled'))
+    args = parser.parse_args()
+
+    with TBLite(args.syzygy_dir, cache_size=0, retro_dir=args.retro_dir) as tb:
+        if tb.obj is None:
+            parser.error("hace falta --syzygy-dir o --retro-dir")
+        for sig in args.signatures or signatures(args.max_pieces):
+            path = compile_signature(sig, tb.obj, args.out)
+            print(f"Guardada: {path}" if path else f"{sig}: sin tabla, se omite")
+
+if __name__ == '__main__':
+    main()
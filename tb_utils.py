@@ -3,7 +3,8 @@ from __future__ import annotations
 import chess
 from chess.syzygy import open_tablebase
 
-# WDL: 2 win, 1 draw, 0 loss (for side to move)
+# WDL de python-chess (bando al mover): 2 gana, 1 gana pero anulada por la regla de 50
+# jugadas ("cursed win"), 0 tablas, -1 pierde pero salvada por la regla de 50, -2 pierde
 def probe_wdl(board: chess.Board, tb) -> int | None:
     try:
         return tb.probe_wdl(board)
@@ -17,8 +18,9 @@ def probe_dtz(board: chess.Board, tb) -> int | None:
         return None
 
 def wdl_to_score(wdl: int | None) -> float | None:
+    """WDL -> 1.0 (gana), 0.0 (tablas) o -1.0 (pierde); las victorias/derrotas "cursed"/"blessed" cuentan como tales."""
     if wdl is None: return None
-    return 1.0 if wdl == 2 else 0.0 if wdl == 1 else -1.0
+    return 1.0 if wdl > 0 else 0.0 if wdl == 0 else -1.0
 
 def best_moves_by_tb(board: chess.Board, tb) -> dict:
     """
@@ -60,14 +62,86 @@ def best_moves_by_tb(board: chess.Board, tb) -> dict:
 
     return {'moves': scored, 'best_set': best_set, 'best_wdl': best_wdl}
 
+class CachedTablebase:
+    """
+    Envuelve un tablebase de python-chess con una caché de sondeos WDL/DTZ.
+
+    Con `symmetric=True` la clave es la orientación canónica del tablero
+    (symmetry.canonical_key): KQK, KRK, KBNK... comparten entrada entre sus
+    8 posiciones simétricas (2 con peones). Los fallos (tabla ausente, posición
+    inválida) también se cachean y se relanzan igual que el sondeo original.
+    """
+    def __init__(self, tb, max_entries: int = 200_000, symmetric: bool = True):
+        from symmetry import canonical_key, position_key
+        self.tb = tb
+        self.max_entries = max_entries
+        self.symmetric = symmetric
+        self._key = (lambda b: canonical_key(b)[0]) if symmetric else position_key
+        self._cache: dict = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _probe(self, kind: str, board: chess.Board, fn):
+        key = (kind, self._key(board))
+        if key in self._cache:
+            self.hits += 1
+            value = self._cache[key]
+        else:
+            self.misses += 1
+            try:
+                value = fn(board)
+            except Exception as e:
+                value = e.with_traceback(None)
+            if len(self._cache) >= self.max_entries:
+                del self._cache[next(iter(self._cache))]   # FIFO: la entrada más antigua
+            self._cache[key] = value
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def probe_wdl(self, board: chess.Board) -> int:
+        return self._probe('wdl', board, self.tb.probe_wdl)
+
+    def probe_dtz(self, board: chess.Board) -> int:
+        return self._probe('dtz', board, self.tb.probe_dtz)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {'tb_cache_hits': self.hits, 'tb_cache_misses': self.misses,
+                'tb_cache_hit_rate': self.hits / total if total else 0.0, 'tb_cache_size': len(self._cache)}
+
+    def close(self):
+        self.tb.close()
+
 class TBLite:
-    """Context manager para abrir/cerrar Syzygy de forma segura."""
-    def __init__(self, path: str | None):
+    """Context manager para abrir/cerrar Syzygy de forma segura.
+
+    `cache_size` > 0 envuelve las tablas en un CachedTablebase (claves canónicas
+    por simetría si `symmetric`); 0 sondea directamente. Sin `path`, con
+    `retro_dir` se usan las tablas propias de retro.py (KQK, KRK, KPK...).
+    Con `compiled_dir` se consultan primero los arrays de tb_compile.py y lo
+    demás va a la tablebase anterior (con su caché).
+    """
+    def __init__(self, path: str | None, cache_size: int = 200_000, symmetric: bool = True,
+                 retro_dir: str | None = None, compiled_dir: str | None = None):
         self.path = path
+        self.cache_size = cache_size
+        self.symmetric = symmetric
+        self.retro_dir = retro_dir
+        self.compiled_dir = compiled_dir
         self.obj = None
     def __enter__(self):
-        if self.path:
-            self.obj = open_tablebase(self.path)
+        if self.path or self.retro_dir:
+            if self.path:
+                self.obj = open_tablebase(self.path)
+            else:
+                from retro import RetroTablebase
+                self.obj = RetroTablebase(self.retro_dir)
+            if self.cache_size:
+                self.obj = CachedTablebase(self.obj, self.cache_size, self.symmetric)
+        if self.compiled_dir:
+            from tb_compile import CompiledTablebase
+            self.obj = CompiledTablebase(self.compiled_dir, fallback=self.obj)
         return self
     def __exit__(self, exc_type, exc, tb):
         if self.obj:
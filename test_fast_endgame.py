@@ -0,0 +1,46 @@
+"""
+EndgameBoard: mismas jugadas legales que python-chess, push/pop reversibles y rollouts idénticos.
+"""
+
+import random
+
+import chess
+
+from fast_endgame import EndgameBoard, to_move
+from mcts_core import simulate
+from posiciones import random_board
+
+EN_PASSANT = "8/8/8/3k4/4Pp2/8/8/4K3 b - e3 0 1"
+PROMOTION = "8/1P3k2/8/8/8/8/6p1/4K3 w - - 0 1"
+
+def test_legal_moves_match():
+    rng = random.Random(3)
+    for fen in [EN_PASSANT, PROMOTION] + [random_board(rng, rng.choice([3, 4, 5])).fen() for _ in range(300)]:
+        board = chess.Board(fen)
+        fast = EndgameBoard.from_board(board)
+        assert [m.uci() for m in board.legal_moves] == [to_move(m).uci() for m in fast.legal_moves()], fen
+        assert board.is_checkmate() == fast.is_checkmate() and board.is_stalemate() == fast.is_stalemate()
+        assert board.is_insufficient_material() == fast.is_insufficient_material()
+
+def test_push_pop_roundtrip():
+    for fen in (EN_PASSANT, PROMOTION):
+        board = chess.Board(fen)
+        fast = EndgameBoard.from_board(board)
+        for mv in fast.legal_moves():
+            fast.push(mv)
+            board.push(to_move(mv))
+            assert fast.to_board().board_fen() == board.board_fen() and fast.ep_square == board.ep_square
+            fast.pop()
+            board.pop()
+        assert fast.to_board().fen() == board.fen()
+
+def test_same_rollouts():
+    for fen in ("8/8/8/4k3/8/8/8/KBN5 w - - 0 1", "8/8/3k4/8/3P4/8/r7/3K3R w - - 0 1"):
+        board = chess.Board(fen)
+        slow = simulate(board, rng=random.Random(1), fast_pieces=0)
+        fast = simulate(board, rng=random.Random(1))
+        assert fast[1]['fast_board'] and not slow[1]['fast_board']
+        assert fast[0] == slow[0] and fast[1]['moves'] == slow[1]['moves']
+    # Sin rey blanco (posición del banco): se queda en chess.Board
+    value, info = simulate(chess.Board("8/P7/8/8/8/3R4/8/1k6 w - - 0 1"), rng=random.Random(1))
+    assert not info['fast_board'] and -1.0 <= value <= 1.0
@@ -0,0 +1,33 @@
+"""
+Límite de memoria del árbol: tras cada desalojo, el contador de TreeSize coincide con los nodos reales.
+"""
+
+import chess
+
+from mcts_core import mcts_search, SearchConfig, TreeSize
+
+KRK = "k7/8/K7/R7/8/8/8/8 w - - 0 1"
+
+def count_nodes(root):
+    stack, n = [root], 0
+    while stack:
+        node = stack.pop()
+        n += 1
+        stack.extend(node.children.values())
+    return n
+
+def test_evict_counts_real_nodes(monkeypatch):
+    evict = TreeSize.evict
+    counts = []
+
+    def checked_evict(self, root, cfg):
+        evict(self, root, cfg)
+        counts.append((self.nodes, count_nodes(root)))
+
+    monkeypatch.setattr(TreeSize, 'evict', checked_evict)
+    _, stats = mcts_search(chess.Board(KRK), time_limit=None, max_iters=1500, seed=3,
+                           config=SearchConfig(max_nodes=200))
+    assert len(counts) > 1
+    assert all(tracked == real for tracked, real in counts)
+    assert all(real <= 200 for _, real in counts)
+    assert stats['tree_nodes'] <= 200
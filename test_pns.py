@@ -0,0 +1,46 @@
+"""
+Proof-number search: mates probados con línea válida, refutaciones y presupuesto agotado.
+"""
+
+import chess
+
+from mcts_core import mcts_search, SearchConfig
+from pns import pn_search, ProofNumberSearch
+
+MATE_IN_3 = "8/8/8/8/8/3K4/2Q5/6k1 w - - 0 1"
+STALEMATE = "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"
+PHILIDOR = "4k3/8/8/3PK3/8/8/r7/7R b - - 0 1"
+BACK_RANK = "6k1/5pp1/7p/8/8/8/1q4PP/R6K w - - 0 1"
+
+def play_line(fen, line):
+    board = chess.Board(fen)
+    for uci in line:
+        board.push_uci(uci)
+    return board
+
+def test_proves_shortest_mate():
+    res = pn_search(chess.Board(MATE_IN_3), max_mate_in=5)
+    assert res['status'] == 'proven'
+    assert res['mate_in'] == 3
+    assert play_line(MATE_IN_3, res['line']).is_checkmate()
+
+def test_disproven_and_unproven():
+    assert pn_search(chess.Board(STALEMATE))['status'] == 'disproven'
+    assert pn_search(chess.Board(MATE_IN_3), max_mate_in=2)['status'] == 'disproven'
+    assert pn_search(chess.Board(PHILIDOR), max_nodes=50)['status'] == 'unproven'
+
+def test_tt_keyed_by_attacker():
+    # Las blancas no matan desde BACK_RANK y refutan Ra3 en la TT; tras Ra3 las negras sí
+    # dan mate en 1 por la primera fila: una refutación vale solo para el bando que buscaba el mate
+    pns = ProofNumberSearch(max_mate_in=2)
+    assert pns.search(chess.Board(BACK_RANK))['status'] == 'disproven'
+    pns.max_mate_in = 1
+    res = pns.search(play_line(BACK_RANK, ['a1a3']))
+    assert res['status'] == 'proven' and res['mate_in'] == 1
+    assert play_line(BACK_RANK, ['a1a3'] + res['line']).is_checkmate()
+
+def test_mcts_plays_proven_mate():
+    move, stats = mcts_search(chess.Board(MATE_IN_3), time_limit=None, max_iters=50, seed=1,
+                              config=SearchConfig(pns_nodes=20_000))
+    assert stats['pns_proof'] and stats['mate_in_n'] == 3
+    assert move.uci() == stats['pv'][0]
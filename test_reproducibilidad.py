@@ -0,0 +1,38 @@
+"""
+Chequeo de regresión: misma semilla + mismo presupuesto de iteraciones = mismo árbol,
+ya se ejecuten las búsquedas en serie, en hilos o en procesos.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import chess
+
+from mcts_core import mcts_search, derive_seed
+
+FEN = "8/8/8/8/8/4K3/5R2/6k1 w - - 0 1"  # Mate en 2 - R vs K
+BASE_SEED = 1234
+WORKERS = 4
+ITERS = 150
+
+def run_search(seed):
+    """Huella del árbol de la raíz: jugada elegida, iteraciones y (N, W) de cada hijo."""
+    move, stats = mcts_search(chess.Board(FEN), time_limit=None, max_iters=ITERS, seed=seed)
+    children = {uci: (v['N'], v['W']) for uci, v in stats['all_moves'].items()}
+    return move.uci() if move else None, stats['iters'], children
+
+def test_same_seed_same_tree():
+    assert run_search(BASE_SEED) == run_search(BASE_SEED)
+
+def test_derived_seeds_are_distinct():
+    seeds = [derive_seed(BASE_SEED, i) for i in range(WORKERS)]
+    assert len(set(seeds)) == WORKERS
+    assert seeds == [derive_seed(BASE_SEED, i) for i in range(WORKERS)]
+
+def test_serial_equals_parallel():
+    seeds = [derive_seed(BASE_SEED, i) for i in range(WORKERS)]
+    serial = [run_search(s) for s in seeds]
+    with ThreadPoolExecutor(WORKERS) as pool:
+        threaded = list(pool.map(run_search, seeds))
+    with ProcessPoolExecutor(WORKERS) as pool:
+        processes = list(pool.map(run_search, seeds))
+    assert serial == threaded == processes
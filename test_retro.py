@@ -0,0 +1,71 @@
+"""
+Tablas retrógradas propias: índice por simetría, DTM de KQK contra PNS, sondeo vía TBLite
+y arrays compilados (tb_compile.py) con respaldo en la tablebase original.
+"""
+
+import functools
+import tempfile
+
+import chess
+
+from egindex import EndgameIndex
+from mcts_core import simulate
+from pns import pn_search
+from retro import generate, RetroTablebase
+from tb_compile import compile_signature
+from tb_utils import TBLite, probe_wdl
+
+MATE_IN_3 = "8/8/8/8/8/3K4/2Q5/6k1 w - - 0 1"
+QUEEN_HANGS = "8/8/8/8/8/8/1kQ5/7K b - - 0 1"
+
+@functools.lru_cache(maxsize=None)
+def kqk_dir():
+    out = tempfile.mkdtemp(prefix='retro_')
+    generate('KQvK', out, verbose=False)
+    return out
+
+def test_index_symmetry():
+    index = EndgameIndex('KPvK')
+    board = chess.Board("8/8/8/4k3/8/2P5/8/6K1 w - - 0 1")
+    idx = index.index(board)
+    assert index.index(board.transform(chess.flip_horizontal)) == idx
+    assert index.index(board.mirror()) == idx   # KvKP: se orienta con el peón en blancas
+    assert index.index(index.decode(idx)) == idx
+    assert EndgameIndex('KQvK').index(board) is None
+
+def test_kqk_matches_pns():
+    tb = RetroTablebase(kqk_dir())
+    board = chess.Board(MATE_IN_3)
+    assert tb.probe_dtm(board) == 5
+    assert pn_search(board, max_mate_in=3)['mate_in'] == (tb.probe_dtm(board) + 1) // 2
+    assert tb.probe_dtm(board.mirror()) == 5
+    assert tb.probe_wdl(chess.Board(QUEEN_HANGS)) == 0   # el rey negro captura la dama
+    index, values = tb.tables['KQvK']
+    assert int(values[values % 2 == 0].max()) == 20   # mate en 10 como máximo (19 plies)
+
+def test_tblite_retro_dir():
+    with TBLite(None, retro_dir=kqk_dir()) as tb:
+        board = chess.Board(MATE_IN_3)
+        assert probe_wdl(board, tb.obj) == 2
+        board.push_uci('c2c3')
+        assert probe_wdl(board, tb.obj) == -2
+        assert probe_wdl(chess.Board(), tb.obj) is None   # sin tabla para la firma
+
+def test_retro_draw_scores_zero():
+    with TBLite(None, retro_dir=kqk_dir()) as tb:
+        for root_turn in chess.COLORS:
+            value, info = simulate(chess.Board(QUEEN_HANGS), tb=tb, root_turn=root_turn)
+            assert value == 0.0 and info['tb_hit']
+
+def test_compiled_probes():
+    out = tempfile.mkdtemp(prefix='tb_compiled_')
+    source = RetroTablebase(kqk_dir())
+    compile_signature('KQvK', source, out, verbose=False)
+    with TBLite(None, retro_dir=kqk_dir(), compiled_dir=out) as tb:
+        for fen in (MATE_IN_3, QUEEN_HANGS):
+            board = chess.Board(fen)
+            assert probe_wdl(board, tb.obj) == source.probe_wdl(board)
+            assert probe_wdl(board.mirror(), tb.obj) == source.probe_wdl(board)
+        assert tb.obj.stats()['tb_compiled_hits'] == 4
+        assert probe_wdl(chess.Board("8/8/8/8/8/3K4/2R5/6k1 w - - 0 1"), tb.obj) is None   # KRvK: respaldo sin tabla
+        assert tb.obj.stats()['tb_compiled_fallbacks'] == 1
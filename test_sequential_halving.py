@@ -0,0 +1,29 @@
+"""
+Sequential halving en la raíz: raíces sin jugadas legales como en UCT y una jugada legal si las hay.
+"""
+
+import chess
+
+from alphabeta import AlphaBetaEvaluator
+from mcts_core import mcts_search, SearchConfig
+from vec_rollout import VectorRolloutEvaluator
+
+STALEMATE_TRAP = "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"
+MATED = "k7/1Q6/1K6/8/8/8/8/8 b - - 0 1"
+KQK = "k7/8/K7/Q7/8/8/8/8 w - - 0 1"
+HALVING = SearchConfig(root_policy='sequential_halving')
+
+def test_no_legal_moves_returns_none():
+    for fen in (STALEMATE_TRAP, MATED):
+        for evaluator in (None, AlphaBetaEvaluator(depth=1), VectorRolloutEvaluator()):
+            for batch_size in (1, 4):
+                move, _ = mcts_search(chess.Board(fen), time_limit=None, max_iters=20, seed=1,
+                                          evaluator=evaluator, batch_size=batch_size, config=HALVING)
+                assert move is None
+                assert mcts_search(chess.Board(fen), time_limit=None, max_iters=20, seed=1,
+                                   evaluator=evaluator, batch_size=batch_size)[0] is None
+
+def test_plays_legal_move():
+    board = chess.Board(KQK)
+    move, _ = mcts_search(board, time_limit=None, max_iters=64, seed=1, config=HALVING)
+    assert move in board.legal_moves
@@ -0,0 +1,28 @@
+"""
+Chequeo de la canonicalización por simetría: todas las orientaciones permitidas de una
+posición comparten clave, y las jugadas se transforman ida y vuelta sin perder legalidad.
+"""
+
+import chess
+
+from posiciones import TEST_POSITIONS
+from symmetry import _BB_TRANSFORMS, allowed_transforms, canonical_key, canonicalize, transform_move, untransform_move
+
+def test_symmetric_positions_share_key():
+    for name, meta in TEST_POSITIONS.items():
+        board = chess.Board(meta['fen'])
+        key, _ = canonical_key(board)
+        for t in allowed_transforms(board):
+            assert canonical_key(board.transform(_BB_TRANSFORMS[t]))[0] == key, name
+
+def test_moves_round_trip():
+    for name, meta in TEST_POSITIONS.items():
+        board = chess.Board(meta['fen'])
+        canon, t = canonicalize(board)
+        assert {transform_move(mv, t) for mv in board.legal_moves} == set(canon.legal_moves), name
+        assert {untransform_move(mv, t) for mv in canon.legal_moves} == set(board.legal_moves), name
+
+def test_pawns_and_castling_restrict_symmetry():
+    assert len(allowed_transforms(chess.Board("8/8/8/4k3/8/8/8/KQ6 w - - 0 1"))) == 8
+    assert len(allowed_transforms(chess.Board("8/8/8/4k3/8/8/4P3/K7 w - - 0 1"))) == 2
+    assert len(allowed_transforms(chess.Board())) == 1
@@ -0,0 +1,62 @@
+"""
+Puntuaciones de tablebase: escala WDL de python-chess (-2..2), tablas = 0, y el prior de
+Syzygy en expand desde la perspectiva de quien movió.
+"""
+
+from types import SimpleNamespace
+
+import chess
+
+from alphabeta import AlphaBetaEvaluator
+from mcts_core import Node, expand, backpropagate, DEFAULT_CONFIG
+from tb_utils import wdl_to_score
+
+QUEEN_STALEMATES = "7k/8/2Q5/8/8/8/8/K7 w - - 0 1"   # c6g6 ahoga; c6d7 gana
+
+class KQvKRules:
+    """Tablebase de juguete para KQvK: el ahogado es tablas; si no, gana el bando con dama."""
+    def probe_wdl(self, board: chess.Board) -> int:
+        if board.is_stalemate():
+            return 0
+        return 2 if board.queens & board.occupied_co[board.turn] else -2
+
+class ConstantWDL:
+    def __init__(self, wdl: int):
+        self.wdl = wdl
+    def probe_wdl(self, board: chess.Board) -> int:
+        return self.wdl
+
+def test_wdl_scale():
+    assert [wdl_to_score(w) for w in (2, 1, 0, -1, -2)] == [1.0, 1.0, 0.0, -1.0, -1.0]
+    assert wdl_to_score(None) is None
+
+def test_drawn_child_gets_zero_prior():
+    board = chess.Board(QUEEN_STALEMATES)
+    root = Node(board.copy())
+    tb = SimpleNamespace(obj=KQvKRules())
+    for _ in range(board.legal_moves.count()):
+        expand(root, tb=tb, root_turn=board.turn)
+    stalemate = root.children[chess.Move.from_uci("c6g6")]
+    win = root.children[chess.Move.from_uci("c6d7")]
+    assert stalemate.Q == 0.0 and stalemate.W == 0.0
+    assert win.Q == DEFAULT_CONFIG.prior_w_win
+
+def test_backup_by_mover():
+    # Valor en perspectiva de la raíz: suma en los nodos a los que mueve la raíz (profundidad impar)
+    root = Node(chess.Board(QUEEN_STALEMATES))
+    child = Node(root.board, parent=root, depth=1)
+    grandchild = Node(root.board, parent=child, depth=2)
+    backpropagate(grandchild, 1.0)
+    assert (root.W, child.W, grandchild.W) == (-1.0, 1.0, -1.0)
+
+def test_quiesce_tb_draw_is_zero():
+    board = chess.Board(QUEEN_STALEMATES)
+    ab = AlphaBetaEvaluator(depth=1, qdepth=2)
+    for wdl in (2, 1, 0, -1, -2):
+        tb = SimpleNamespace(obj=ConstantWDL(wdl))
+        assert ab.quiesce(board, 2, -1.0, 1.0, tb) == wdl_to_score(wdl)
+    # Con la tablebase de juguete, la mejor jugada blanca gana; si todo es tablas, el valor es 0
+    (v, info), = ab.evaluate([board], chess.WHITE, tb=SimpleNamespace(obj=KQvKRules()))
+    assert v == 1.0 and info['tb_hit']
+    (v, _), = AlphaBetaEvaluator(depth=1).evaluate([board], chess.WHITE, tb=SimpleNamespace(obj=ConstantWDL(0)))
+    assert v == 0.0
@@ -0,0 +1,40 @@
+"""
+Caché de valores por posición: media incremental, umbral de confianza, FIFO acotado y estadísticas en mcts_search.
+"""
+
+import chess
+
+from mcts_core import ValueCache, SearchConfig, mcts_search
+
+KBNK = "8/8/8/4k3/8/8/8/KBN5 w - - 0 1"
+
+def test_running_mean_and_threshold():
+    cache = ValueCache(size=2, min_count=3)
+    board = chess.Board(KBNK)
+    key = cache.key(board)
+    for value in (0.0, 0.3, 0.6):
+        assert cache.lookup(key) is None
+        cache.add(key, value)
+    mean, n = cache.lookup(key)
+    assert abs(mean - 0.3) < 1e-12 and n == 3
+    assert cache.hits == 1 and cache.misses == 3
+
+def test_bounded_and_symmetric():
+    cache = ValueCache(size=2, min_count=1, symmetric=True)
+    board = chess.Board(KBNK)
+    cache.add(cache.key(board), 0.5)
+    assert cache.lookup(cache.key(board.transform(chess.flip_horizontal))) == (0.5, 1)
+    for fen in ("8/8/8/4k3/8/8/8/KR6 w - - 0 1", "8/8/8/4k3/8/8/8/KQ6 w - - 0 1"):
+        cache.add(cache.key(chess.Board(fen)), 0.1)
+    assert len(cache.entries) == 2 and cache.evictions == 1
+    assert cache.lookup(cache.key(board)) is None
+
+def test_search_stats():
+    board = chess.Board(KBNK)
+    _, off = mcts_search(board, time_limit=None, max_iters=60, seed=1)
+    assert 'value_cache' not in off
+    _, on = mcts_search(board, time_limit=None, max_iters=60, seed=1,
+                        config=SearchConfig(value_cache_size=1000, value_cache_min_count=1))
+    stats = on['value_cache']
+    assert stats['value_cache_hits'] + stats['value_cache_misses'] == on['iters']
+    assert 0 < stats['value_cache_entries'] <= 1000
@@ -0,0 +1,37 @@
+"""
+Rollouts vectorizados: terminales y heurística como evaluate_endgame_position, valores válidos y reproducibles.
+"""
+
+import random
+
+import chess
+import numpy as np
+
+from mcts_core import evaluate_endgame_position, mcts_search
+from posiciones import random_board
+from vec_rollout import VectorRolloutEvaluator, vector_rollouts
+
+MATED = "k7/1Q6/1K6/8/8/8/8/8 b - - 0 1"
+STALEMATE = "k7/2Q5/1K6/8/8/8/8/8 b - - 0 1"
+PAWNLESS = 'QRBNqrbn'   # vector_rollouts solo admite finales sin peones
+
+def test_horizon_matches_scalar_eval():
+    # Con 0 plies solo se detectan mates/ahogados y se aplica la heurística
+    rng = random.Random(7)
+    boards = [chess.Board(MATED), chess.Board(STALEMATE)] + [random_board(rng, rng.choice([3, 4, 5]), PAWNLESS) for _ in range(300)]
+    values, stats = vector_rollouts(boards, chess.WHITE, 0, np.random.default_rng(0))
+    assert np.allclose(values, [evaluate_endgame_position(b, chess.WHITE) for b in boards])
+    assert values[0] == 1.0 and values[1] == 0.0 and stats['mates'] >= 1
+
+def test_evaluator_reproducible():
+    boards = [chess.Board("8/8/8/4k3/8/8/8/KBN5 w - - 0 1"), chess.Board("8/8/8/4k3/8/8/8/KR6 b - - 0 1")]
+    evaluators = [VectorRolloutEvaluator(lanes=16) for _ in range(2)]
+    runs = [ev.evaluate(boards, chess.WHITE, rng=random.Random(3)) for ev in evaluators]
+    assert [v for v, _ in runs[0]] == [v for v, _ in runs[1]]
+    assert all(-1.0 <= v <= 1.0 and info['plies'] > 0 for v, info in runs[0])
+    # plies: total de los carriles (entero), comparable con los rollouts escalares
+    assert all(isinstance(info['plies'], int) for _, info in runs[0])
+    assert sum(info['plies'] for _, info in runs[0]) == evaluators[0].plies
+    move, _ = mcts_search(boards[0], time_limit=None, max_iters=20, seed=1,
+                          evaluator=VectorRolloutEvaluator(lanes=8), batch_size=4)
+    assert move in boards[0].legal_moves
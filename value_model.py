@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+Modelo de valor lineal (logístico) para evaluar hojas sin rollouts.
+
+- Características baratas calculadas desde el bando al mover: material,
+  distancias de reyes, distancia del rey rival al borde, movilidad y WDL
+  de Syzygy cuando hay tablebase.
+- Se entrena offline con NumPy a partir de las posiciones y resultados que
+  producen nuestras propias partidas MCTS (logs de los CLIs o partidas
+  generadas con `collect_games`).
+- Se guarda como un `.npz` pequeño y se usa en `mcts_search` mediante
+  `LinearValueEvaluator` (argumento `evaluator`).
+
+Uso:
+    python value_model.py collect --games 4 --out datos/value_data.npz
+    python value_model.py train --data datos/value_data.npz --out modelos/value_linear.npz
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import random
+import time
+
+import chess
+import numpy as np
+
+from bb_utils import SQUARE_DIST, EDGE_DIST, material
+from tb_utils import probe_wdl, wdl_to_score
+
+DEFAULT_DATA = os.path.join('datos', 'value_data.npz')
+
+FEATURE_NAMES = [
+    'bias',
+    'material_diff',      # (nuestro - rival) / 10
+    'material_total',     # total / 40
+    'king_dist',          # distancia entre reyes / 7
+    'enemy_king_edge',    # distancia del rey rival al borde más cercano / 3
+    'own_king_edge',      # distancia de nuestro rey al borde / 3
+    'adv_x_enemy_edge',   # signo(material) * (3 - borde rival) / 3  (mop-up)
+    'adv_x_king_dist',    # signo(material) * distancia entre reyes / 7
+    'mobility',           # jugadas legales / 40
+    'in_check',
+    'tb_win',
+    'tb_draw',
+    'tb_loss',
+]
+
+def board_features(board: chess.Board, tb=None) -> list[float]:
+    """Vector de características desde la perspectiva del bando al mover."""
+    us, them = board.turn, not board.turn
+    ours, theirs = material(board, us), material(board, them)
+    diff = ours - theirs
+    adv = (diff > 0) - (diff < 0)
+
+    our_king, their_king = board.king(us), board.king(them)
+    if our_king is not None and their_king is not None:
+        king_dist = SQUARE_DIST[our_king][their_king]
+        enemy_edge = EDGE_DIST[their_king]
+        own_edge = EDGE_DIST[our_king]
+    else:
+        king_dist, enemy_edge, own_edge = 7, 3, 3
+
+    tb_win = tb_draw = tb_loss = 0.0
+    if tb is not None and tb.obj is not None:
+        s = wdl_to_score(probe_wdl(board, tb.obj))
+        if s is not None:
+            tb_win, tb_draw, tb_loss = float(s > 0), float(s == 0), float(s < 0)
+
+    return [
+        1.0,
+        diff / 10.0,
+        (ours + theirs) / 40.0,
+        king_dist / 7.0,
+        enemy_edge / 3.0,
+        own_edge / 3.0,
+        adv * (3 - enemy_edge) / 3.0,
+        adv * king_dist / 7.0,
+        board.legal_moves.count() / 40.0,
+        float(board.is_check()),
+        tb_win,
+        tb_draw,
+        tb_loss,
+    ]
+
+def features_matrix(boards, tb=None) -> np.ndarray:
+    return np.asarray([board_features(b, tb) for b in boards], dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+
+class LinearValueModel:
+    """v = 2·σ(X·w) - 1, en [-1, 1] para el bando al mover."""
+    def __init__(self, weights=None):
+        self.weights = np.zeros(len(FEATURE_NAMES)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return 2.0 / (1.0 + np.exp(-(X @ self.weights))) - 1.0
+
+    def fit(self, X: np.ndarray, y: np.ndarray, l2=1e-3, epochs=3000, lr=0.5) -> 'LinearValueModel':
+        """Regresión logística con objetivos suaves p = (y + 1) / 2, por descenso de gradiente."""
+        p = (np.clip(y, -1.0, 1.0) + 1.0) / 2.0
+        w = np.zeros(X.shape[1])
+        n = max(1, len(X))
+        for _ in range(epochs):
+            z = 1.0 / (1.0 + np.exp(-(X @ w)))
+            grad = X.T @ (z - p) / n + l2 * w
+            w -= lr * grad
+        self.weights = w
+        return self
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, weights=self.weights, feature_names=np.array(FEATURE_NAMES))
+
+    @classmethod
+    def load(cls, path: str) -> 'LinearValueModel':
+        data = np.load(path)
+        names = list(data['feature_names'])
+        if names != FEATURE_NAMES:
+            raise ValueError(f"Características incompatibles en {path}: {names}")
+        return cls(data['weights'])
+
+class LinearValueEvaluator:
+    """Evaluador para `mcts_search` sin rollouts: terminales exactos y modelo lineal para el resto."""
+    def __init__(self, model: LinearValueModel):
+        self.model = model
+
+    def evaluate(self, boards, root_turn, tb=None, cfg=None, rng=None):
+        results = [None] * len(boards)
+        pending = []
+        for i, b in enumerate(boards):
+            if b.is_checkmate():
+                results[i] = (1.0 if b.turn != root_turn else -1.0, {'phase': 'simulate', 'plies': 0, 'moves': [], 'tb_hit': False, 'outcome': 'checkmate'})
+            elif b.is_stalemate() or b.is_insufficient_material() or b.halfmove_clock >= 100:
+                results[i] = (0.0, {'phase': 'simulate', 'plies': 0, 'moves': [], 'tb_hit': False, 'outcome': 'draw'})
+            else:
+                pending.append(i)
+
+        if pending:
+            X = features_matrix([boards[i] for i in pending], tb)
+            values = self.model.predict(X)
+            tb_hit = X[:, FEATURE_NAMES.index('tb_win'):].sum(axis=1) > 0
+            for k, i in enumerate(pending):
+                v = float(values[k]) if boards[i].turn == root_turn else -float(values[k])
+                results[i] = (v, {'phase': 'simulate', 'plies': 0, 'moves': [], 'tb_hit': bool(tb_hit[k]), 'outcome': f'linear_{v:.2f}'})
+        return results
+
+# --- Datos de entrenamiento ---
+
+def _result_value(result: str) -> float | None:
+    """Resultado PGN -> valor para las blancas."""
+    return {'1-0': 1.0, '0-1': -1.0, '1/2-1/2': 0.0}.get(result)
+
+def _label(fen: str, white_value: float) -> float:
+    return white_value if chess.Board(fen).turn == chess.WHITE else -white_value
+
+def load_game_logs(pattern='logs/*.jsonl') -> tuple[list[str], list[float]]:
+    """Lee los logs de play_cli_tb / play_mcts_cli y etiqueta cada posición con el resultado final."""
+    fens, labels = [], []
+    for path in sorted(glob.glob(pattern)):
+        game_fens, result = [], None
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                ev = json.loads(line)
+                if ev.get('type') == 'final':
+                    result = ev.get('result')
+                elif 'fen' in ev:
+                    game_fens.append(ev['fen'])
+        value = _result_value(result) if result else None
+        if value is None:
+            continue
+        fens.extend(game_fens)
+        labels.extend(_label(fen, value) for fen in game_fens)
+    return fens, labels
+
+def play_labeled_game(fen, time_limit=0.3, max_moves=20, seed=None, tb=None, rng=None):
+    """Juega MCTS contra el oponente simple de los reportes y devuelve (fens, valor para blancas).
+
+    Si la partida no termina, el valor es `evaluate_endgame_position` de la
+    posición final (o el WDL de Syzygy si está disponible).
+    """
+    from mcts_core import mcts_search, evaluate_endgame_position
+
+    rng = rng or random.Random(seed)
+    board = chess.Board(fen)
+    fens = [board.fen()]
+    for _ in range(max_moves):
+        if board.is_game_over():
+            break
+        move, _ = mcts_search(board, time_limit=time_limit, seed=rng.randrange(2**31), tb=tb)
+        if move is None:
+            break
+        board.push(move)
+        fens.append(board.fen())
+        if board.is_game_over():
+            break
+        moves = list(board.legal_moves)
+        safe = [m for m in moves if not _gives_mate(board, m)]
+        board.push(rng.choice(safe or moves))
+        fens.append(board.fen())
+
+    if board.is_checkmate():
+        value = 1.0 if board.turn == chess.BLACK else -1.0
+    elif board.is_game_over():
+        value = 0.0
+    else:
+        wdl = probe_wdl(board, tb.obj) if tb is not None and tb.obj is not None else None
+        if wdl is not None:
+            s = wdl_to_score(wdl)
+            value = s if board.turn == chess.WHITE else -s
+        else:
+            value = evaluate_endgame_position(board, chess.WHITE)
+    return fens, value
+
+def _gives_mate(board: chess.Board, move: chess.Move) -> bool:
+    board.push(move)
+    mate = board.is_checkmate()
+    board.pop()
+    return mate
+
+def collect_games(fens, games_per_fen=4, time_limit=0.3, max_moves=20, seed=42, tb=None):
+    rng = random.Random(seed)
+    all_fens, labels = [], []
+    for fen in fens:
+        for _ in range(games_per_fen):
+            game_fens, value = play_labeled_game(fen, time_limit, max_moves, tb=tb, rng=rng)
+            all_fens.extend(game_fens)
+            labels.extend(_label(f, value) for f in game_fens)
+    return all_fens, labels
+
+def save_dataset(path, fens, labels):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    np.savez_compressed(path, fens=np.array(fens), labels=np.asarray(labels, dtype=np.float32))
+
+def load_dataset(path) -> tuple[list[str], np.ndarray]:
+    data = np.load(path)
+    return [str(f) for f in data['fens']], data['labels'].astype(np.float64)
+
+def load_selfplay_shards(out_dir: str) -> tuple[list[str], list[float]]:
+    """Posiciones de los shards de selfplay.py; la etiqueta es el WDL de Syzygy si se conoce, si no el resultado."""
+    from selfplay import iter_shards, shard_boards, TB_UNKNOWN
+
+    fens, labels = [], []
+    for arrays in iter_shards(out_dir):
+        for board, result, wdl in zip(shard_boards(arrays), arrays['result'], arrays['tb_wdl']):
+            fens.append(board.fen())
+            labels.append(wdl_to_score(int(wdl)) if wdl != TB_UNKNOWN else float(result))
+    return fens, labels
+
+def train_model(fens, labels, tb=None, l2=1e-3, epochs=3000) -> LinearValueModel:
+    X = features_matrix([chess.Board(f) for f in fens], tb)
+    return LinearValueModel().fit(X, np.asarray(labels, dtype=np.float64), l2=l2, epochs=epochs)
+
+def main():
+    from tb_utils import TBLite
+    from posiciones import TEST_POSITIONS
+
+    parser = argparse.ArgumentParser(description="Modelo de valor lineal para MCTS")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p_col = sub.add_parser('collect', help='Genera posiciones etiquetadas jugando partidas MCTS')
+    p_col.add_argument('--games', type=int, default=4, help='Partidas por posición de TEST_POSITIONS')
+    p_col.add_argument('--mcts-time', type=float, default=0.3)
+    p_col.add_argument('--max-moves', type=int, default=20)
+    p_col.add_argument('--logs', type=str, default='logs/*.jsonl', help='Logs de los CLIs a incluir')
+    p_col.add_argument('--seed', type=int, default=42)
+    p_col.add_argument('--syzygy-dir', type=str, default=None)
+    p_col.add_argument('--out', type=str, default=DEFAULT_DATA)
+
+    p_tr = sub.add_parser('train', help='Entrena el modelo y lo guarda como .npz')
+    p_tr.add_argument('--data', type=str, nargs='*', default=[],
+                      help=f'Datasets de collect (por defecto {DEFAULT_DATA} si tampoco hay --shards)')
+    p_tr.add_argument('--shards', type=str, nargs='*', default=[], help='Directorios de shards de selfplay.py')
+    p_tr.add_argument('--l2', type=float, default=1e-3)
+    p_tr.add_argument('--epochs', type=int, default=3000)
+    p_tr.add_argument('--syzygy-dir', type=str, default=None)
+    p_tr.add_argument('--out', type=str, default='modelos/value_linear.npz')
+    args = parser.parse_args()
+
+    with TBLite(args.syzygy_dir) as tb:
+        if args.cmd == 'collect':
+            t0 = time.time()
+            fens, labels = load_game_logs(args.logs)
+            print(f"Logs: {len(fens)} posiciones")
+            g_fens, g_labels = collect_games([m['fen'] for m in TEST_POSITIONS.values()], args.games,
+                                             args.mcts_time, args.max_moves, seed=args.seed, tb=tb)
+            fens += g_fens; labels += g_labels
+            save_dataset(args.out, fens, labels)
+            print(f"{len(fens)} posiciones -> {args.out} ({time.time() - t0:.1f}s)")
+        else:
+            fens, labels = [], []
+            for path in args.data or ([] if args.shards else [DEFAULT_DATA]):
+                f, l = load_dataset(path)
+                fens += f; labels += list(l)
+            for out_dir in args.shards:
+                f, l = load_selfplay_shards(out_dir)
+                fens += f; labels += l
+            model = train_model(fens, labels, tb=tb, l2=args.l2, epochs=args.epochs)
+            model.save(args.out)
+            pred = model.predict(features_matrix([chess.Board(f) for f in fens], tb))
+            mse = float(np.mean((pred - np.asarray(labels)) ** 2))
+            print(f"Entrenado con {len(fens)} posiciones | MSE={mse:.4f} -> {args.out}")
+            for name, w in zip(FEATURE_NAMES, model.weights):
+                print(f"  {name:18s} {w:+.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Rollouts vectorizados en NumPy para finales sin peones.
+
+Cada rollout en Python es un bucle por tablero: el coste por ply lo pone el
+intérprete. Aquí B rollouts ("carriles") avanzan a la vez, un ply por paso:
+- estado en arrays uint64 (B,): ocupación por color y bitboard por tipo;
+- ataques por tablas (rey, caballo) y rayos con primer bloqueador
+  (lsb64/msb64 de bb_utils) para las piezas deslizantes;
+- política ligera: capturas primero (la pieza más valiosa), si no una
+  jugada al azar; la legalidad se comprueba después de elegir y las
+  jugadas ilegales se descartan y se vuelve a elegir en esos carriles;
+- mate, ahogado y material insuficiente por carril; en el horizonte,
+  Syzygy por carril si hay tablebase y si no la heurística de
+  `evaluate_endgame_batch` calculada sobre los mismos arrays.
+
+`VectorRolloutEvaluator` implementa `mcts_core.Evaluator`: cada hoja se
+evalúa con `lanes` rollouts (la media) y todas las hojas del lote van en el
+mismo paso. Las hojas con peones, enroque o sin los dos reyes usan `simulate`.
+
+Uso:
+    from vec_rollout import VectorRolloutEvaluator
+    mcts_search(board, time_limit=1.0, evaluator=VectorRolloutEvaluator(lanes=32), batch_size=8)
+"""
+
+from __future__ import annotations
+
+import chess
+import numpy as np
+
+from bb_utils import lsb64, msb64, popcount64, geometry_arrays, PIECE_VALUES
+from mcts_core import simulate, SearchConfig, DEFAULT_CONFIG
+from tb_utils import probe_wdl, wdl_to_score
+
+U64 = np.uint64
+ZERO = U64(0)
+PIECE_TYPES = (chess.KING, chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)
+VALUES = {pt: PIECE_VALUES[pt] for pt in (chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)}
+
+KING_ATT = np.array(chess.BB_KING_ATTACKS, dtype=np.uint64)
+KNIGHT_ATT = np.array(chess.BB_KNIGHT_ATTACKS, dtype=np.uint64)
+
+def _ray(sq: int, df: int, dr: int) -> int:
+    bb, f, r = 0, chess.square_file(sq) + df, chess.square_rank(sq) + dr
+    while 0 <= f < 8 and 0 <= r < 8:
+        bb |= chess.BB_SQUARES[chess.square(f, r)]
+        f, r = f + df, r + dr
+    return bb
+
+def _rays(directions):
+    """(rayo por casilla, ¿el primer bloqueador es el lsb?) por dirección."""
+    return [(np.array([_ray(sq, df, dr) for sq in chess.SQUARES], dtype=np.uint64), df + 8 * dr > 0)
+            for df, dr in directions]
+
+ROOK_RAYS = _rays(((0, 1), (0, -1), (1, 0), (-1, 0)))
+BISHOP_RAYS = _rays(((1, 1), (-1, 1), (1, -1), (-1, -1)))
+
+def slide(sq, occupied, rays):
+    """Ataques deslizantes desde `sq` (B,) con la ocupación `occupied` (B,)."""
+    attacks = np.zeros(len(sq), dtype=np.uint64)
+    for ray, positive in rays:
+        r = ray[sq]
+        blockers = r & occupied
+        first = lsb64(blockers) if positive else msb64(blockers)
+        attacks |= r ^ np.where(blockers != 0, ray[np.maximum(first, 0)], ZERO)
+    return attacks
+
+def square_bits(sq):
+    return np.left_shift(U64(1), np.asarray(sq).astype(np.uint64))
+
+def bit_matrix(bb):
+    """(..., ) uint64 -> (..., 64) bool con el bit i en la columna i."""
+    bb = np.ascontiguousarray(bb, dtype=np.uint64)
+    return np.unpackbits(bb.view(np.uint8).reshape(bb.shape + (8,)), axis=-1, bitorder='little').astype(bool)
+
+class Lanes:
+    """B posiciones sin peones como arrays: `occ[color]` y `kinds[tipo]` (uint64), `turn` (bool)."""
+    def __init__(self, boards: list[chess.Board]):
+        n = len(boards)
+        self.occ = np.zeros((2, n), dtype=np.uint64)
+        self.kinds = np.zeros((7, n), dtype=np.uint64)
+        for i, b in enumerate(boards):
+            self.occ[:, i] = (b.occupied_co[chess.BLACK], b.occupied_co[chess.WHITE])
+            for pt in PIECE_TYPES:
+                self.kinds[pt, i] = b.pieces_mask(pt, chess.WHITE) | b.pieces_mask(pt, chess.BLACK)
+        self.turn = np.array([b.turn for b in boards], dtype=bool)
+
+    def sides(self):
+        """(propias, rivales) del bando al mover en cada carril."""
+        return np.where(self.turn, self.occ[1], self.occ[0]), np.where(self.turn, self.occ[0], self.occ[1])
+
+    def attacked(self, sq, by, occupied):
+        """¿Atacan las piezas de la máscara `by` a `sq`? (por carril)."""
+        k = self.kinds
+        hit = (KNIGHT_ATT[sq] & k[chess.KNIGHT]) | (KING_ATT[sq] & k[chess.KING])
+        hit |= slide(sq, occupied, ROOK_RAYS) & (k[chess.ROOK] | k[chess.QUEEN])
+        hit |= slide(sq, occupied, BISHOP_RAYS) & (k[chess.BISHOP] | k[chess.QUEEN])
+        return (hit & by) != 0
+
+    def targets(self, own):
+        """Casillas destino pseudo-legales por "ranura" de pieza: (origen (B,S), destinos (B,S), tipo (S,))."""
+        occupied = self.occ[0] | self.occ[1]
+        froms, targets, types = [], [], []
+        for pt in PIECE_TYPES:
+            rest = self.kinds[pt] & own
+            for _ in range(int(popcount64(rest).max(initial=0))):
+                sq = lsb64(rest)
+                valid = sq >= 0
+                sq = np.maximum(sq, 0)
+                rest &= rest - U64(1)
+                if pt == chess.KING:
+                    att = KING_ATT[sq]
+                elif pt == chess.KNIGHT:
+                    att = KNIGHT_ATT[sq]
+                else:
+                    att = np.zeros(len(sq), dtype=np.uint64)
+                    if pt in (chess.ROOK, chess.QUEEN):
+                        att |= slide(sq, occupied, ROOK_RAYS)
+                    if pt in (chess.BISHOP, chess.QUEEN):
+                        att |= slide(sq, occupied, BISHOP_RAYS)
+                froms.append(sq)
+                targets.append(np.where(valid, att & ~own, ZERO))
+                types.append(pt)
+        return np.stack(froms, axis=1), np.stack(targets, axis=1), np.array(types)
+
+    def insufficient(self):
+        """Material insuficiente de python-chess para finales sin peones: sin damas ni torres y
+        como mucho una pieza menor, o sólo alfiles del mismo color de casilla."""
+        k = self.kinds
+        minors = popcount64(k[chess.BISHOP] | k[chess.KNIGHT])
+        same_colour = ((k[chess.BISHOP] & U64(chess.BB_DARK_SQUARES)) == 0) | ((k[chess.BISHOP] & U64(chess.BB_LIGHT_SQUARES)) == 0)
+        return ((k[chess.QUEEN] | k[chess.ROOK]) == 0) & ((minors <= 1) | ((k[chess.KNIGHT] == 0) & same_colour))
+
+    def heuristic(self, root_turn: chess.Color):
+        """`evaluate_endgame_position` (parte no terminal) para `root_turn` en cada carril."""
+        k = self.kinds
+        ours, theirs = self.occ[int(root_turn)], self.occ[int(not root_turn)]
+
+        def material(side):
+            return (3 * popcount64((k[chess.KNIGHT] | k[chess.BISHOP]) & side) + 5 * popcount64(k[chess.ROOK] & side)
+                    + 9 * popcount64(k[chess.QUEEN] & side))
+
+        diff = material(ours) - material(theirs)
+        our_king, their_king = lsb64(k[chess.KING] & ours), lsb64(k[chess.KING] & theirs)
+        kings = (our_king > 0) & (their_king > 0)   # como la versión escalar: un rey en a1 no cuenta
+        mopup = geometry_arrays()['MOPUP'][np.maximum(our_king, 0), np.maximum(their_king, 0)]
+        winning = np.minimum(np.minimum(diff / 10.0, 0.5) + mopup, 0.95)
+        return np.where(diff < 0, -0.8, np.where((diff > 0) & kings, winning, 0.1))
+
+    def board(self, i: int) -> chess.Board:
+        b = chess.Board(None)
+        for pt in PIECE_TYPES:
+            for color in chess.COLORS:
+                for sq in chess.scan_forward(int(self.kinds[pt, i] & self.occ[int(color), i])):
+                    b.set_piece_at(sq, chess.Piece(pt, color))
+        b.turn = bool(self.turn[i])
+        return b
+
+def vector_rollouts(boards: list[chess.Board], root_turn: chess.Color, max_plies: int, np_rng: np.random.Generator,
+                    tb=None) -> tuple[np.ndarray, dict]:
+    """Un rollout por tablero (sin peones ni enroque), todos a la vez. Devuelve valores (B,) para
+    `root_turn` y contadores ('plies' por carril, 'mates', 'tb_probes', 'tb_hits')."""
+    lanes = Lanes(boards)
+    n = len(boards)
+    ar = np.arange(n)
+    values = np.zeros(n)
+    done = np.zeros(n, dtype=bool)
+    plies = np.zeros(n, dtype=np.int64)
+    mates = 0
+
+    draw = lanes.insufficient()
+    done |= draw
+    for ply in range(max_plies + 1):
+        active = ~done
+        if not active.any():
+            break
+        own, their = lanes.sides()
+        occupied = lanes.occ[0] | lanes.occ[1]
+        froms, targets, types = lanes.targets(own)
+        candidates = bit_matrix(targets) & active[:, None, None]
+        keys = np_rng.random(candidates.shape)
+        victims = sum(VALUES[pt] * bit_matrix(lanes.kinds[pt] & their) for pt in VALUES)
+        keys += np.where(victims > 0, 1.0 + victims / 10.0, 0.0)[:, None, :]   # capturas primero
+        keys = np.where(candidates, keys, -1.0).reshape(n, -1)
+
+        king = lsb64(lanes.kinds[chess.KING] & own)
+        chosen = np.full(n, -1)
+        pending = active.copy()
+        while pending.any():
+            idx = keys.argmax(axis=1)
+            empty = pending & (keys[ar, idx] < 0)
+            pending &= ~empty
+            slot, to = idx // 64, idx % 64
+            frm = froms[ar, slot]
+            to_bit = square_bits(to)
+            after = (occupied & ~square_bits(frm)) | to_bit
+            king_after = np.where(types[slot] == chess.KING, to, king)
+            illegal = lanes.attacked(king_after, their & ~to_bit, after)
+            chosen = np.where(pending & ~illegal, idx, chosen)
+            keys[ar[pending & illegal], idx[pending & illegal]] = -1.0
+            pending &= illegal
+
+        # Sin jugadas legales: mate (pierde el bando al mover) o ahogado
+        stuck = active & (chosen < 0)
+        in_check = lanes.attacked(king, their, occupied)
+        mated = stuck & in_check
+        values = np.where(mated, np.where(lanes.turn == root_turn, -1.0, 1.0), values)
+        mates += int(mated.sum())
+        done |= stuck
+        if ply == max_plies:
+            break
+
+        moved = active & (chosen >= 0)
+        slot, to = np.maximum(chosen, 0) // 64, np.maximum(chosen, 0) % 64
+        frm_bit, to_bit = square_bits(froms[ar, slot]), square_bits(to)
+        path = np.where(moved, frm_bit | to_bit, ZERO)
+        captured = np.where(moved, to_bit, ZERO)
+        for pt in PIECE_TYPES:
+            lanes.kinds[pt] &= ~captured
+            lanes.kinds[pt] ^= np.where(types[slot] == pt, path, ZERO)
+        white = lanes.turn
+        lanes.occ[1] = np.where(white, lanes.occ[1] ^ path, lanes.occ[1] & ~captured)
+        lanes.occ[0] = np.where(white, lanes.occ[0] & ~captured, lanes.occ[0] ^ path)
+        lanes.turn = np.where(moved, ~lanes.turn, lanes.turn)
+        plies += moved
+        draw = moved & lanes.insufficient()
+        done |= draw
+
+    # Horizonte: Syzygy por carril si hay, si no la heurística
+    open_lanes = np.flatnonzero(~done)
+    tb_hits = 0
+    if len(open_lanes) and tb is not None and tb.obj is not None:
+        for i in open_lanes:
+            b = lanes.board(i)
+            wdl = probe_wdl(b, tb.obj)
+            if wdl is not None:
+                s = wdl_to_score(wdl)
+                values[i] = s if b.turn == root_turn else -s
+                done[i] = True
+                tb_hits += 1
+    rest = ~done
+    values = np.where(rest, lanes.heuristic(root_turn), values)
+    tb_probes = len(open_lanes) if tb is not None and tb.obj is not None else 0
+    return values, {'plies': plies, 'mates': mates, 'tb_probes': tb_probes, 'tb_hits': tb_hits}
+
+def can_vectorize(board: chess.Board) -> bool:
+    return (not board.pawns and not board.castling_rights and not board.is_game_over()
+            and chess.popcount(board.kings & board.occupied_co[chess.WHITE]) == 1
+            and chess.popcount(board.kings & board.occupied_co[chess.BLACK]) == 1)
+
+class VectorRolloutEvaluator:
+    """Evaluador para `mcts_search`: `lanes` rollouts vectorizados por hoja (media de valores).
+
+    Las hojas con peones, enroque, sin los dos reyes o ya terminadas usan `simulate`.
+    Si no se fija `max_plies`, se usa `cfg.rollout_max_plies`."""
+    def __init__(self, lanes: int = 32, max_plies: int | None = None):
+        self.lanes = lanes
+        self.max_plies = max_plies
+        self.plies = 0
+
+    def evaluate(self, boards, root_turn, tb=None, cfg: SearchConfig = DEFAULT_CONFIG, rng=None):
+        max_plies = self.max_plies if self.max_plies is not None else cfg.rollout_max_plies
+        results: list = [None] * len(boards)
+        vector = []
+        for i, b in enumerate(boards):
+            if not can_vectorize(b):
+                results[i] = simulate(b, max_plies=max_plies, tb=tb, root_turn=root_turn, rng=rng,
+                                      fast_pieces=cfg.fast_rollout_pieces)
+                continue
+            info = {'phase': 'simulate', 'plies': 0, 'moves': [], 'tb_hit': False, 'outcome': None,
+                    'board_copies': 0, 'tb_probes': 0, 'fast_board': False, 'lanes': self.lanes}
+            if tb is not None and tb.obj is not None:
+                wdl = probe_wdl(b, tb.obj)
+                info['tb_probes'] += 1
+                if wdl is not None:
+                    s = wdl_to_score(wdl)
+                    info.update(tb_hit=True, outcome=f'TB_immediate_{wdl}')
+                    results[i] = (s if b.turn == root_turn else -s, info)
+                    continue
+            vector.append((i, info))
+
+        if vector:
+            seed = rng.getrandbits(64) if rng is not None else None
+            lane_boards = [boards[i] for i, _ in vector for _ in range(self.lanes)]
+            values, stats = vector_rollouts(lane_boards, root_turn, max_plies, np.random.default_rng(seed), tb)
+            self.plies += int(stats['plies'].sum())
+            for j, (i, info) in enumerate(vector):
+                lane = slice(j * self.lanes, (j + 1) * self.lanes)
+                lane_values = values[lane]
+                info['plies'] = int(stats['plies'][lane].sum())   # plies de todos los carriles, como en simulate
+                info['outcome'] = f'vector_{lane_values.mean():.2f}'
+                results[i] = (float(lane_values.mean()), info)
+        return results